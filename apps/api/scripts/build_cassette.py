@@ -0,0 +1,38 @@
+import argparse, os, sys
+
+from pathlib import Path
+
+if not os.getenv("CI"):
+    from dotenv import load_dotenv
+    
+    project_root = Path(__file__).resolve().parent.parent
+    load_dotenv(project_root / ".env")
+
+SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.cassette import build_cassette
+from src.core.database import get_db
+
+def _ids(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a replay cassette (see BENCHMARK_CASSETTE) from stored provider responses"
+    )
+    parser.add_argument("output", type=Path, help="cassette file to write, eg: cassettes/hyperevm.jsonl.gz")
+    parser.add_argument("--runs", type=_ids, required=True, help="comma separated run ids to take responses from")
+    args = parser.parse_args()
+
+    db_session = next(get_db())
+    try:
+        build_cassette(db_session, args.runs, args.output)
+    finally:
+        db_session.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import argparse, json, os, sys
+
+SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.plan import diff_plans
+
+def _load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diff two saved trade plans (see BENCHMARK_PLAN_DIR)"
+    )
+    parser.add_argument("before", help="plan json of the earlier run")
+    parser.add_argument("after", help="plan json of the later run")
+    args = parser.parse_args()
+
+    print(json.dumps(diff_plans(_load(args.before), _load(args.after)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import os, sys
+import argparse, os, sys
 
 from pathlib import Path
 
@@ -13,12 +13,58 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
 sys.path.insert(0, PROJECT_ROOT)
 
+# runners are long-lived, keep a warm connection pool
+os.environ.setdefault("DATABASE_PROFILE", "worker")
+
+from src.core.config import settings
+from src.core.ingest import upload_run
 from src.core.runner import run_benchmark_for_all_chains
 
+def _csv(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the multi-chain benchmark")
+    parser.add_argument(
+        "--providers", type=_csv, default=None,
+        help="comma separated provider keys to use (default: all registered)"
+    )
+    parser.add_argument(
+        "--disable", type=_csv, default=None,
+        help="comma separated provider keys to skip"
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const=True, default=None, metavar="PROFILER",
+        help="record per-chain phase spans and profile the run with cprofile (default), sampling or none "
+             "(same as BENCHMARK_PROFILE=true / BENCHMARK_PROFILER)"
+    )
+    parser.add_argument(
+        "--upload-run", type=int, default=None, metavar="RUN_ID",
+        help="only upload a run of the local spool database to BENCHMARK_INGEST_URL (eg: after a failed upload)"
+    )
+    args = parser.parse_args()
+
+    if args.upload_run is not None:
+        upload_run(args.upload_run)
+        print(f"\n✅ Uploaded run {args.upload_run} to {settings.ingest_url}")
+        return
+
+    if args.profile is not None:
+        settings.profile = True
+        if args.profile is not True:
+            settings.profiler = args.profile
+
     print("\n🚀 Starting multi-chain benchmark…")
-    run_id = run_benchmark_for_all_chains()
+    run_id = run_benchmark_for_all_chains(
+        providers=args.providers, disabled_providers=args.disable
+    )
     print(f"\n✅ All benchmarks completed! Run ID: {run_id}")
 
+    # agents keep runs in their local database and hand them to the API
+    if settings.ingest_url:
+        upload_run(run_id)
+        print(f"\n✅ Uploaded run {run_id} from {settings.vantage_point} to {settings.ingest_url}")
+
 if __name__ == "__main__":
     main()
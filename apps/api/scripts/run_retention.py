@@ -0,0 +1,28 @@
+import os, sys
+
+from pathlib import Path
+
+if not os.getenv("CI"):
+    from dotenv import load_dotenv
+    
+    project_root = Path(__file__).resolve().parent.parent
+    load_dotenv(project_root / ".env")
+
+SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault("DATABASE_PROFILE", "worker")
+
+from src.core.database import init_db
+from src.core.retention import run_retention
+
+def main():
+    print("\n🧹 Starting benchmark retention…")
+    init_db()
+    run_retention()
+    print("\n✅ Benchmark retention completed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os, signal, sys
+
+from pathlib import Path
+
+if not os.getenv("CI"):
+    from dotenv import load_dotenv
+    
+    project_root = Path(__file__).resolve().parent.parent
+    load_dotenv(project_root / ".env")
+
+SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+sys.path.insert(0, PROJECT_ROOT)
+
+# runners are long-lived, keep a warm connection pool
+os.environ.setdefault("DATABASE_PROFILE", "worker")
+
+from src.core.scheduler import BenchmarkScheduler
+
+def main():
+    print("\n⏰ Starting benchmark scheduler…")
+    scheduler = BenchmarkScheduler()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: scheduler.stop())
+
+    scheduler.run_forever()
+    print("\n✅ Benchmark scheduler stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import atexit
+import gzip
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .config import settings
+
+
+# request fields that differ between environments, not part of the match key
+IGNORED_FIELDS = ("userAddress", "outputReceiver", "uniquePID")
+
+CASSETTE_VERSION = 1
+
+
+def _strip(value):
+    if isinstance(value, dict):
+        return {key: _strip(item) for key, item in value.items() if key not in IGNORED_FIELDS}
+    if isinstance(value, list):
+        return [_strip(item) for item in value]
+    return value
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """
+    Key a request is matched on: method, url, sorted query and the json body
+    (without IGNORED_FIELDS), headers are ignored
+    """
+
+    url = urlsplit(request.url)
+    query = sorted(parse_qsl(url.query, keep_blank_values=True))
+
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    try:
+        body = json.dumps(_strip(json.loads(body)), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        body = body.decode(errors="replace")
+
+    fingerprint = json.dumps([request.method, f"{url.scheme}://{url.netloc}{url.path}", query, body])
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded request/response pairs with their latency, stored as gzipped
+    json lines (one header line per recording session, then one line per
+    exchange). Sessions are appended as gzip members, so one file can collect
+    several runs. Several responses for the same request are replayed in turn.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, List[dict]] = {}
+        self._replayed: Dict[str, int] = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        cassette = cls(path)
+
+        with gzip.open(cassette.path, "rt") as file:
+            for line in file:
+                entry = json.loads(line)
+                if "key" in entry:
+                    cassette.entries.setdefault(entry["key"], []).append(entry)
+
+        print(
+            f"📼 Loaded cassette {cassette.path}: "
+            f"{sum(len(entries) for entries in cassette.entries.values())} responses for {len(cassette.entries)} requests"
+        )
+        return cassette
+
+    def record(self, request: requests.PreparedRequest, status: int, body: bytes, content_type: Optional[str], elapsed: float):
+        entry = {
+            "key": request_key(request),
+            "method": request.method,
+            "url": request.url,
+            "status": status,
+            "content_type": content_type,
+            "body": body.decode(errors="replace"),
+            "elapsed": round(elapsed, 6),
+        }
+
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = gzip.open(self.path, "at")
+                self._file.write(json.dumps({"version": CASSETTE_VERSION, "recorded_at": datetime.utcnow().isoformat()}) + "\n")
+                atexit.register(self.close)
+            self._file.write(json.dumps(entry) + "\n")
+
+    def next_response(self, request: requests.PreparedRequest) -> Optional[dict]:
+        key = request_key(request)
+
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            idx = self._replayed.get(key, 0)
+            self._replayed[key] = idx + 1
+
+        return entries[idx % len(entries)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _response(request: requests.PreparedRequest, status: int, body: bytes, content_type: Optional[str]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers = CaseInsensitiveDict({"content-type": content_type or "application/json"})
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if status < 400 else "Error"
+    return response
+
+
+class RecordingAdapter(BaseAdapter):
+    """Sends requests through the real adapter and records every exchange"""
+
+    def __init__(self, adapter: BaseAdapter, cassette: Cassette):
+        super().__init__()
+        self.adapter = adapter
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        start_time = time.perf_counter()
+        response = self.adapter.send(request, **kwargs)
+        body = response.content  # read the whole body, like the providers do
+        elapsed = time.perf_counter() - start_time
+
+        self.cassette.record(request, response.status_code, body, response.headers.get("content-type"), elapsed)
+        return response
+
+    def close(self):
+        self.adapter.close()
+        self.cassette.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from a cassette without touching the network, after
+    the recorded latency times BENCHMARK_CASSETTE_LATENCY_SCALE (0 answers
+    right away). Unknown requests fail like a connection error.
+    """
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        super().__init__()
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    def send(self, request, timeout=None, **kwargs):
+        entry = self.cassette.next_response(request)
+        if entry is None:
+            raise requests.ConnectionError(f"No cassette response for {request.method} {request.url}", request=request)
+
+        delay = entry["elapsed"] * self.latency_scale
+        if isinstance(timeout, (int, float)) and delay > timeout:
+            time.sleep(timeout)
+            raise requests.Timeout(f"Replayed response took {delay:.3f}s", request=request)
+        if delay > 0:
+            time.sleep(delay)
+
+        return _response(request, entry["status"], entry["body"].encode(), entry["content_type"])
+
+    def close(self):
+        pass
+
+
+class _FixtureAdapter(BaseAdapter):
+    """Answers every request with the next fixture, recording the exchange (see `build_cassette`)"""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+        self.fixture = None
+
+    def send(self, request, **kwargs):
+        status, body, elapsed = self.fixture
+        self.cassette.record(request, status, body, "application/json", elapsed)
+        return _response(request, status, body, "application/json")
+
+    def close(self):
+        pass
+
+
+def cassette_adapter(adapter: BaseAdapter) -> BaseAdapter:
+    """
+    The adapter to mount on the shared http session: `adapter` itself, or
+    wrapped to record (BENCHMARK_CASSETTE=record) or replaced to replay
+    (BENCHMARK_CASSETTE=replay) BENCHMARK_CASSETTE_PATH
+    """
+
+    if settings.cassette == "off":
+        return adapter
+
+    if not settings.cassette_path:
+        raise ValueError(f"BENCHMARK_CASSETTE={settings.cassette} needs BENCHMARK_CASSETTE_PATH")
+
+    if settings.cassette == "record":
+        print(f"📼 Recording http traffic to {settings.cassette_path}")
+        return RecordingAdapter(adapter, Cassette(settings.cassette_path))
+
+    if settings.cassette == "replay":
+        print(f"📼 Replaying http traffic from {settings.cassette_path} (latency x{settings.cassette_latency_scale})")
+        return ReplayAdapter(Cassette.load(settings.cassette_path), settings.cassette_latency_scale)
+
+    raise ValueError(f"Unknown BENCHMARK_CASSETTE {settings.cassette!r}, expected off, record or replay")
+
+
+def _synthesized_prices(chain_id: str, rows) -> Dict[str, float]:
+    """
+    Token prices consistent with a chain's history: the normalization token
+    is worth 1, a token bought for it at (amount_usd / output) per token,
+    tokens never bought that way get 1
+    """
+
+    from ..data.chain import CHAIN_CONFIG
+
+    chain_config = CHAIN_CONFIG[chain_id]
+    normalization = chain_config["normalization_token"]["address"].lower()
+
+    observed: Dict[str, List[float]] = {}
+    for trade, result in rows:
+        if trade.from_token.lower() != normalization or result.status_code != 200:
+            continue
+        try:
+            output = float(result.output_amount)
+        except (TypeError, ValueError):
+            continue
+        if output > 0:
+            observed.setdefault(trade.to_token.lower(), []).append(trade.amount_usd / output)
+
+    # keyed by the configured address, which is what the runner sends to the oracle
+    prices = {}
+    for token in [chain_config["normalization_token"]] + chain_config["trading_tokens"]:
+        address = token["address"].lower()
+        values = sorted(observed.get(address, []))
+        prices[token["address"]] = 1.0 if address == normalization else values[len(values) // 2] if values else 1.0
+    return prices
+
+
+def build_cassette(db_session, run_ids: List[int], path: Path) -> int:
+    """
+    Build a cassette from `ProviderResult.raw_response` history
+
+    Every token gets one price, its latest price snapshot in these runs, or
+    for runs without snapshots a price synthesized from the history (see
+    `_synthesized_prices`), and exchange-rate responses serving it are
+    recorded. Each stored response is then recorded under the
+    exact request its provider would send for the trade at those prices: the
+    provider's `get_quote` is called with the stored response as fixture. A
+    replay of the same chains and pairs quotes exactly the recorded trades.
+
+    Args:
+        db_session: Sync session
+        run_ids: Runs to take responses from
+        path: Cassette to write (appended to when it exists)
+
+    Returns:
+        Number of provider responses recorded
+    """
+
+    from .http import get_http_session
+    from .plan import get_trade_plan
+    from .runner import TOKEN_DECIMALS, fetch_token_price_in_usd
+    from ..data.chain import CHAIN_CONFIG
+    from ..models import PriceSnapshot, ProviderResult, TradeResult
+    from ..providers.registry import provider_key, provider_registry
+
+    cassette = Cassette(path)
+    fixtures = _FixtureAdapter(cassette)
+
+    session = get_http_session()
+    adapters = dict(session.adapters)
+    session.mount("https://", fixtures)
+    session.mount("http://", fixtures)
+
+    recorded = 0
+
+    try:
+        rows = (
+            db_session.query(TradeResult, ProviderResult)
+            .join(ProviderResult, ProviderResult.trade_id == TradeResult.id)
+            .filter(TradeResult.run_id.in_(run_ids), ProviderResult.raw_response.isnot(None))
+            .order_by(TradeResult.id, ProviderResult.id)
+            .all()
+        )
+
+        by_chain = {}
+        for trade, result in rows:
+            by_chain.setdefault(trade.chain, []).append((trade, result))
+
+        for chain_id, chain_rows in by_chain.items():
+            plan = get_trade_plan(chain_id)
+            if not plan:
+                print(f"⏭️  Chain {chain_id} is no longer configured, skipping")
+                continue
+
+            prices = _synthesized_prices(chain_id, chain_rows)
+            snapshots = (
+                db_session.query(PriceSnapshot)
+                .filter(PriceSnapshot.run_id.in_(run_ids), PriceSnapshot.chain == chain_id)
+                .order_by(PriceSnapshot.run_id)
+            )
+            for snapshot in snapshots:
+                if snapshot.price_usd and snapshot.token in prices:
+                    prices[snapshot.token] = snapshot.price_usd
+            usd_decimals = TOKEN_DECIMALS[CHAIN_CONFIG[chain_id]["normalization_token"]["address"].lower()]
+
+            # the oracle quotes the raw price, the runner adjusts it by the decimal difference,
+            # trades are priced with what the runner will get back on replay
+            for address, price in prices.items():
+                raw_price = price * 10 ** (usd_decimals - TOKEN_DECIMALS[address.lower()])
+                fixtures.fixture = (200, json.dumps([{"price": raw_price}]).encode(), 0.05)
+                prices[address], _ = fetch_token_price_in_usd(chain_id, address)
+
+            for trade, result in chain_rows:
+                provider = provider_registry.get(provider_key(result.provider))
+                if provider is None or trade.amount_usd not in plan.amount_usd:
+                    continue
+
+                priced = plan.with_pairs([{
+                    "name": trade.pair,
+                    "input_token_address": trade.from_token,
+                    "output_token_address": trade.to_token,
+                }]).priced(prices)
+                if not priced.pairs:
+                    continue
+
+                token_amount = priced.token_amounts[0, priced.amount_index({"usd": trade.amount_usd})]
+                if not token_amount:
+                    continue
+
+                body = result.raw_response
+                body = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+                fixtures.fixture = (result.status_code or 200, body, result.elapsed_time or 0.0)
+
+                provider.get_quote(chain_id, trade.from_token, trade.to_token, token_amount)
+                recorded += 1
+
+    finally:
+        for prefix, adapter in adapters.items():
+            session.mount(prefix, adapter)
+        cassette.close()
+
+    print(f"📼 Recorded {recorded} provider responses from {len(run_ids)} runs to {path}")
+    return recorded
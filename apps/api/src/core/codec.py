@@ -0,0 +1,156 @@
+import datetime
+import json
+import time
+from typing import Any, Dict, Optional
+
+from .config import settings
+from .metrics import DECODE_LATENCY
+
+# optional fast backends (poetry install -E fast-json)
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _backend() -> str:
+    backend = settings.json_backend
+    if backend == "auto":
+        return "msgspec" if msgspec else "orjson" if orjson else "json"
+    if backend == "msgspec" and not msgspec or backend == "orjson" and not orjson:
+        raise ImportError(f"BENCHMARK_JSON_BACKEND={backend} but {backend} is not installed")
+    return backend
+
+
+JSON_BACKEND = _backend()
+
+
+class ResponseDecodeError(ValueError):
+    """A response body that isn't the JSON object a provider expects"""
+
+
+class RawJSON:
+    """
+    A JSON document kept exactly as received, written to JSON columns
+    verbatim (no decode / re-encode), only decoded if something reads it
+    """
+
+    __slots__ = ("body", "_value")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._value = None
+
+    @property
+    def value(self) -> Any:
+        if self._value is None:
+            self._value = loads(self.body)
+        return self._value
+
+    def __repr__(self):
+        return f"RawJSON({len(self.body)} bytes)"
+
+
+def _default(value):
+    if isinstance(value, RawJSON):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    # numpy scalars and arrays
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def loads(data) -> Any:
+    if JSON_BACKEND == "msgspec":
+        return msgspec.json.decode(data)
+    if JSON_BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumpb(value) -> bytes:
+    """Encode to JSON bytes, non-string dict keys (eg: amounts) become strings"""
+
+    if JSON_BACKEND == "msgspec":
+        return msgspec.json.encode(value, enc_hook=_default)
+    if JSON_BACKEND == "orjson":
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default).encode()
+
+
+def dumps(value) -> str:
+    return dumpb(value).decode()
+
+
+def json_column_serializer(value) -> str:
+    """`json_serializer` of the engines: raw responses are stored as received"""
+
+    if isinstance(value, RawJSON):
+        return value.body.decode()
+    return dumps(value)
+
+
+def response_struct(name: str, fields: Dict[str, Any]):
+    """
+    msgspec Struct type decoding only the given fields of a response, unknown
+    fields are skipped without being materialized. Nested dicts describe
+    nested objects, eg: {"result": {"outputAmount": Any}}.
+
+    Returns:
+        The Struct type, or None without msgspec
+    """
+
+    if msgspec is None:
+        return None
+
+    members = []
+    for field, kind in fields.items():
+        if isinstance(kind, dict):
+            kind = Optional[response_struct(f"{name}_{field}", kind)]
+        members.append((field, kind, None))
+
+    return msgspec.defstruct(name, members)
+
+
+def decode_response(response, provider: str, response_type=None):
+    """
+    Decode a response body once, timing it per provider
+
+    With the msgspec backend and a `response_type` (see `response_struct`)
+    only the fields the provider needs are decoded. Either way the body is
+    kept as a `RawJSON` for the raw_response column.
+
+    Returns:
+        (decoded data, RawJSON of the body, decode time in seconds)
+
+    Raises:
+        ResponseDecodeError: If the body is not JSON (or, with a
+            `response_type`, not a JSON object)
+    """
+
+    body = response.content
+    start_time = time.perf_counter()
+
+    # json, orjson and msgspec decode / validation errors are all ValueErrors
+    try:
+        if JSON_BACKEND == "msgspec" and response_type is not None:
+            data = msgspec.to_builtins(msgspec.json.decode(body, type=response_type))
+        else:
+            data = loads(body)
+    except ValueError as e:
+        raise ResponseDecodeError(f"Could not decode {provider} response: {e}") from e
+
+    if response_type is not None and not isinstance(data, dict):
+        raise ResponseDecodeError(f"Expected a JSON object from {provider}, got {type(data).__name__}")
+
+    decode_time = time.perf_counter() - start_time
+    DECODE_LATENCY.labels(provider=provider).observe(decode_time)
+
+    return data, RawJSON(body), decode_time
@@ -0,0 +1,176 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Float, and_, case, cast, func, select
+
+from .retention import successful_quote
+from ..models import ProviderResult, TradeResult
+
+
+COMPARE_COLUMNS = [
+    "chain", "pair", "amount_usd", "provider",
+    "base_output", "head_output", "base_latency", "head_latency",
+    "base_success", "head_success", "base_won", "head_won",
+]
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def _run_results(run_id: int, chain: Optional[str]):
+    """Provider results of a run with whether each one won its trade"""
+
+    trade = TradeResult.__table__
+    result = ProviderResult.__table__
+
+    successful = successful_quote(result)
+    output = cast(result.c.output_amount, Float)
+
+    # best successful quote first, ties go to the first result like everywhere else
+    rank = func.row_number().over(
+        partition_by=trade.c.id,
+        order_by=(case((successful, 0), else_=1), output.desc(), result.c.id)
+    )
+
+    query = (
+        select(
+            trade.c.chain, trade.c.pair, trade.c.amount_usd, result.c.provider,
+            case((successful, output)).label("output"),
+            result.c.elapsed_time.label("latency"),
+            case((successful, 1), else_=0).label("success"),
+            case((and_(successful, rank == 1), 1), else_=0).label("won"),
+        )
+        .select_from(result.join(trade, trade.c.id == result.c.trade_id))
+        .where(trade.c.run_id == run_id)
+    )
+    if chain:
+        query = query.where(trade.c.chain == chain)
+
+    return query.subquery()
+
+
+def compare_query(base_run_id: int, head_run_id: int, chain: Optional[str] = None):
+    """
+    Provider results of two runs side by side, joined on (chain, pair,
+    amount_usd, provider), in the order of COMPARE_COLUMNS
+    """
+
+    base = _run_results(base_run_id, chain)
+    head = _run_results(head_run_id, chain)
+
+    return select(
+        base.c.chain, base.c.pair, base.c.amount_usd, base.c.provider,
+        base.c.output, head.c.output, base.c.latency, head.c.latency,
+        base.c.success, head.c.success, base.c.won, head.c.won,
+    ).select_from(
+        base.join(head, and_(
+            base.c.chain == head.c.chain,
+            base.c.pair == head.c.pair,
+            base.c.amount_usd == head.c.amount_usd,
+            base.c.provider == head.c.provider,
+        ))
+    ).order_by(base.c.chain, base.c.pair, base.c.amount_usd, base.c.provider)
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, Optional[float]]:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {f"p{percentile}": None for percentile in LATENCY_PERCENTILES}
+    return dict(zip(
+        (f"p{percentile}" for percentile in LATENCY_PERCENTILES),
+        np.percentile(values, LATENCY_PERCENTILES).tolist()
+    ))
+
+
+def _delta(base, head):
+    return head - base if base is not None and head is not None else None
+
+
+def compare_runs(db_session, base_run_id: int, head_run_id: int, chain: Optional[str] = None) -> dict:
+    """
+    Per provider changes between two runs over the trades they share, see
+    `compare_rows`
+    """
+
+    return compare_rows(db_session.execute(compare_query(base_run_id, head_run_id, chain)).all())
+
+
+def compare_rows(rows: Sequence) -> dict:
+    """
+    Per provider changes from the rows of `compare_query` (only numpy work,
+    async routes run it in the threadpool)
+
+    Returns:
+        dict: "providers" with base/head/delta win rate, output and latency
+        percentiles, and "winner_flips", the trades won by another provider
+    """
+
+    columns = dict(zip(COMPARE_COLUMNS, zip(*rows))) if rows else {name: () for name in COMPARE_COLUMNS}
+
+    def floats(name):
+        return np.asarray([np.nan if value is None else value for value in columns[name]], dtype=np.float64)
+
+    provider = np.asarray(columns["provider"], dtype=object)
+    base_output, head_output = floats("base_output"), floats("head_output")
+    base_latency, head_latency = floats("base_latency"), floats("head_latency")
+    base_success = np.asarray(columns["base_success"], dtype=bool)
+    head_success = np.asarray(columns["head_success"], dtype=bool)
+    base_won = np.asarray(columns["base_won"], dtype=bool)
+    head_won = np.asarray(columns["head_won"], dtype=bool)
+
+    providers = {}
+    for name in sorted(set(provider)):
+        rows_of = provider == name
+        both = rows_of & base_success & head_success
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = (head_output[both] - base_output[both]) / base_output[both]
+        change = change[np.isfinite(change)]
+
+        win_rate = {}
+        for side, success, won in (("base", base_success, base_won), ("head", head_success, head_won)):
+            quotes = int((rows_of & success).sum())
+            win_rate[side] = float((rows_of & won).sum()) / quotes * 100 if quotes else None
+
+        base_percentiles = _percentiles(base_latency[rows_of & base_success])
+        head_percentiles = _percentiles(head_latency[rows_of & head_success])
+
+        providers[name] = {
+            "shared_quotes": int(rows_of.sum()),
+            "win_rate": {**win_rate, "delta": _delta(win_rate["base"], win_rate["head"])},
+            "output": {
+                "compared_quotes": int(both.sum()),
+                "mean_change": float(change.mean()) if len(change) else None,
+                "median_change": float(np.median(change)) if len(change) else None,
+                "improved": int((change > 0).sum()),
+                "worsened": int((change < 0).sum()),
+            },
+            "latency": {
+                "base": base_percentiles,
+                "head": head_percentiles,
+                "delta": {
+                    key: _delta(base_percentiles[key], head_percentiles[key]) for key in base_percentiles
+                },
+            },
+        }
+
+    # winner of every shared trade on each side
+    winners = {}
+    for idx in np.flatnonzero(base_won | head_won):
+        trade_key = (columns["chain"][idx], columns["pair"][idx], columns["amount_usd"][idx])
+        winner = winners.setdefault(trade_key, {"base": None, "head": None})
+        if base_won[idx]:
+            winner["base"] = provider[idx]
+        if head_won[idx]:
+            winner["head"] = provider[idx]
+
+    flips = [
+        {"chain": chain_id, "pair": pair, "amount_usd": amount_usd, "base_winner": winner["base"], "head_winner": winner["head"]}
+        for (chain_id, pair, amount_usd), winner in winners.items()
+        if winner["base"] != winner["head"]
+    ]
+
+    return {
+        "shared_trades": len({(row[0], row[1], row[2]) for row in rows}),
+        "providers": providers,
+        "winner_flips": flips,
+    }
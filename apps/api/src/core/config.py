@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import List, Optional
+from pydantic import BaseSettings
+
+
+class BenchmarkSettings(BaseSettings):
+    providers:          Optional[List[str]] = None  # will map to BENCHMARK_PROVIDERS
+    disabled_providers: List[str] = []              # will map to BENCHMARK_DISABLED_PROVIDERS
+    providers_file:     Optional[Path] = None       # will map to BENCHMARK_PROVIDERS_FILE
+
+    max_workers:        int = 16                    # will map to BENCHMARK_MAX_WORKERS
+    max_pending_quotes: int = 256                   # will map to BENCHMARK_MAX_PENDING_QUOTES
+    dispatch_mode:      str = "queued"              # will map to BENCHMARK_DISPATCH_MODE (queued | synchronized)
+    dispatch_barrier_timeout: float = 5.0           # will map to BENCHMARK_DISPATCH_BARRIER_TIMEOUT (seconds a synchronized request waits for the rest of its trade)
+
+    http_pool_connections: int = 10                 # will map to BENCHMARK_HTTP_POOL_CONNECTIONS
+    json_backend:       str = "auto"                # will map to BENCHMARK_JSON_BACKEND (auto | msgspec | orjson | json)
+    compression_min_size: int = 1024                # will map to BENCHMARK_COMPRESSION_MIN_SIZE (bytes, smaller API responses go out as is)
+    gzip_level:         int = 6                     # will map to BENCHMARK_GZIP_LEVEL
+    brotli_quality:     int = 4                     # will map to BENCHMARK_BROTLI_QUALITY
+    price_cache_ttl:    float = 60.0                # will map to BENCHMARK_PRICE_CACHE_TTL (0 disables)
+    quote_cache_ttl:    float = 0.0                 # will map to BENCHMARK_QUOTE_CACHE_TTL (0 disables)
+    quote_cache_path:   Optional[Path] = None       # will map to BENCHMARK_QUOTE_CACHE_PATH (sqlite, shared between processes)
+    cassette:           str = "off"                 # will map to BENCHMARK_CASSETTE (off | record | replay)
+    cassette_path:      Optional[Path] = None       # will map to BENCHMARK_CASSETTE_PATH (gzipped json lines)
+    cassette_latency_scale: float = 1.0             # will map to BENCHMARK_CASSETTE_LATENCY_SCALE (0 replays instantly)
+
+    sizing:             str = "fixed"               # will map to BENCHMARK_SIZING (fixed | adaptive)
+    adaptive_initial_points: int = 4                # will map to BENCHMARK_ADAPTIVE_INITIAL_POINTS
+    adaptive_convergence: float = 0.001             # will map to BENCHMARK_ADAPTIVE_CONVERGENCE
+    pair_source:        str = "hub"                 # will map to BENCHMARK_PAIR_SOURCE (hub | matrix)
+    quote_budget:       int = 0                     # will map to BENCHMARK_QUOTE_BUDGET (quotes per chain per run in matrix mode, 0 = full matrix)
+    plan_dir:           Optional[Path] = None       # will map to BENCHMARK_PLAN_DIR (priced trade plans per run)
+
+    schedules:          List[dict] = []             # will map to BENCHMARK_SCHEDULES (json)
+    schedules_file:     Optional[Path] = None       # will map to BENCHMARK_SCHEDULES_FILE
+
+    retention_days:     int = 90                    # will map to BENCHMARK_RETENTION_DAYS
+
+    vantage_point:      str = "central"             # will map to BENCHMARK_VANTAGE_POINT (where quotes are sent from, eg: gha-us-east)
+    ingest_url:         Optional[str] = None        # will map to BENCHMARK_INGEST_URL (agents: API to upload runs to, the local database is only a spool)
+    ingest_token:       Optional[str] = None        # will map to BENCHMARK_INGEST_TOKEN (shared by the API and its agents, ingest is off without it)
+    ingest_batch_size:  int = 200                   # will map to BENCHMARK_INGEST_BATCH_SIZE (trades per uploaded batch)
+    ingest_max_bytes:   int = 64 * 1024 * 1024      # will map to BENCHMARK_INGEST_MAX_BYTES (decompressed batch size limit)
+
+    event_bridge:       str = "none"                # will map to BENCHMARK_EVENT_BRIDGE (none | postgres)
+    progress_interval:  float = 1.0                 # will map to BENCHMARK_PROGRESS_INTERVAL (seconds between progress events)
+    stall_seconds:      float = 60.0                # will map to BENCHMARK_STALL_SECONDS (streams flag runs quiet for this long)
+
+    profile:            bool = False                # will map to BENCHMARK_PROFILE (phase spans + hot-spot summary)
+    profiler:           str = "cprofile"            # will map to BENCHMARK_PROFILER (cprofile | sampling | none)
+    profile_dir:        Path = Path("profiles")     # will map to BENCHMARK_PROFILE_DIR
+
+    class Config:
+        env_file = Path(__file__).parent.parent.parent / ".env"
+        env_prefix = "BENCHMARK_"
+
+        @classmethod
+        def parse_env_var(cls, field_name: str, raw_val: str):
+            # lists are given comma separated (eg: BENCHMARK_PROVIDERS=gluex,liqdswap)
+            if field_name in ("providers", "disabled_providers"):
+                return [item.strip() for item in raw_val.split(",") if item.strip()]
+            return cls.json_loads(raw_val)
+
+
+settings = BenchmarkSettings()
@@ -1,8 +1,17 @@
+import contextlib
 import os
+import threading
+import time
+from typing import List
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from .codec import json_column_serializer, loads
+from .metrics import DB_POOL_CONNECTIONS, REGISTRY
 
 
 # Postgres - Production
@@ -21,16 +30,221 @@ if not DATABASE_URL:
     DATABASE_URL = f"sqlite:///{db_path}"
 
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, **connect_args)
+# Engine profiles, picked with DATABASE_PROFILE:
+#   lambda  - one short-lived connection per invocation (no pool to hold open across
+#             containers), short statement timeouts, safe behind pgbouncer/RDS proxy
+#   worker  - long-running runner/scheduler: sized warm pool, pre-ping, server-side
+#             cursors for large reads
+#   default - SQLAlchemy defaults
+ENGINE_PROFILES = {
+    "default": {},
+    "lambda": {
+        "null_pool": True,
+        "statement_timeout_ms": 15000,
+        "pooler_friendly": True,
+    },
+    "worker": {
+        "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "stream_results": True,
+    },
+}
+
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE") or (
+    "lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "default"
+)
+
+if DATABASE_PROFILE not in ENGINE_PROFILES:
+    raise ValueError(
+        f"Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}, expected one of {', '.join(ENGINE_PROFILES)}"
+    )
+
+print(f"Using database engine profile: {DATABASE_PROFILE}")
+
+
+def engine_options(database_url: str, profile: str = DATABASE_PROFILE) -> dict:
+    """create_engine / create_async_engine keyword arguments for a profile"""
+
+    config = ENGINE_PROFILES[profile]
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    driver = url.get_driver_name()
+
+    # raw provider responses are written as received, see codec.RawJSON
+    options = {"json_serializer": json_column_serializer, "json_deserializer": loads}
+    connect_args = {}
+
+    if backend == "sqlite":
+        connect_args["check_same_thread"] = False
+
+    if config.get("null_pool"):
+        options["poolclass"] = NullPool
+    elif backend != "sqlite":
+        for key in ("pool_size", "max_overflow", "pool_recycle"):
+            if key in config:
+                options[key] = config[key]
+
+    if config.get("pool_pre_ping"):
+        options["pool_pre_ping"] = True
+
+    if backend == "postgresql":
+        timeout = config.get("statement_timeout_ms")
+
+        if driver == "asyncpg":
+            if timeout:
+                connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+            if config.get("pooler_friendly"):
+                # transaction-mode poolers can't keep prepared statements around
+                connect_args["statement_cache_size"] = 0
+                connect_args["prepared_statement_cache_size"] = 0
+        elif timeout:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+
+    return options
+
+
+def stream_execution_options(profile: str = DATABASE_PROFILE, yield_per: int = 1000) -> dict:
+    """
+    Execution options for large reads: server-side cursors on profiles that
+    want them (eg: `session.execute(query, execution_options=...)`)
+    """
+
+    if not ENGINE_PROFILES[profile].get("stream_results"):
+        return {}
+    return {"stream_results": True, "yield_per": yield_per}
+
+
+def fetch_columns(db_session, query) -> List[list]:
+    """
+    Run a large read and return its columns (one list per selected column),
+    consumed a chunk at a time so a server-side cursor never holds the whole
+    result as row objects
+
+    Args:
+        db_session: Sync session
+        query: The select to run
+    """
+
+    result = db_session.execute(query, execution_options=stream_execution_options())
+    columns = [[] for _ in result.keys()]
+
+    for chunk in result.partitions():
+        _extend_columns(columns, chunk)
+
+    return columns
+
+
+async def fetch_columns_async(db_session, query) -> List[list]:
+    """
+    `fetch_columns` on an async session: streamed through a server-side
+    cursor on profiles that want one, otherwise one buffered execute
+
+    Args:
+        db_session: Async session
+        query: The select to run
+    """
+
+    options = stream_execution_options()
+
+    if options:
+        result = await db_session.stream(query, execution_options=options)
+        columns = [[] for _ in result.keys()]
+        async for chunk in result.partitions():
+            _extend_columns(columns, chunk)
+        return columns
+
+    result = await db_session.execute(query)
+    columns = [[] for _ in result.keys()]
+    for chunk in result.partitions(1000):
+        _extend_columns(columns, chunk)
+    return columns
+
+
+def _extend_columns(columns: List[list], chunk):
+    for column, values in zip(columns, zip(*chunk)):
+        column.extend(values)
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+def _add_missing_columns():
+    """
+    There are no migrations: add nullable columns the models gained since
+    the tables were created
+    """
+
+    inspector = inspect(engine)
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                print(f"🔧 Adding column {table.name}.{column.name} ({column_type})")
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                ))
+
+                if column.index:
+                    connection.execute(text(
+                        f"CREATE {'UNIQUE ' if column.unique else ''}INDEX IF NOT EXISTS "
+                        f"ix_{table.name}_{column.name} ON {table.name} ({column.name})"
+                    ))
+
+
+def _upgrade_unique_indexes():
+    """
+    Indexed columns that became unique since their index was created (eg:
+    benchmark_runs.run_key): recreate the index as unique
+    """
+
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        unique = {index["name"]: index["unique"] for index in inspector.get_indexes(table.name)}
+        for column in table.columns:
+            name = f"ix_{table.name}_{column.name}"
+            if not (column.index and column.unique) or unique.get(name, True):
+                continue
+
+            print(f"🔧 Making index {name} unique")
+            try:
+                # one transaction: the old index stays if the values aren't unique
+                with engine.begin() as connection:
+                    connection.execute(text(f"DROP INDEX {name}"))
+                    connection.execute(text(f"CREATE UNIQUE INDEX {name} ON {table.name} ({column.name})"))
+            except Exception as e:
+                print(f"❌ Could not make index {name} unique, remove the duplicate {column.name} values: {e}")
+
+
 def init_db():
     from ..models import models
+    from .partitioning import create_partitioned_tables
+
+    # the partitioned tables reference benchmark_runs, so create it first
+    Base.metadata.create_all(bind=engine, tables=[models.BenchmarkRun.__table__])
+    create_partitioned_tables(engine, Base.metadata)
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _upgrade_unique_indexes()
 
 
 def get_db():
@@ -39,3 +253,204 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def to_async_url(database_url: str) -> str:
+    """
+    Swap the sync driver of a database url for its asyncio counterpart
+    (postgres -> asyncpg, sqlite -> aiosqlite)
+    """
+
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+
+        # asyncpg takes `ssl` instead of libpq's `sslmode`
+        if "sslmode" in url.query:
+            sslmode = url.query["sslmode"]
+            url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+
+    return url.render_as_string(hide_password=False)
+
+
+# the async engines are only created when first used, so the runner doesn't need the async drivers
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_url = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+        _async_engine = create_async_engine(async_url, **engine_options(async_url))
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+
+    return _async_engine
+
+
+# Read replica for analytics/dashboard reads, the runner always writes to DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+# fall back to the primary while the replica is further behind than this (seconds)
+DATABASE_READ_MAX_LAG = float(os.getenv("DATABASE_READ_MAX_LAG", "30"))
+REPLICA_LAG_CHECK_INTERVAL = 5.0
+
+_async_read_engine = None
+_AsyncReadSessionLocal = None
+
+_replica_lag = {"seconds": None, "checked_at": 0.0}
+# also read by the metrics collector from the threadpool: only ever held around the dict, never across an await
+_replica_lag_lock = threading.Lock()
+
+# 0 when the replica has replayed everything it received, otherwise time since the last replayed commit
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def get_async_read_engine():
+    """The replica's async engine, or the primary's when no replica is configured"""
+
+    global _async_read_engine, _AsyncReadSessionLocal
+
+    if not DATABASE_READ_URL:
+        return get_async_engine()
+
+    if _async_read_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_url = os.getenv("ASYNC_DATABASE_READ_URL") or to_async_url(DATABASE_READ_URL)
+        _async_read_engine = create_async_engine(async_url, **engine_options(async_url))
+        _AsyncReadSessionLocal = async_sessionmaker(
+            _async_read_engine, autoflush=False, expire_on_commit=False
+        )
+
+    return _async_read_engine
+
+
+async def get_replica_lag():
+    """
+    Replica lag in seconds (None without a postgres replica), re-checked at
+    most every REPLICA_LAG_CHECK_INTERVAL seconds
+    """
+
+    if not DATABASE_READ_URL:
+        return None
+
+    read_engine = get_async_read_engine()
+    if read_engine.dialect.name != "postgresql":
+        return None
+
+    now = time.monotonic()
+    with _replica_lag_lock:
+        if now - _replica_lag["checked_at"] < REPLICA_LAG_CHECK_INTERVAL:
+            return _replica_lag["seconds"]
+        # claim the check: the other requests keep the last lag until it's done
+        _replica_lag["checked_at"] = now
+
+    try:
+        async with read_engine.connect() as connection:
+            lag = float((await connection.execute(REPLICA_LAG_QUERY)).scalar() or 0)
+    except Exception as e:
+        # an unreachable replica counts as infinitely behind
+        print(f"❌ Could not check replica lag: {e}")
+        lag = float("inf")
+
+    with _replica_lag_lock:
+        _replica_lag.update(seconds=lag, checked_at=time.monotonic())
+    return lag
+
+
+@contextlib.asynccontextmanager
+async def read_session():
+    """
+    Async session bound to the read replica (DATABASE_READ_URL) when there
+    is one, on the primary otherwise.
+
+    The "latest run" read routes default to is only as fresh as the replica,
+    so while the replica is more than DATABASE_READ_MAX_LAG seconds behind,
+    the session reads from the primary instead.
+    """
+
+    get_async_read_engine()
+
+    lag = await get_replica_lag()
+    if _AsyncReadSessionLocal is None or (lag is not None and lag > DATABASE_READ_MAX_LAG):
+        if lag is not None:
+            print(f"⚠️  Replica is {lag:.1f}s behind, reading from the primary")
+        get_async_engine()
+        session_factory = _AsyncSessionLocal
+    else:
+        session_factory = _AsyncReadSessionLocal
+
+    async with session_factory() as db:
+        yield db
+
+
+async def get_read_db():
+    """
+    Async session for read-only routes, see `read_session`. Routes run their
+    SQL with `await db.execute(...)` and hand only the numpy work to the
+    threadpool
+    """
+
+    async with read_session() as db:
+        yield db
+
+
+def _pool_stats(pool) -> dict:
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+
+    # NullPool/StaticPool don't keep counters
+    for key, method in (
+        ("size", "size"),
+        ("checked_in", "checkedin"),
+        ("checked_out", "checkedout"),
+        ("overflow", "overflow"),
+    ):
+        if hasattr(pool, method):
+            stats[key] = getattr(pool, method)()
+
+    return stats
+
+
+def get_pool_stats() -> dict:
+    """Connection pool statistics of every engine created in this process"""
+
+    stats = {
+        "profile": DATABASE_PROFILE,
+        "engines": {"sync": _pool_stats(engine.pool)},
+    }
+
+    if _async_engine is not None:
+        stats["engines"]["async"] = _pool_stats(_async_engine.sync_engine.pool)
+
+    if _async_read_engine is not None:
+        stats["engines"]["async_read"] = _pool_stats(_async_read_engine.sync_engine.pool)
+        with _replica_lag_lock:
+            stats["replica_lag_seconds"] = _replica_lag["seconds"]
+
+    return stats
+
+
+def _collect_pool_metrics():
+    for name, stats in get_pool_stats()["engines"].items():
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in stats:
+                DB_POOL_CONNECTIONS.labels(engine=name, state=state).set(stats[state])
+
+
+REGISTRY.register_collector(_collect_pool_metrics)
@@ -0,0 +1,339 @@
+import asyncio
+import collections
+import json
+import os
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .config import settings
+
+
+# postgres NOTIFY channel of the bridge, payloads must stay under 8000 bytes
+NOTIFY_CHANNEL = "benchmark_events"
+
+# runs whose last event is kept for late subscribers
+LATEST_EVENTS = 100
+
+
+class Subscription:
+    """
+    Events of one run for an asyncio consumer (eg: an SSE response), fed
+    from any thread. Progress events are snapshots, so when the consumer
+    falls behind the oldest ones are dropped.
+    """
+
+    def __init__(self, bus: "EventBus", run_id: int, loop: asyncio.AbstractEventLoop, maxsize: int = 100):
+        self.bus = bus
+        self.run_id = run_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def _offer(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            # the consumer's loop is gone
+            self.close()
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    In-process pub/sub of run events ({"type", "run_id", ...}), published by
+    the runner and consumed by the stream endpoint. Forwarders (eg: the
+    postgres bridge) get every locally published event too.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[int, List[Subscription]] = collections.defaultdict(list)
+        self._latest: Dict[int, dict] = collections.OrderedDict()
+        self._forwarders: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+
+    def add_forwarder(self, forwarder: Callable[[dict], None]):
+        with self._lock:
+            self._forwarders.append(forwarder)
+
+    def publish(self, event: dict, forward: bool = True):
+        run_id = event["run_id"]
+
+        with self._lock:
+            self._latest[run_id] = event
+            self._latest.move_to_end(run_id)
+            while len(self._latest) > LATEST_EVENTS:
+                self._latest.popitem(last=False)
+
+            subscriptions = list(self._subscriptions.get(run_id, ()))
+            forwarders = list(self._forwarders) if forward else []
+
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+        for forwarder in forwarders:
+            try:
+                forwarder(event)
+            except Exception as e:
+                print(f"❌ Event forwarder failed: {e}")
+
+    def latest(self, run_id: int) -> Optional[dict]:
+        with self._lock:
+            return self._latest.get(run_id)
+
+    def subscribe(self, run_id: int) -> Subscription:
+        """Subscribe from a running event loop"""
+
+        subscription = Subscription(self, run_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[run_id].append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.run_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.run_id, None)
+
+
+event_bus = EventBus()
+
+
+class RunProgress:
+    """
+    Quote and trade counters of a run, updated by the runner (and the quote
+    futures' callbacks) and published as throttled "progress" events
+    """
+
+    def __init__(self, run_id: int, bus: EventBus = event_bus, interval: Optional[float] = None):
+        self.run_id = run_id
+        self.bus = bus
+        self.interval = settings.progress_interval if interval is None else interval
+
+        self.start_time = time.time()
+        self.quotes_total = 0
+        self.quotes_completed = 0
+        self.trades_total = 0
+        self.trades_completed = 0
+        self.chain = None
+        # provider -> [quotes, errors]
+        self.providers: Dict[str, List[int]] = collections.defaultdict(lambda: [0, 0])
+
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+
+    def _event(self, type: str, **fields) -> dict:
+        elapsed = time.time() - self.start_time
+        rate = self.quotes_completed / elapsed if elapsed > 0 else 0.0
+        remaining = self.quotes_total - self.quotes_completed
+
+        return {
+            "type": type,
+            "run_id": self.run_id,
+            "origin": os.getpid(),
+            "time": time.time(),
+            "elapsed": elapsed,
+            "chain": self.chain,
+            "completed": self.quotes_completed,
+            "total": self.quotes_total,
+            "trades_completed": self.trades_completed,
+            "trades_total": self.trades_total,
+            "quotes_per_second": rate,
+            # only counts quotes queued so far, chains still to plan come on top
+            "eta_seconds": remaining / rate if rate > 0 else None,
+            "providers": {
+                provider: {"quotes": quotes, "errors": errors, "error_rate": errors / quotes if quotes else 0.0}
+                for provider, (quotes, errors) in self.providers.items()
+            },
+            **fields,
+        }
+
+    def _publish(self, type: str, force: bool = False, **fields):
+        now = time.monotonic()
+
+        with self._lock:
+            if not force and now - self._last_publish < self.interval:
+                return
+            self._last_publish = now
+            event = self._event(type, **fields)
+
+        self.bus.publish(event)
+
+    def started(self):
+        self._publish("started", force=True)
+
+    def chain_started(self, chain_id: str):
+        with self._lock:
+            self.chain = chain_id
+        self._publish("progress", force=True)
+
+    def queued(self, trades: int, quotes: int):
+        with self._lock:
+            self.trades_total += trades
+            self.quotes_total += quotes
+        self._publish("progress")
+
+    def track(self, future, provider_name: str):
+        """Count the quote once its future resolves"""
+        future.add_done_callback(lambda future: self._quote_done(future, provider_name))
+
+    def _quote_done(self, future, provider_name: str):
+        if future.cancelled() or future.exception() is not None:
+            failed = True
+        else:
+            failed = not future.result().successful
+
+        with self._lock:
+            self.quotes_completed += 1
+            counts = self.providers[provider_name]
+            counts[0] += 1
+            counts[1] += failed
+        self._publish("progress")
+
+    def trade_done(self):
+        with self._lock:
+            self.trades_completed += 1
+        self._publish("progress")
+
+    def finished(self, error: Optional[str] = None):
+        if error:
+            self._publish("failed", force=True, error=error)
+        else:
+            self._publish("completed", force=True)
+
+
+# run id -> progress of the runs going on in this process
+_runs: Dict[int, RunProgress] = {}
+_runs_lock = threading.Lock()
+
+
+def track_run(run_id: int) -> RunProgress:
+    """Start publishing a run's progress (forwarded over the bridge when enabled)"""
+
+    get_event_bridge()
+
+    progress = RunProgress(run_id)
+    with _runs_lock:
+        _runs[run_id] = progress
+    progress.started()
+    return progress
+
+
+def run_progress(run_id: int) -> Optional[RunProgress]:
+    with _runs_lock:
+        return _runs.get(run_id)
+
+
+def untrack_run(run_id: int, error: Optional[str] = None):
+    with _runs_lock:
+        progress = _runs.pop(run_id, None)
+    if progress:
+        progress.finished(error)
+
+
+class PostgresBridge:
+    """
+    Carries run events between processes over postgres LISTEN/NOTIFY
+    (BENCHMARK_EVENT_BRIDGE=postgres): runners forward every event they
+    publish, the API listens and republishes them on its own bus
+    """
+
+    def __init__(self, engine, bus: EventBus = event_bus):
+        self.engine = engine
+        self.bus = bus
+        self._connection = None
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def forward(self, event: dict):
+        from sqlalchemy import text
+
+        payload = json.dumps(event, default=str)
+        if len(payload) >= 8000:
+            # too big for NOTIFY, drop the per provider breakdown
+            payload = json.dumps({**event, "providers": {}}, default=str)
+
+        with self._lock:
+            if self._connection is None:
+                # its own autocommit connection, NOTIFY inside the run's transaction would wait for the commit
+                self._connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            try:
+                self._connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": NOTIFY_CHANNEL, "payload": payload}
+                )
+            except Exception:
+                self._connection.close()
+                self._connection = None
+                raise
+
+    def _listen(self):
+        while True:
+            try:
+                connection = self.engine.raw_connection()
+                driver_connection = connection.driver_connection
+                driver_connection.autocommit = True
+                driver_connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                print(f"📡 Listening for run events on {NOTIFY_CHANNEL}")
+
+                while True:
+                    if select.select([driver_connection], [], [], 5)[0]:
+                        driver_connection.poll()
+                        while driver_connection.notifies:
+                            notify = driver_connection.notifies.pop(0)
+                            event = json.loads(notify.payload)
+                            # events of this process are already on the bus
+                            if event.get("origin") != os.getpid():
+                                self.bus.publish(event, forward=False)
+
+            except Exception as e:
+                print(f"❌ Run event listener failed, reconnecting: {e}")
+                time.sleep(5)
+
+    def start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="run-event-listener", daemon=True)
+                self._listener.start()
+
+
+_bridge: Optional[PostgresBridge] = None
+_bridge_lock = threading.Lock()
+
+
+def get_event_bridge() -> Optional[PostgresBridge]:
+    """The postgres bridge when BENCHMARK_EVENT_BRIDGE=postgres (and the database is postgres)"""
+
+    global _bridge
+
+    if settings.event_bridge != "postgres":
+        return None
+
+    with _bridge_lock:
+        if _bridge is None:
+            from .database import engine
+
+            if engine.dialect.name != "postgresql":
+                print("⚠️  BENCHMARK_EVENT_BRIDGE=postgres needs a postgres database, run events stay in-process")
+                settings.event_bridge = "none"
+                return None
+
+            _bridge = PostgresBridge(engine)
+            event_bus.add_forwarder(_bridge.forward)
+
+    return _bridge
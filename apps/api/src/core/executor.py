@@ -0,0 +1,276 @@
+import concurrent.futures
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from .config import settings
+from .metrics import QUOTES_FAILED, QUOTES_IN_FLIGHT, QUOTES_SENT, QUOTE_LATENCY
+from .quote_cache import get_quote_cache, quote_key
+from ..providers.base import BaseProvider
+
+
+class DispatchGroup:
+    """
+    The quote requests of one trade. Records when each provider's request
+    goes out, and in synchronized mode holds every request at a barrier
+    until all of them have a worker, so the providers are asked at the same
+    instant instead of one after the other.
+
+    A barrier that doesn't fill within `timeout` (eg: a request cancelled or
+    stuck behind other work in the queue) is broken and everyone goes ahead,
+    the skew then shows the delay.
+    """
+
+    def __init__(self, parties: int, synchronized: bool = False, timeout: Optional[float] = None):
+        self.synchronized = synchronized and parties > 1
+        self._barrier = threading.Barrier(
+            parties, timeout=settings.dispatch_barrier_timeout if timeout is None else timeout
+        ) if self.synchronized else None
+        self._dispatched_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Wait for the other requests of the trade (synchronized mode only)"""
+        if self._barrier is None:
+            return
+        try:
+            self._barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+
+    def abort(self):
+        """Release the requests waiting on a request that will never run"""
+        if self._barrier is not None:
+            self._barrier.abort()
+
+    def dispatched(self, provider_name: str):
+        with self._lock:
+            self._dispatched_at[provider_name] = time.perf_counter()
+
+    def skew(self, provider_name: str) -> Optional[float]:
+        """Seconds the provider's request went out after the trade's first one (None if it never went out)"""
+        with self._lock:
+            if provider_name not in self._dispatched_at:
+                return None
+            return self._dispatched_at[provider_name] - min(self._dispatched_at.values())
+
+
+@dataclass
+class QuoteJob:
+    """A single (pair, amount, provider) quote request"""
+
+    chain_id: str
+    pair: dict
+    amount: dict
+    provider: BaseProvider
+    token_amount: str
+    # lower runs first
+    priority: int = 0
+    run_id: Optional[int] = None
+    dispatch: Optional[DispatchGroup] = None
+
+    def run(self):
+        def fetch():
+            provider_name = self.provider.name
+            if self.dispatch is not None:
+                self.dispatch.dispatched(provider_name)
+
+            QUOTES_SENT.labels(provider=provider_name).inc()
+            QUOTES_IN_FLIGHT.labels(provider=provider_name).inc()
+
+            start_time = time.perf_counter()
+            status = "exception"
+
+            try:
+                result = self.provider.get_quote(
+                    self.chain_id,
+                    self.pair["input_token_address"],
+                    self.pair["output_token_address"],
+                    self.token_amount
+                )
+                status = result.status_code
+                if not result.successful:
+                    QUOTES_FAILED.labels(provider=provider_name, status=status).inc()
+                return result
+
+            except Exception:
+                QUOTES_FAILED.labels(provider=provider_name, status=status).inc()
+                raise
+
+            finally:
+                QUOTES_IN_FLIGHT.labels(provider=provider_name).dec()
+                QUOTE_LATENCY.labels(provider=provider_name).observe(
+                    time.perf_counter() - start_time
+                )
+
+        # before the cache lookup, cached quotes still have to show up at the barrier
+        if self.dispatch is not None:
+            self.dispatch.wait()
+
+        quote_cache = get_quote_cache()
+        if quote_cache is None:
+            return fetch()
+
+        key = quote_key(
+            self.provider.name,
+            self.chain_id,
+            self.pair["input_token_address"],
+            self.pair["output_token_address"],
+            self.token_amount
+        )
+        return quote_cache.get_or_fetch(key, fetch)
+
+
+class QuoteExecutor:
+    """
+    Long-lived bounded worker pool fed by a priority work queue
+
+    Jobs from any number of chains can be queued at once. `submit` blocks
+    while `max_pending` jobs are waiting (backpressure), and queued jobs can
+    be cancelled until a worker picks them up.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.max_workers = max_workers or settings.max_workers
+        self.max_pending = max_pending or settings.max_pending_quotes
+
+        self._queue = queue.PriorityQueue(maxsize=self.max_pending)
+        self._sequence = itertools.count()
+        self._pending: Dict[concurrent.futures.Future, QuoteJob] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._workers = []
+        self._shutdown = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.shutdown(cancel_pending=exc_type is not None)
+
+    def _start_workers(self):
+        # called with the lock held, workers are started on first submit
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._work,
+                name=f"quote-worker-{len(self._workers)}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            _, _, job, future = self._queue.get()
+
+            try:
+                if job is None:
+                    return
+
+                with self._lock:
+                    self._pending.pop(future, None)
+
+                if not future.set_running_or_notify_cancel():
+                    if job.dispatch is not None:
+                        job.dispatch.abort()
+                    continue
+
+                with self._lock:
+                    self._in_flight += 1
+
+                try:
+                    future.set_result(job.run())
+                except BaseException as e:
+                    future.set_exception(e)
+                finally:
+                    with self._lock:
+                        self._in_flight -= 1
+
+            finally:
+                self._queue.task_done()
+
+    def submit(self, job: QuoteJob, timeout: Optional[float] = None) -> concurrent.futures.Future:
+        """
+        Queue a quote job
+
+        Args:
+            job (QuoteJob): The job to run
+            timeout (float): Seconds to wait for a free queue slot (None waits forever)
+
+        Returns:
+            A future resolving to the provider's `get_quote` result
+
+        Raises:
+            queue.Full: If no slot freed up within `timeout`
+        """
+
+        future = concurrent.futures.Future()
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit to a shut down executor")
+            self._start_workers()
+            self._pending[future] = job
+
+        try:
+            self._queue.put(
+                (job.priority, next(self._sequence), job, future), timeout=timeout
+            )
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(future, None)
+            raise
+
+        return future
+
+    def cancel(self, predicate: Optional[Callable[[QuoteJob], bool]] = None) -> int:
+        """
+        Cancel queued jobs that haven't started yet
+
+        Args:
+            predicate: Only cancel jobs it returns True for (default: all)
+
+        Returns:
+            int: Number of cancelled jobs
+        """
+
+        with self._lock:
+            pending = list(self._pending.items())
+
+        cancelled = 0
+        for future, job in pending:
+            if (predicate is None or predicate(job)) and future.cancel():
+                cancelled += 1
+
+        return cancelled
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "queued": len(self._pending),
+                "in_flight": self._in_flight,
+            }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop the workers once the queue has drained"""
+
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            workers = list(self._workers)
+
+        if cancel_pending:
+            self.cancel()
+
+        # stop markers sort after every real job so the queue drains first
+        for _ in workers:
+            self._queue.put((float("inf"), next(self._sequence), None, None))
+
+        if wait:
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,39 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cassette import cassette_adapter
+from .config import settings
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Process wide requests session so provider and price calls reuse warm
+    keep-alive connections across trades, chains and scheduled runs
+    """
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+
+                # one pooled connection per worker and host
+                adapter = HTTPAdapter(
+                    pool_connections=settings.http_pool_connections,
+                    pool_maxsize=max(settings.max_workers, settings.http_pool_connections)
+                )
+                # BENCHMARK_CASSETTE: record the traffic, or replay it without network
+                adapter = cassette_adapter(adapter)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+
+                _session = session
+
+    return _session
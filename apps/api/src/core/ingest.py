@@ -0,0 +1,359 @@
+import gzip
+import time
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import requests
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from .codec import dumpb, loads
+from .config import settings
+from .metrics import INGESTED_BATCHES
+from .partitioning import reserve_run_id
+from ..models import BenchmarkRun, IngestBatch, PriceSnapshot, ProviderResult, RouteLeg, TradeResult
+
+# optional brotli (poetry install -E compression), gzip otherwise
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+INGEST_VERSION = 1
+
+TRADE_FIELDS = (
+    "chain", "pair", "from_token", "to_token",
+    "from_token_symbol", "to_token_symbol", "amount_usd", "input_amount",
+)
+RESULT_FIELDS = (
+    "provider", "output_amount", "elapsed_time", "status_code", "error",
+    "raw_response", "hop_count", "dex_count", "dispatch_skew",
+)
+LEG_FIELDS = ("hop", "dex", "share")
+PRICE_FIELDS = ("chain", "token", "symbol", "price_usd", "fetched_at", "latency")
+
+# uploads retried on connection errors and 5xx, with exponential backoff
+UPLOAD_RETRIES = 5
+
+
+class IngestError(ValueError):
+    """A batch the ingest endpoint can't take, `status` is the http status to answer with"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _datetime(value) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _row(obj, fields) -> dict:
+    return {field: getattr(obj, field) for field in fields}
+
+
+def run_key(run) -> str:
+    """Key of a spooled run: unique across agents and across fresh spool databases"""
+    return f"{run.vantage_point}:{run.id}:{run.start_time:%Y%m%dT%H%M%S%f}"
+
+
+def build_batches(db_session, run_id: int, batch_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Ingest batches of a run in the local (spool) database: its trades in
+    trade id order, `batch_size` at a time, each with its provider results
+    and their route legs. The first batch carries the run's price snapshots,
+    the last one its end time. Batch keys only depend on the run, so
+    uploading a run again sends the same keys.
+    """
+
+    batch_size = batch_size or settings.ingest_batch_size
+
+    run = db_session.get(BenchmarkRun, run_id)
+    if run is None:
+        raise ValueError(f"Run #{run_id} not found")
+
+    key = run_key(run)
+    trade_ids = db_session.execute(
+        select(TradeResult.id).where(TradeResult.run_id == run_id).order_by(TradeResult.id)
+    ).scalars().all()
+    batch_count = max(1, (len(trade_ids) + batch_size - 1) // batch_size)
+
+    for index in range(batch_count):
+        chunk = trade_ids[index * batch_size:(index + 1) * batch_size]
+
+        trades = db_session.query(TradeResult).filter(TradeResult.id.in_(chunk)).order_by(TradeResult.id).all()
+        results = db_session.query(ProviderResult).filter(ProviderResult.trade_id.in_(chunk)).order_by(ProviderResult.id).all()
+        legs = db_session.query(RouteLeg).filter(RouteLeg.trade_id.in_(chunk)).order_by(RouteLeg.id).all()
+
+        legs_by_result = {}
+        for leg in legs:
+            legs_by_result.setdefault((leg.trade_id, leg.provider), []).append(_row(leg, LEG_FIELDS))
+
+        results_by_trade = {}
+        for result in results:
+            results_by_trade.setdefault(result.trade_id, []).append({
+                **_row(result, RESULT_FIELDS),
+                "route_legs": legs_by_result.get((result.trade_id, result.provider), []),
+            })
+
+        batch = {
+            "version": INGEST_VERSION,
+            "batch_key": f"{key}:{index}",
+            "batch_index": index,
+            "batch_count": batch_count,
+            "run": {
+                "run_key": key,
+                "vantage_point": run.vantage_point,
+                "start_time": run.start_time,
+                "end_time": run.end_time if index == batch_count - 1 else None,
+            },
+            "trades": [
+                {**_row(trade, TRADE_FIELDS), "provider_results": results_by_trade.get(trade.id, [])}
+                for trade in trades
+            ],
+        }
+        if index == 0:
+            batch["price_snapshots"] = [
+                _row(snapshot, PRICE_FIELDS)
+                for snapshot in db_session.query(PriceSnapshot).filter(PriceSnapshot.run_id == run_id)
+            ]
+
+        yield batch
+
+
+def upload_run(run_id: int, url: Optional[str] = None, token: Optional[str] = None) -> List[dict]:
+    """
+    Upload a spooled run to the ingest API (BENCHMARK_INGEST_URL), one
+    gzipped batch at a time. Batches already ingested are acknowledged as
+    duplicates, so a failed upload can simply be run again.
+
+    Returns:
+        list: The API's answer for every batch
+    """
+
+    from .database import SessionLocal
+
+    url = (url or settings.ingest_url or "").rstrip("/")
+    token = token or settings.ingest_token
+    if not url:
+        raise ValueError("Uploading runs needs BENCHMARK_INGEST_URL")
+
+    http_session = requests.Session()
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    db_session = SessionLocal()
+    answers = []
+
+    try:
+        for batch in build_batches(db_session, run_id):
+            body = gzip.compress(dumpb(batch))
+
+            for attempt in range(UPLOAD_RETRIES):
+                try:
+                    response = http_session.post(f"{url}/benchmarks/ingest", data=body, headers=headers, timeout=60)
+                    if response.status_code < 500:
+                        break
+                    error = f"HTTP {response.status_code}"
+                except requests.RequestException as e:
+                    error = str(e)
+
+                print(f"⚠️  Upload of batch {batch['batch_key']} failed ({error}), attempt {attempt + 1}/{UPLOAD_RETRIES}")
+                time.sleep(2 ** attempt)
+            else:
+                raise RuntimeError(f"Giving up on batch {batch['batch_key']} of run #{run_id}")
+
+            answer = response.json()
+            if response.status_code != 200:
+                raise RuntimeError(f"Batch {batch['batch_key']} was rejected: {answer.get('error', response.text)}")
+
+            print(
+                f"📤 Batch {batch['batch_index'] + 1}/{batch['batch_count']} of run #{run_id}: "
+                f"{answer['status']} as run #{answer['run_id']} ({len(body)} bytes)"
+            )
+            answers.append(answer)
+
+    finally:
+        db_session.close()
+
+    return answers
+
+
+def decode_batch(body: bytes, content_encoding: Optional[str]) -> dict:
+    """Decompress (gzip, deflate or br) and parse an uploaded batch, within BENCHMARK_INGEST_MAX_BYTES"""
+
+    limit = settings.ingest_max_bytes
+    encoding = (content_encoding or "identity").strip().lower()
+
+    if encoding in ("gzip", "deflate"):
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | (16 if encoding == "gzip" else 0))
+        try:
+            body = decompressor.decompress(body, limit + 1)
+        except zlib.error as e:
+            raise IngestError(f"Bad {encoding} body: {e}")
+    elif encoding == "br" and brotli is not None:
+        try:
+            body = brotli.decompress(body)
+        except brotli.error as e:
+            raise IngestError(f"Bad br body: {e}")
+    elif encoding != "identity":
+        raise IngestError(f"Unsupported Content-Encoding {encoding!r}", status=415)
+
+    if len(body) > limit:
+        raise IngestError(f"Batch is over {limit} bytes", status=413)
+
+    try:
+        batch = loads(body)
+    except ValueError as e:
+        raise IngestError(f"Batch is not json: {e}")
+
+    if not isinstance(batch, dict) or batch.get("version") != INGEST_VERSION:
+        raise IngestError(f"Expected a version {INGEST_VERSION} batch")
+    for field in ("batch_key", "run", "trades"):
+        if field not in batch:
+            raise IngestError(f"Batch is missing {field!r}")
+    if not batch["run"].get("run_key"):
+        raise IngestError("Batch is missing run.run_key")
+
+    return batch
+
+
+def ingested_batch(db_session, batch_key: str) -> Optional[dict]:
+    """The answer to a batch that was already ingested, None if it wasn't"""
+
+    existing = db_session.execute(
+        select(IngestBatch).where(IngestBatch.batch_key == batch_key)
+    ).scalar_one_or_none()
+    if existing is None:
+        return None
+
+    INGESTED_BATCHES.labels(vantage_point=existing.vantage_point, status="duplicate").inc()
+    return {
+        "status": "duplicate",
+        "batch_key": existing.batch_key,
+        "run_id": existing.run_id,
+        "trades": existing.trades,
+        "provider_results": existing.provider_results,
+    }
+
+
+def _ingested_run(db_session, run_info: dict, vantage_point: str) -> BenchmarkRun:
+    """The run of a run key, created by the first of its batches to get here"""
+
+    lookup = select(BenchmarkRun).where(BenchmarkRun.run_key == run_info["run_key"])
+
+    run = db_session.execute(lookup).scalar_one_or_none()
+    if run is not None:
+        return run
+
+    try:
+        # in a savepoint: losing the race must not roll back the caller's transaction
+        with db_session.begin_nested():
+            run = BenchmarkRun(
+                id=reserve_run_id(db_session.get_bind()),
+                start_time=_datetime(run_info.get("start_time")) or datetime.utcnow(),
+                vantage_point=vantage_point,
+                run_key=run_info["run_key"],
+            )
+            db_session.add(run)
+    except IntegrityError:
+        # another batch of the run (eg: a retry overlapping a slow upload) created it first
+        return db_session.execute(lookup).scalar_one()
+
+    print(f"📥 Created run #{run.id} for {run_info['run_key']}")
+    return run
+
+
+def ingest_batch(db_session, batch: dict) -> dict:
+    """
+    Store an uploaded batch (see `build_batches`) with a few bulk inserts,
+    under the run of its run key (created by its first batch). The caller
+    commits: the batch key is inserted in the same transaction, a second
+    upload of the batch is skipped.
+
+    Args:
+        db_session: Sync session
+        batch: Decoded batch
+
+    Returns:
+        dict: status ("ingested" or "duplicate"), run_id and counts
+    """
+
+    duplicate = ingested_batch(db_session, batch["batch_key"])
+    if duplicate is not None:
+        return duplicate
+
+    run_info = batch["run"]
+    vantage_point = run_info.get("vantage_point") or settings.vantage_point
+
+    run = _ingested_run(db_session, run_info, vantage_point)
+
+    trades = batch["trades"]
+    trade = TradeResult.__table__
+    result = ProviderResult.__table__
+
+    trade_ids = []
+    if trades:
+        trade_ids = db_session.execute(
+            insert(trade).returning(trade.c.id, sort_by_parameter_order=True),
+            [{"run_id": run.id, **{field: row.get(field) for field in TRADE_FIELDS}} for row in trades]
+        ).scalars().all()
+
+    results = []
+    legs = []
+    for trade_id, row in zip(trade_ids, trades):
+        for provider_result in row.get("provider_results", []):
+            results.append({
+                "trade_id": trade_id,
+                "run_id": run.id,
+                **{field: provider_result.get(field) for field in RESULT_FIELDS},
+            })
+            for leg in provider_result.get("route_legs", []):
+                legs.append({
+                    "run_id": run.id,
+                    "trade_id": trade_id,
+                    "provider": provider_result.get("provider"),
+                    **{field: leg.get(field) for field in LEG_FIELDS},
+                })
+
+    if results:
+        db_session.execute(insert(result), results)
+    if legs:
+        db_session.execute(insert(RouteLeg.__table__), legs)
+
+    prices = batch.get("price_snapshots") or []
+    if prices:
+        # one snapshot per (run, chain, token)
+        known = set(db_session.execute(
+            select(PriceSnapshot.chain, PriceSnapshot.token).where(PriceSnapshot.run_id == run.id)
+        ).all())
+        rows = [
+            {"run_id": run.id, **{field: price.get(field) for field in PRICE_FIELDS}, "fetched_at": _datetime(price.get("fetched_at"))}
+            for price in prices if (price.get("chain"), price.get("token")) not in known
+        ]
+        if rows:
+            db_session.execute(insert(PriceSnapshot.__table__), rows)
+
+    if run_info.get("end_time"):
+        run.end_time = _datetime(run_info["end_time"])
+
+    db_session.add(IngestBatch(
+        batch_key=batch["batch_key"],
+        run_id=run.id,
+        vantage_point=vantage_point,
+        trades=len(trade_ids),
+        provider_results=len(results),
+    ))
+    db_session.flush()
+
+    INGESTED_BATCHES.labels(vantage_point=vantage_point, status="ingested").inc()
+    return {
+        "status": "ingested",
+        "batch_key": batch["batch_key"],
+        "run_id": run.id,
+        "trades": len(trade_ids),
+        "provider_results": len(results),
+    }
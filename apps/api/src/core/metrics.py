@@ -0,0 +1,314 @@
+import bisect
+import contextlib
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# latency buckets (seconds) shared by every histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames, labelvalues, extra: str = "") -> str:
+    labels = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Prometheus-style metric family, values are kept per label combination"""
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def labels(self, **labels) -> "_Child":
+        return _Child(self, self._key(labels))
+
+
+class _Child:
+    """A metric bound to one set of label values"""
+
+    def __init__(self, metric: _Metric, key: Tuple[str, ...]):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0):
+        self._metric._inc(self._key, amount)
+
+    def dec(self, amount: float = 1.0):
+        self._metric._inc(self._key, -amount)
+
+    def set(self, value: float):
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float):
+        self._metric._observe(self._key, value)
+
+    @contextlib.contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + "_total", key, "", value) for key, value in self._values.items()]
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def _set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, "", value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _observe(self, key, value):
+        with self._lock:
+            # [per bucket counts..., sum, count]
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    samples.append(
+                        (self.name + "_bucket", key, f'le="{_format_value(bound)}"', cumulative)
+                    )
+                samples.append((self.name + "_sum", key, "", state[-2]))
+                samples.append((self.name + "_count", key, "", state[-1]))
+        return samples
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+
+    def quantile(self, state: List[float], q: float) -> Optional[float]:
+        """Estimate a quantile from (per bucket) counts, like histogram_quantile()"""
+
+        total = state[-1]
+        if not total:
+            return None
+
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, state):
+            if count and cumulative + count >= rank:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound if bound != float("inf") else lower
+
+        return lower
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Callback refreshing gauges right before they are rendered"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"❌ Metrics collector {collector.__name__} failed: {e}")
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, key, extra, value in metric.samples():
+                lines.append(
+                    f"{name}{_format_labels(metric.labelnames, key, extra)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Copy of every value, to diff against later (see `print_run_summary`)"""
+
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+
+REGISTRY = Registry()
+
+
+# runner
+QUOTES_SENT = Counter(
+    "benchmark_quotes_sent", "Quote requests sent to providers", ["provider"]
+)
+QUOTES_IN_FLIGHT = Gauge(
+    "benchmark_quotes_in_flight", "Quote requests currently waiting on a provider", ["provider"]
+)
+QUOTES_FAILED = Counter(
+    "benchmark_quotes_failed", "Quote requests without a usable output amount", ["provider", "status"]
+)
+QUOTE_LATENCY = Histogram(
+    "benchmark_quote_duration_seconds", "Wall-clock time of quote requests", ["provider"]
+)
+DECODE_LATENCY = Histogram(
+    "benchmark_decode_duration_seconds", "Time spent decoding response bodies", ["provider"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+DISPATCH_SKEW = Histogram(
+    "benchmark_dispatch_skew_seconds", "Delay of quote requests behind the first request of their trade", ["mode"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+PRICE_LOOKUP_LATENCY = Histogram(
+    "benchmark_price_lookup_duration_seconds", "Time spent getting token prices", ["source"]
+)
+DB_LATENCY = Histogram(
+    "benchmark_db_duration_seconds", "Time spent flushing and committing benchmark results", ["operation"]
+)
+INGESTED_BATCHES = Counter(
+    "benchmark_ingested_batches", "Result batches uploaded by runner agents", ["vantage_point", "status"]
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Database connection pool usage", ["engine", "state"]
+)
+
+# api
+API_LATENCY = Histogram(
+    "api_request_duration_seconds", "Latency of API requests", ["method", "route", "status"]
+)
+
+
+_open_windows: List["RunWindow"] = []
+_windows_lock = threading.Lock()
+
+
+class RunWindow:
+    """
+    The metrics of one run: a snapshot to diff against at the end, and how
+    many other runs of the process (eg: scheduled concurrently) overlapped
+    it, since their quotes count towards the same process wide metrics
+    """
+
+    def __init__(self):
+        self.since = REGISTRY.snapshot()
+
+        with _windows_lock:
+            for window in _open_windows:
+                window.overlapping_runs += 1
+            self.overlapping_runs = len(_open_windows)
+            _open_windows.append(self)
+
+    def close(self):
+        with _windows_lock:
+            if self in _open_windows:
+                _open_windows.remove(self)
+
+
+def print_run_summary(run_id: int, window: RunWindow):
+    """
+    Print the runner metrics, only counting what happened during the run's
+    window (closed first)
+    """
+
+    window.close()
+    since = window.since
+    sent = QUOTES_SENT.snapshot()
+    failed_quotes = QUOTES_FAILED.snapshot()
+
+    def delta(metric, values, key):
+        return values.get(key, 0.0) - since.get(metric.name, {}).get(key, 0.0)
+
+    def histogram_delta(metric: Histogram):
+        before = since.get(metric.name, {})
+        deltas = {}
+        for key, state in metric.snapshot().items():
+            previous = before.get(key, [0] * len(state))
+            diff = [now - then for now, then in zip(state, previous)]
+            if diff[-1]:
+                deltas[key] = diff
+        return deltas
+
+    def describe(metric: Histogram, state):
+        p50 = metric.quantile(state, 0.5)
+        p95 = metric.quantile(state, 0.95)
+        return (
+            f"n={int(state[-1])} total={state[-2]:.2f}s avg={state[-2] / state[-1]:.3f}s "
+            f"p50~{p50:.3f}s p95~{p95:.3f}s"
+        )
+
+    print(f"\n📈 Run #{run_id} metrics:")
+    if window.overlapping_runs:
+        print(
+            f"  ⚠️  {window.overlapping_runs} other run(s) overlapped this one, "
+            f"their quotes are counted too"
+        )
+
+    for key in sorted(sent):
+        failed = {
+            failed_key[1]: int(delta(QUOTES_FAILED, failed_quotes, failed_key))
+            for failed_key in failed_quotes
+            if failed_key[0] == key[0] and delta(QUOTES_FAILED, failed_quotes, failed_key)
+        }
+        print(
+            f"  quotes {key[0]}: sent={int(delta(QUOTES_SENT, sent, key))} failed={failed}"
+        )
+
+    for metric in (QUOTE_LATENCY, DECODE_LATENCY, PRICE_LOOKUP_LATENCY, DB_LATENCY):
+        for key, state in sorted(histogram_delta(metric).items()):
+            print(f"  {metric.name}{{{','.join(key)}}}: {describe(metric, state)}")
@@ -0,0 +1,175 @@
+import math
+import zlib
+from typing import Dict, Iterator, List, Optional
+
+from ..data.chain import CHAIN_CONFIG
+
+
+# tokens without a "tier" in the chain config count as the least liquid
+DEFAULT_TIER = 3
+
+
+def _pair(input_token: dict, output_token: dict) -> dict:
+    return {
+        "name": f"{input_token['symbol']}->{output_token['symbol']}",
+        "input_token_address": input_token["address"],
+        "output_token_address": output_token["address"],
+    }
+
+
+def iter_hub_pairs(chain_id: str) -> Iterator[dict]:
+    """Trading token <-> normalization token pairs, the classic pair set"""
+
+    chain_config = CHAIN_CONFIG.get(chain_id)
+    if not chain_config:
+        return
+
+    normalization_token = chain_config["normalization_token"]
+    for token in chain_config["trading_tokens"]:
+        yield _pair(token, normalization_token)
+    for token in chain_config["trading_tokens"]:
+        yield _pair(normalization_token, token)
+
+
+def iter_pair_matrix(chain_id: str) -> Iterator[dict]:
+    """Every ordered pair of the chain's tokens: hub pairs, then trading token <-> trading token"""
+
+    chain_config = CHAIN_CONFIG.get(chain_id)
+    if not chain_config:
+        return
+
+    yield from iter_hub_pairs(chain_id)
+
+    tokens = chain_config["trading_tokens"]
+    for input_token in tokens:
+        for output_token in tokens:
+            if input_token is not output_token:
+                yield _pair(input_token, output_token)
+
+
+class _Stratum:
+    """
+    Trading token <-> trading token pairs between two liquidity tiers,
+    addressed by index so a window of them can be taken without listing
+    the whole stratum
+    """
+
+    def __init__(self, tiers, low_tokens: List[dict], high_tokens: List[dict], salt: int):
+        self.tiers = tiers
+        self.low_tokens = low_tokens
+        self.high_tokens = high_tokens
+        self.same_tier = low_tokens is high_tokens
+
+        count = len(low_tokens)
+        self.size = count * (count - 1) if self.same_tier else 2 * count * len(high_tokens)
+
+        # affine permutation spreading consecutive positions over the stratum
+        self.step = max(1, round(self.size * 0.618))
+        while self.size and math.gcd(self.step, self.size) != 1:
+            self.step += 1
+        self.offset = salt % self.size if self.size else 0
+
+    def pair(self, position: int) -> dict:
+        k = (position * self.step + self.offset) % self.size
+
+        if self.same_tier:
+            count = len(self.low_tokens)
+            input_idx, output_idx = divmod(k, count - 1)
+            if output_idx >= input_idx:
+                output_idx += 1
+            return _pair(self.low_tokens[input_idx], self.low_tokens[output_idx])
+
+        reverse, k = k % 2, k // 2
+        low_idx, high_idx = divmod(k, len(self.high_tokens))
+        low_token, high_token = self.low_tokens[low_idx], self.high_tokens[high_idx]
+        return _pair(high_token, low_token) if reverse else _pair(low_token, high_token)
+
+    def window(self, rotation: int, count: int) -> Iterator[dict]:
+        """`count` pairs, the next ones each rotation, wrapping around"""
+
+        start = rotation * count
+        for position in range(start, start + count):
+            yield self.pair(position % self.size)
+
+
+def _strata(chain_id: str) -> List[_Stratum]:
+    tokens_by_tier: Dict[int, List[dict]] = {}
+    for token in CHAIN_CONFIG[chain_id]["trading_tokens"]:
+        tokens_by_tier.setdefault(token.get("tier", DEFAULT_TIER), []).append(token)
+
+    tiers = sorted(tokens_by_tier)
+    salt = zlib.crc32(chain_id.encode())
+
+    strata = []
+    for low_idx, low_tier in enumerate(tiers):
+        for high_tier in tiers[low_idx:]:
+            stratum = _Stratum(
+                (low_tier, high_tier), tokens_by_tier[low_tier], tokens_by_tier[high_tier], salt
+            )
+            if stratum.size:
+                strata.append(stratum)
+
+    return strata
+
+
+def _allocate(strata: List[_Stratum], budget: int) -> List[int]:
+    """Split a pair budget over strata proportionally to their size (largest remainder)"""
+
+    total = sum(stratum.size for stratum in strata)
+    if budget >= total:
+        return [stratum.size for stratum in strata]
+
+    shares = [budget * stratum.size / total for stratum in strata]
+    quotas = [int(share) for share in shares]
+
+    by_remainder = sorted(range(len(strata)), key=lambda idx: shares[idx] - quotas[idx], reverse=True)
+    for idx in by_remainder[:budget - sum(quotas)]:
+        quotas[idx] += 1
+
+    return quotas
+
+
+def sample_chain_pairs(chain_id: str, max_pairs: Optional[int], rotation: int = 0) -> Iterator[dict]:
+    """
+    Pairs of the full matrix to benchmark this run, within a pair budget
+
+    Hub pairs always come first. The rest of the budget is split over the
+    trading token <-> trading token pairs stratified by liquidity tier
+    (proportionally to each stratum's size), and every rotation (eg: the chain's run count)
+    takes the next window of each stratum, so the whole matrix gets covered
+    over `ceil(stratum size / quota)` runs.
+
+    Args:
+        chain_id: Chain to generate pairs for
+        max_pairs: Pair budget, None for the full matrix
+        rotation: Increases by one every run of the chain
+    """
+
+    if chain_id not in CHAIN_CONFIG:
+        return
+
+    if max_pairs is None:
+        yield from iter_pair_matrix(chain_id)
+        return
+
+    budget = max_pairs
+    for pair in iter_hub_pairs(chain_id):
+        if budget <= 0:
+            return
+        budget -= 1
+        yield pair
+
+    strata = _strata(chain_id)
+    if budget <= 0 or not strata:
+        return
+
+    for stratum, quota in zip(strata, _allocate(strata, budget)):
+        if not quota:
+            continue
+
+        runs = math.ceil(stratum.size / quota)
+        print(
+            f"🧮 Chain {chain_id} tier {stratum.tiers[0]}x{stratum.tiers[1]}: "
+            f"{quota}/{stratum.size} cross pairs this run, full coverage every {runs} runs"
+        )
+        yield from stratum.window(rotation, quota)
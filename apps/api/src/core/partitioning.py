@@ -0,0 +1,140 @@
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import Column, ForeignKey, Index, MetaData, Table, inspect, text
+
+
+# Optional postgres declarative partitioning of the raw result tables by run id
+# ranges: DATABASE_PARTITIONING=run, DATABASE_PARTITION_RUN_SPAN runs per partition.
+# Only applies when the tables are created, existing tables are left alone.
+DATABASE_PARTITIONING = os.getenv("DATABASE_PARTITIONING", "off")
+PARTITION_RUN_SPAN = int(os.getenv("DATABASE_PARTITION_RUN_SPAN", "30"))
+
+PARTITIONED_TABLES = ("trade_results", "provider_results")
+
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_runs_(?P<start>\d+)_(?P<end>\d+)$")
+
+
+def partitioning_enabled(bind) -> bool:
+    return DATABASE_PARTITIONING == "run" and bind.dialect.name == "postgresql"
+
+
+def _partitioned_table(table: Table, metadata: MetaData) -> Table:
+    """
+    Copy of a model table partitioned by run_id. The partition key has to be
+    part of the primary key, and no foreign key can point into a partitioned
+    table, so provider_results.trade_id loses its constraint.
+    """
+
+    columns = []
+    for column in table.columns:
+        if column.name == "run_id":
+            columns.append(
+                Column("run_id", column.type, ForeignKey("benchmark_runs.id"), primary_key=True, nullable=False)
+            )
+        elif column.name == "id":
+            columns.append(Column("id", column.type, primary_key=True, autoincrement=True))
+        else:
+            columns.append(Column(column.name, column.type, nullable=column.nullable))
+
+    partitioned = Table(
+        table.name, metadata, *columns, postgresql_partition_by="RANGE (run_id)"
+    )
+
+    for index in table.indexes:
+        Index(index.name, *[partitioned.c[column.name] for column in index.columns])
+
+    return partitioned
+
+
+def create_partitioned_tables(bind, base_metadata: MetaData):
+    """Create trade_results/provider_results as partitioned tables if enabled"""
+
+    if not partitioning_enabled(bind):
+        return
+
+    inspector = inspect(bind)
+    missing = [name for name in PARTITIONED_TABLES if not inspector.has_table(name)]
+    if not missing:
+        return
+
+    metadata = MetaData()
+    # referenced by the run_id foreign keys
+    base_metadata.tables["benchmark_runs"].to_metadata(metadata)
+
+    tables = [
+        _partitioned_table(base_metadata.tables[name], metadata)
+        for name in missing
+    ]
+    metadata.create_all(bind=bind, tables=tables)
+
+    print(f"🧱 Partitioned {', '.join(missing)} by run_id ({PARTITION_RUN_SPAN} runs per partition)")
+
+
+def partition_bounds(run_id: int):
+    """[start, end) run id range of the partition holding a run"""
+
+    start = ((run_id - 1) // PARTITION_RUN_SPAN) * PARTITION_RUN_SPAN + 1
+    return start, start + PARTITION_RUN_SPAN
+
+
+def ensure_run_partitions(bind, run_id: int):
+    """Create the partitions a run's results go into, if they don't exist yet"""
+
+    if not partitioning_enabled(bind):
+        return
+
+    start, end = partition_bounds(run_id)
+
+    # own transaction, so concurrent runs see the partitions straight away
+    with bind.engine.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table}_runs_{start}_{end - 1} "
+                f"PARTITION OF {table} FOR VALUES FROM ({start}) TO ({end})"
+            ))
+
+
+def reserve_run_id(bind) -> Optional[int]:
+    """
+    With partitioning, take the next benchmark_runs id and create its
+    partitions before the run is inserted (None otherwise: the id is
+    assigned on insert). Attaching a partition locks benchmark_runs through
+    the run_id foreign key, so it can't wait on a transaction that already
+    inserted the run.
+    """
+
+    if not partitioning_enabled(bind):
+        return None
+
+    with bind.engine.begin() as connection:
+        run_id = connection.execute(text(
+            "SELECT nextval(pg_get_serial_sequence('benchmark_runs', 'id'))"
+        )).scalar_one()
+
+    ensure_run_partitions(bind, run_id)
+    return run_id
+
+
+def list_partitions(connection):
+    """
+    Returns:
+        list of (partition name, first run id, last run id)
+    """
+
+    rows = connection.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = ANY(:tables)
+    """), {"tables": list(PARTITIONED_TABLES)}).scalars()
+
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, int(match["start"]), int(match["end"])))
+
+    return sorted(partitions, key=lambda partition: (partition[1], partition[0]))
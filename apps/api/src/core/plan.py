@@ -0,0 +1,272 @@
+import dataclasses
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import settings
+from .pairs import iter_hub_pairs
+from ..data.amount import TRADE_AMOUNTS
+from ..data.chain import CHAIN_CONFIG
+
+
+def config_version(chain_id: str) -> str:
+    """Short hash of everything a chain's plan is compiled from"""
+
+    config = {"chain": CHAIN_CONFIG.get(chain_id), "amounts": TRADE_AMOUNTS}
+    encoded = json.dumps(config, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+@dataclasses.dataclass(frozen=True)
+class TradePlan:
+    """
+    Every (pair, amount) trade of a chain, compiled once per config version
+
+    Tokens, pairs and amounts are stored as parallel arrays: pairs point at
+    their input/output token by index, so token symbols and decimals are
+    looked up once at compile time and prices are needed once per token.
+    The compiled plan is shared (see `get_trade_plan`); `priced` returns a
+    copy with the input amount of every trade filled in.
+    """
+
+    chain_id: str
+    version: str
+
+    # per token
+    tokens: List[str]
+    symbols: List[str]
+    decimals: np.ndarray
+
+    # per pair: {"name", "input_token_address", "output_token_address"}
+    pairs: List[dict]
+    pair_input: np.ndarray
+    pair_output: np.ndarray
+
+    # per amount bucket
+    amounts: List[dict]
+    amount_usd: np.ndarray
+
+    # filled by `priced`: price per token (nan when unknown), and per (pair, amount)
+    # the amount in the token's smallest unit / whole tokens (None when unpriced)
+    prices: Optional[np.ndarray] = None
+    token_amounts: Optional[np.ndarray] = None
+    input_amounts: Optional[np.ndarray] = None
+
+    @classmethod
+    def compile(cls, chain_id: str) -> "TradePlan":
+        chain_config = CHAIN_CONFIG[chain_id]
+        normalization_token = chain_config["normalization_token"]
+        trading_tokens = chain_config["trading_tokens"]
+
+        tokens, symbols, decimals = [], [], []
+        seen = set()
+        for token in [normalization_token] + trading_tokens:
+            address = token["address"].lower()
+            if address not in seen:
+                seen.add(address)
+                tokens.append(token["address"])
+                symbols.append(token["symbol"])
+                decimals.append(token["decimals"])
+
+        plan = cls(
+            chain_id=chain_id,
+            version=config_version(chain_id),
+            tokens=tokens,
+            symbols=symbols,
+            decimals=np.asarray(decimals, dtype=np.int64),
+            pairs=[],
+            pair_input=np.zeros(0, dtype=np.int64),
+            pair_output=np.zeros(0, dtype=np.int64),
+            amounts=list(TRADE_AMOUNTS),
+            amount_usd=np.asarray([amount["usd"] for amount in TRADE_AMOUNTS], dtype=np.float64),
+        )
+        return plan.with_pairs(list(iter_hub_pairs(chain_id)))
+
+    def with_pairs(self, pairs: List[dict]) -> "TradePlan":
+        """Copy of the plan trading other pairs of the chain's tokens (eg: a pair matrix sample)"""
+
+        token_index = {token.lower(): idx for idx, token in enumerate(self.tokens)}
+
+        known = [
+            pair for pair in pairs
+            if pair["input_token_address"].lower() in token_index
+            and pair["output_token_address"].lower() in token_index
+        ]
+        if len(known) < len(pairs):
+            print(f"⚠️  Skipping {len(pairs) - len(known)} pairs with tokens not configured on chain {self.chain_id}")
+
+        return dataclasses.replace(
+            self,
+            pairs=known,
+            pair_input=np.asarray(
+                [token_index[pair["input_token_address"].lower()] for pair in known], dtype=np.int64
+            ),
+            pair_output=np.asarray(
+                [token_index[pair["output_token_address"].lower()] for pair in known], dtype=np.int64
+            ),
+        )
+
+    def amount_index(self, amount: dict) -> int:
+        return int(np.flatnonzero(self.amount_usd == amount["usd"])[0])
+
+    def priced(self, prices: Dict[str, Optional[float]]) -> "TradePlan":
+        """
+        Copy of the plan with every trade's input amount computed in one
+        vectorized pass
+
+        Args:
+            prices: Token address -> USD price (None when it couldn't be fetched)
+        """
+
+        prices_by_address = {address.lower(): price for address, price in prices.items()}
+        token_prices = np.asarray(
+            [prices_by_address.get(token.lower()) or np.nan for token in self.tokens], dtype=np.float64
+        )
+
+        # same float math as `calculate_input_amount`: usd / price * 10 ^ decimals
+        scale = np.asarray([float(10 ** int(decimals)) for decimals in self.decimals])
+        price = token_prices[self.pair_input]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            units = np.trunc(self.amount_usd[None, :] / price[:, None] * scale[self.pair_input][:, None])
+        priced = np.isfinite(units) & (price > 0)[:, None]
+
+        token_amounts = np.full(units.shape, None, dtype=object)
+        input_amounts = np.full(units.shape, None, dtype=object)
+        for pair_idx, amount_idx in zip(*np.nonzero(priced)):
+            token_amount = int(units[pair_idx, amount_idx])
+            decimals = int(self.decimals[self.pair_input[pair_idx]])
+            token_amounts[pair_idx, amount_idx] = str(token_amount)
+            input_amounts[pair_idx, amount_idx] = str(int(token_amount / (10 ** decimals)))
+
+        return dataclasses.replace(
+            self, prices=token_prices, token_amounts=token_amounts, input_amounts=input_amounts
+        )
+
+    def pair_priced(self, pair_idx: int) -> bool:
+        """Both tokens of the pair have a price"""
+        return bool(
+            np.isfinite(self.prices[self.pair_input[pair_idx]])
+            and np.isfinite(self.prices[self.pair_output[pair_idx]])
+        )
+
+    def token_price(self, token_idx: int) -> Optional[float]:
+        price = self.prices[token_idx]
+        return float(price) if np.isfinite(price) else None
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form, see `diff_plans`"""
+
+        priced = self.prices is not None
+
+        return {
+            "chain_id": self.chain_id,
+            "version": self.version,
+            "tokens": [
+                {
+                    "address": address,
+                    "symbol": symbol,
+                    "decimals": int(decimals),
+                    "price": self.token_price(idx) if priced else None,
+                }
+                for idx, (address, symbol, decimals) in enumerate(zip(self.tokens, self.symbols, self.decimals))
+            ],
+            "pairs": [
+                {
+                    **pair,
+                    "trades": [
+                        {
+                            "amount_usd": amount["usd"],
+                            "token_amount": self.token_amounts[pair_idx, amount_idx] if priced else None,
+                            "input_amount": self.input_amounts[pair_idx, amount_idx] if priced else None,
+                        }
+                        for amount_idx, amount in enumerate(self.amounts)
+                    ],
+                }
+                for pair_idx, pair in enumerate(self.pairs)
+            ],
+        }
+
+
+def diff_plans(before: dict, after: dict) -> dict:
+    """
+    What changed between two serialized plans (`TradePlan.to_dict`) of a
+    chain, eg: the plans of two runs
+
+    Returns:
+        dict: version change, added/removed pairs, token price changes and
+        trades whose input amount changed
+    """
+
+    before_prices = {token["address"].lower(): token["price"] for token in before["tokens"]}
+    after_prices = {token["address"].lower(): token["price"] for token in after["tokens"]}
+
+    price_changes = {}
+    for address, price in after_prices.items():
+        previous = before_prices.get(address)
+        if previous != price:
+            change = (price - previous) / previous if previous and price else None
+            price_changes[address] = {"before": previous, "after": price, "change": change}
+
+    before_trades = {
+        (pair["name"], trade["amount_usd"]): trade["token_amount"]
+        for pair in before["pairs"] for trade in pair["trades"]
+    }
+    after_trades = {
+        (pair["name"], trade["amount_usd"]): trade["token_amount"]
+        for pair in after["pairs"] for trade in pair["trades"]
+    }
+
+    before_pairs = {pair["name"] for pair in before["pairs"]}
+    after_pairs = {pair["name"] for pair in after["pairs"]}
+
+    return {
+        "version": {"before": before["version"], "after": after["version"]},
+        "added_pairs": sorted(after_pairs - before_pairs),
+        "removed_pairs": sorted(before_pairs - after_pairs),
+        "price_changes": price_changes,
+        "changed_trades": [
+            {"pair": pair, "amount_usd": amount_usd, "before": before_trades[(pair, amount_usd)], "after": token_amount}
+            for (pair, amount_usd), token_amount in after_trades.items()
+            if (pair, amount_usd) in before_trades and before_trades[(pair, amount_usd)] != token_amount
+        ],
+    }
+
+
+# (chain id, config version) -> compiled plan
+_PLANS: Dict[tuple, TradePlan] = {}
+_PLANS_LOCK = threading.Lock()
+
+
+def get_trade_plan(chain_id: str) -> Optional[TradePlan]:
+    """The chain's compiled plan, recompiled only when its config changes"""
+
+    if chain_id not in CHAIN_CONFIG:
+        return None
+
+    key = (chain_id, config_version(chain_id))
+
+    with _PLANS_LOCK:
+        plan = _PLANS.get(key)
+        if plan is None:
+            plan = _PLANS[key] = TradePlan.compile(chain_id)
+            print(
+                f"🗺️  Compiled trade plan for chain {chain_id} (v{plan.version}): "
+                f"{len(plan.pairs)} pairs x {len(plan.amounts)} amounts"
+            )
+
+    return plan
+
+
+def save_plan(plan: TradePlan, run_id: int):
+    """Write a run's priced plan to BENCHMARK_PLAN_DIR (if set) as run-<id>/chain-<chain>.json"""
+
+    if not settings.plan_dir:
+        return
+
+    path = settings.plan_dir / f"run-{run_id}" / f"chain-{plan.chain_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(plan.to_dict(), indent=2))
+    print(f"🗺️  Saved trade plan to {path}")
@@ -0,0 +1,215 @@
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .config import settings
+
+
+# phases a chain's time is split into
+PHASES = ("pricing", "planning", "quoting", "persisting")
+
+# hot spots printed in the summary
+TOP_FUNCTIONS = 15
+
+
+class _PhaseRecorder:
+    """
+    Wall-clock time per (chain, phase), only counting a phase's own time:
+    while a nested phase runs (eg: a flush while queueing trades) the outer
+    one is paused
+    """
+
+    def __init__(self):
+        self.totals: Dict[Tuple[str, str], float] = collections.defaultdict(float)
+        self.counts: Dict[Tuple[str, str], int] = collections.defaultdict(int)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def span(self, chain_id: str, phase: str):
+        stack = self._local.__dict__.setdefault("stack", [])
+        # [key, start, time spent in nested phases]
+        frame = [(str(chain_id), phase), time.perf_counter(), 0.0]
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            if stack:
+                stack[-1][2] += elapsed
+            with self._lock:
+                self.totals[frame[0]] += elapsed - frame[2]
+                self.counts[frame[0]] += 1
+
+    def report(self) -> List[dict]:
+        with self._lock:
+            return sorted(
+                (
+                    {"chain": chain, "phase": phase, "seconds": seconds, "spans": self.counts[(chain, phase)]}
+                    for (chain, phase), seconds in self.totals.items()
+                ),
+                key=lambda span: span["seconds"], reverse=True
+            )
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of every thread (quote workers included) at a fixed
+    interval from a background thread, for runs where cProfile's overhead or
+    main-thread-only view gets in the way. Output is in the collapsed stack
+    format flame graph tools read.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.self_samples: Dict[str, int] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                top = self._label(frame)
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.self_samples[top] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: Path):
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.items()))
+
+    def hot_spots(self, limit: int = TOP_FUNCTIONS) -> List[Tuple[str, int]]:
+        # idle workers sit in the same few wait calls, leave them out of the ranking
+        busy = {
+            label: count for label, count in self.self_samples.items()
+            if not label.startswith(("wait ", "_wait_for_tstate_lock ", "select ", "_sample "))
+        }
+        return collections.Counter(busy).most_common(limit)
+
+
+# run id -> phase recorder of the runs being profiled (the scheduler can run several at once)
+_recorders: Dict[int, _PhaseRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def phase(run_id: int, chain_id: str, name: str):
+    """Time a phase of a run's chain while profiling it (BENCHMARK_PROFILE), no-op otherwise"""
+
+    with _recorders_lock:
+        recorder = _recorders.get(run_id)
+
+    if recorder is None:
+        return contextlib.nullcontext()
+    return recorder.span(chain_id, name)
+
+
+@contextlib.contextmanager
+def profile_run(run_id: int):
+    """
+    Profile a benchmark run when BENCHMARK_PROFILE is set: records phase
+    spans per chain and, with BENCHMARK_PROFILER, a cProfile (calling thread)
+    or sampling (all threads) profile. Writes the artifacts to
+    BENCHMARK_PROFILE_DIR and prints a ranked hot-spot summary.
+    """
+
+    if not settings.profile:
+        yield
+        return
+
+    recorder = _PhaseRecorder()
+    with _recorders_lock:
+        _recorders[run_id] = recorder
+
+    profiler = None
+    if settings.profiler == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif settings.profiler == "sampling":
+        profiler = SamplingProfiler()
+        profiler.start()
+    elif settings.profiler != "none":
+        print(f"⚠️  Unknown BENCHMARK_PROFILER {settings.profiler!r}, only recording phases")
+
+    start_time = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - start_time
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        elif profiler is not None:
+            profiler.stop()
+        with _recorders_lock:
+            _recorders.pop(run_id, None)
+
+        try:
+            _write_report(run_id, wall_time, recorder, profiler)
+        except Exception as e:
+            print(f"❌ Failed to write profile of run #{run_id}: {e}")
+
+
+def _write_report(run_id: int, wall_time: float, recorder: _PhaseRecorder, profiler):
+    profile_dir = Path(settings.profile_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+
+    spans = recorder.report()
+    phases_path = profile_dir / f"run-{run_id}-phases.json"
+    phases_path.write_text(json.dumps({"run_id": run_id, "wall_time": wall_time, "spans": spans}, indent=2))
+
+    print(f"\n⏱️  Run #{run_id} phases ({wall_time:.2f}s wall clock):")
+    for span in spans:
+        print(
+            f"  {span['seconds']:8.2f}s {100 * span['seconds'] / wall_time:5.1f}%  "
+            f"chain {span['chain']} {span['phase']} ({span['spans']} spans)"
+        )
+
+    if isinstance(profiler, cProfile.Profile):
+        profile_path = profile_dir / f"run-{run_id}.prof"
+        profiler.dump_stats(profile_path)
+
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+        print("\n🔥 Hot spots (cProfile, own time):")
+        print(output.getvalue())
+        print(f"💾 Saved profile to {profile_path} (open with snakeviz or pstats)")
+
+    elif isinstance(profiler, SamplingProfiler):
+        profile_path = profile_dir / f"run-{run_id}.collapsed"
+        profiler.dump(profile_path)
+
+        total = sum(profiler.self_samples.values()) or 1
+        print("\n🔥 Hot spots (sampling, share of samples on CPU or I/O):")
+        for rank, (label, count) in enumerate(profiler.hot_spots(), 1):
+            print(f"  {rank:2}. {100 * count / total:5.1f}%  {label}")
+        print(f"💾 Saved profile to {profile_path} (collapsed stacks, eg: flamegraph.pl or speedscope)")
+
+    print(f"💾 Saved phase spans to {phases_path}")
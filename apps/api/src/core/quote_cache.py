@@ -0,0 +1,266 @@
+import concurrent.futures
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from .codec import dumps, loads
+from .config import settings
+from ..providers.base import QuoteResult
+
+
+# (provider, chain, from token, to token, amount in the token's smallest unit)
+QuoteKey = Tuple[str, str, str, str, str]
+
+
+def quote_key(provider_name: str, chain: str, from_token: str, to_token: str, from_amount) -> QuoteKey:
+    return (provider_name, str(chain), from_token.lower(), to_token.lower(), str(from_amount))
+
+
+class MemoryQuoteStore:
+    """Quotes kept in this process only"""
+
+    def __init__(self):
+        self._quotes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: QuoteKey, ttl: float) -> Optional[QuoteResult]:
+        with self._lock:
+            cached = self._quotes.get(key)
+
+        if cached and time.time() - cached[1] < ttl:
+            return cached[0]
+        return None
+
+    def set(self, key: QuoteKey, quote: QuoteResult):
+        with self._lock:
+            self._quotes[key] = (quote, time.time())
+
+    def acquire_lease(self, key: QuoteKey, seconds: float) -> Optional[float]:
+        # in-process requests are already coalesced by the cache itself
+        return float("inf")
+
+    def release_lease(self, key: QuoteKey, lease: float):
+        pass
+
+
+class SqliteQuoteStore:
+    """
+    Quotes shared by every benchmark process on the host through a SQLite
+    file, with leases so only one process fetches a given quote at a time
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS quotes (key TEXT PRIMARY KEY, quote TEXT, created_at REAL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL)"
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between the quote workers
+        if not hasattr(self._local, "connection"):
+            self._local.connection = sqlite3.connect(self.path, timeout=30)
+        return self._local.connection
+
+    @staticmethod
+    def _key(key: QuoteKey) -> str:
+        return "|".join(key)
+
+    def get(self, key: QuoteKey, ttl: float) -> Optional[QuoteResult]:
+        row = self._connection().execute(
+            "SELECT quote FROM quotes WHERE key = ? AND created_at > ?",
+            (self._key(key), time.time() - ttl)
+        ).fetchone()
+
+        return QuoteResult.from_dict(loads(row[0])) if row else None
+
+    def set(self, key: QuoteKey, quote: QuoteResult):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO quotes (key, quote, created_at) VALUES (?, ?, ?)",
+            (self._key(key), dumps(quote.to_dict()), time.time())
+        )
+        connection.commit()
+
+    def acquire_lease(self, key: QuoteKey, seconds: float) -> Optional[float]:
+        """
+        Returns:
+            The lease (its expiry time) to hand to `release_lease`, None if
+            another process holds it
+        """
+
+        connection = self._connection()
+        now = time.time()
+        expires_at = now + seconds
+
+        connection.execute(
+            "DELETE FROM leases WHERE key = ? AND expires_at < ?", (self._key(key), now)
+        )
+        acquired = connection.execute(
+            "INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)",
+            (self._key(key), expires_at)
+        ).rowcount == 1
+        connection.commit()
+
+        return expires_at if acquired else None
+
+    def release_lease(self, key: QuoteKey, lease: float):
+        # only our own lease: once it expired, another process may hold the key
+        connection = self._connection()
+        connection.execute(
+            "DELETE FROM leases WHERE key = ? AND expires_at = ?", (self._key(key), lease)
+        )
+        connection.commit()
+
+
+class QuoteCache:
+    """
+    Short-TTL quote cache with request coalescing (single-flight)
+
+    Identical (provider, chain, from, to, amount) requests made while one is
+    already in flight wait for it instead of hitting the provider again, and
+    successful quotes are reused until they are `ttl` seconds old.
+    """
+
+    # how long other processes wait on a quote being fetched elsewhere
+    LEASE_SECONDS = 15.0
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, ttl: float, store=None):
+        self.ttl = ttl
+        self.store = store or MemoryQuoteStore()
+
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def _take_lease(self, key: QuoteKey) -> Tuple[Optional[QuoteResult], Optional[float]]:
+        """
+        Returns:
+            (the quote another process cached meanwhile, or None), and the
+            lease if there's nothing cached and this process has to fetch
+        """
+
+        lease = self.store.acquire_lease(key, self.LEASE_SECONDS)
+        if lease is None:
+            return None, None
+
+        # the other process may have cached its quote and released the lease since we looked
+        quote = self.store.get(key, self.ttl)
+        if quote is not None:
+            self.store.release_lease(key, lease)
+            return quote, None
+
+        return None, lease
+
+    def _wait_for_other_process(self, key: QuoteKey) -> Tuple[Optional[QuoteResult], Optional[float]]:
+        """
+        Returns:
+            (the quote the other process cached, or None), and the lease if
+            the other process gave up and this one took it over
+        """
+
+        deadline = time.time() + self.LEASE_SECONDS
+
+        while time.time() < deadline:
+            quote = self.store.get(key, self.ttl)
+            if quote is not None:
+                return quote, None
+            quote, lease = self._take_lease(key)
+            if quote is not None or lease is not None:
+                # cached after all, or the other process gave up without caching a quote
+                return quote, lease
+            time.sleep(self.POLL_INTERVAL)
+
+        return None, None
+
+    def get_or_fetch(self, key: QuoteKey, fetch: Callable[[], QuoteResult]) -> QuoteResult:
+        """
+        Get a fresh cached quote, or fetch it once for every concurrent caller
+
+        Args:
+            key (QuoteKey): The request key, see `quote_key`
+            fetch (Callable): Makes the actual provider request
+        """
+
+        quote = self.store.get(key, self.ttl)
+        if quote is not None:
+            self.hits += 1
+            return quote.as_cached()
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            self.coalesced += 1
+            return future.result().as_cached()
+
+        try:
+            quote, lease = self._take_lease(key)
+            if quote is None and lease is None:
+                quote, lease = self._wait_for_other_process(key)
+
+            if quote is not None:
+                self.hits += 1
+                quote = quote.as_cached()
+            else:
+                self.misses += 1
+                try:
+                    quote = fetch()
+                    # only successful quotes are worth reusing
+                    if quote.successful:
+                        self.store.set(key, quote)
+                finally:
+                    # without a lease (the other process is still at it) there's nothing to release
+                    if lease is not None:
+                        self.store.release_lease(key, lease)
+
+            future.set_result(quote)
+            return quote
+
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+_quote_cache = None
+_quote_cache_lock = threading.Lock()
+
+
+def get_quote_cache() -> Optional[QuoteCache]:
+    """
+    The process wide quote cache, or None unless enabled with
+    BENCHMARK_QUOTE_CACHE_TTL (and BENCHMARK_QUOTE_CACHE_PATH to share it
+    between processes through SQLite)
+    """
+
+    global _quote_cache
+
+    if settings.quote_cache_ttl <= 0:
+        return None
+
+    if _quote_cache is None:
+        with _quote_cache_lock:
+            if _quote_cache is None:
+                store = SqliteQuoteStore(settings.quote_cache_path) if settings.quote_cache_path else None
+                _quote_cache = QuoteCache(settings.quote_cache_ttl, store)
+
+    return _quote_cache
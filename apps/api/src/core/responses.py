@@ -0,0 +1,163 @@
+import gzip
+from typing import Any, Dict, Iterable, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from .codec import dumpb
+from .config import settings
+
+# optional brotli (poetry install -E compression), gzip otherwise
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded by the fastest installed backend (see
+    `core.codec`). Returned directly by endpoints so big payloads skip
+    FastAPI's `jsonable_encoder` pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumpb(content)
+
+
+def _flatten(row: dict, prefix: str = "") -> Dict[str, Any]:
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def to_columns(rows: Iterable[dict]) -> Dict[str, List]:
+    """
+    Rows as {column: [value per row]}, nested dicts flattened to dotted
+    columns (eg: "provider_results.GlueX.output_amount"), so keys are sent
+    once instead of once per row. Columns a row doesn't have are None.
+    """
+
+    flat_rows = [_flatten(row) for row in rows]
+
+    columns: Dict[str, List] = {}
+    for idx, row in enumerate(flat_rows):
+        for key in row:
+            if key not in columns:
+                columns[key] = [None] * len(flat_rows)
+            columns[key][idx] = row[key]
+    return columns
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """
+    Codings of an Accept-Encoding header with their q-value (eg: "br;q=0,
+    gzip" -> {"br": 0.0, "gzip": 1.0}), malformed q-values count as 0
+    """
+
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """
+    Compression to use for an Accept-Encoding header: the supported coding
+    with the highest q-value (brotli on ties), never one with q=0
+
+    Returns:
+        "br", "gzip", or None to send the body as is
+    """
+
+    accepted = accepted_encodings(header)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    best, best_q = None, 0.0
+    for coding in supported:
+        # "*" covers the codings the header doesn't name
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when installed and accepted) or gzip compression of responses
+    of at least BENCHMARK_COMPRESSION_MIN_SIZE bytes
+
+    Only whole bodies are compressed, streamed responses (eg: SSE run
+    progress) and already encoded ones go out as they are.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+
+            if (
+                message.get("more_body")
+                or "content-encoding" in headers
+                or len(body) < settings.compression_min_size
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if encoding == "br":
+                body = brotli.compress(body, quality=settings.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=settings.gzip_level)
+
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, compressing_send)
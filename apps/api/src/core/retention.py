@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import Float, and_, case, cast, delete, func, insert, select, text, update
+
+from .config import settings
+from .database import get_db
+from .partitioning import list_partitions, partitioning_enabled
+from ..models import BenchmarkRun, ProviderResult, ProviderRollup, RouteLeg, TradeResult
+
+
+ROLLUP_COLUMNS = [
+    "run_id", "run_date", "chain", "pair", "amount_usd", "provider", "quotes",
+    "successful_quotes", "wins", "average_response_time", "best_output",
+]
+
+
+def successful_quote(result):
+    """Condition of provider results with a usable output amount"""
+
+    return and_(
+        result.c.status_code == 200,
+        result.c.output_amount.isnot(None),
+        result.c.output_amount != "",
+    )
+
+
+def rollup_query(run_ids: List[int]):
+    """
+    Per (run, chain, pair, amount, provider) aggregates of the raw results,
+    in the order of ROLLUP_COLUMNS
+    """
+
+    run = BenchmarkRun.__table__
+    trade = TradeResult.__table__
+    result = ProviderResult.__table__
+
+    successful = successful_quote(result)
+    output = cast(result.c.output_amount, Float)
+
+    # best successful output of every trade, to count wins
+    best = (
+        select(result.c.trade_id, func.max(output).label("best_output"))
+        .where(successful)
+        .group_by(result.c.trade_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            trade.c.run_id,
+            run.c.start_time,
+            trade.c.chain,
+            trade.c.pair,
+            trade.c.amount_usd,
+            result.c.provider,
+            func.count(result.c.id),
+            func.sum(case((successful, 1), else_=0)),
+            func.sum(case((and_(successful, output == best.c.best_output), 1), else_=0)),
+            func.avg(case((successful, result.c.elapsed_time))),
+            func.max(case((successful, output))),
+        )
+        .select_from(
+            result
+            .join(trade, trade.c.id == result.c.trade_id)
+            .join(run, run.c.id == trade.c.run_id)
+            .outerjoin(best, best.c.trade_id == trade.c.id)
+        )
+        .where(trade.c.run_id.in_(run_ids))
+        .group_by(
+            trade.c.run_id, run.c.start_time, trade.c.chain, trade.c.pair,
+            trade.c.amount_usd, result.c.provider,
+        )
+    )
+
+
+def _expired_run_ids(db_session, cutoff: datetime) -> List[int]:
+    return list(db_session.execute(
+        select(BenchmarkRun.id)
+        .where(BenchmarkRun.start_time < cutoff)
+        .where(BenchmarkRun.downsampled_at.is_(None))
+        .order_by(BenchmarkRun.id)
+    ).scalars())
+
+
+def _delete_raw_results(db_session, run_ids: List[int]):
+    trade_ids = select(TradeResult.id).where(TradeResult.run_id.in_(run_ids))
+
+    db_session.execute(
+        delete(ProviderResult).where(ProviderResult.trade_id.in_(trade_ids))
+    )
+    db_session.execute(
+        delete(TradeResult).where(TradeResult.run_id.in_(run_ids))
+    )
+
+
+def _drop_expired_partitions(db_session) -> List[str]:
+    """
+    Drop partitions whose runs have all been downsampled, except the one
+    new runs still go into
+    """
+
+    latest_run_id = db_session.execute(select(func.max(BenchmarkRun.id))).scalar() or 0
+
+    dropped = []
+    for name, first_run_id, last_run_id in list_partitions(db_session.connection()):
+        if last_run_id >= latest_run_id:
+            continue
+
+        remaining = db_session.execute(
+            select(func.count(BenchmarkRun.id))
+            .where(BenchmarkRun.id.between(first_run_id, last_run_id))
+            .where(BenchmarkRun.downsampled_at.is_(None))
+        ).scalar()
+
+        if not remaining:
+            db_session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+
+    return dropped
+
+
+def run_retention(retention_days: Optional[int] = None, batch_size: int = 50) -> dict:
+    """
+    Roll up and drop the raw results of runs older than the retention window
+    (BENCHMARK_RETENTION_DAYS)
+
+    Runs keep their row with `downsampled_at` set, and their per provider
+    aggregates stay in `provider_rollups`. With partitioned tables, expired
+    partitions are dropped whole, otherwise raw rows are deleted.
+
+    Args:
+        retention_days: Keep raw results for this many days (default: settings)
+        batch_size: Runs rolled up per transaction
+
+    Returns:
+        dict: Counts of what was rolled up and removed
+    """
+
+    retention_days = settings.retention_days if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    print(f"🧹 Downsampling benchmark runs started before {cutoff:%Y-%m-%d %H:%M}")
+
+    db_session = next(get_db())
+    summary = {"runs": 0, "rollups": 0, "dropped_partitions": []}
+
+    try:
+        partitioned = partitioning_enabled(db_session.get_bind())
+        run_ids = _expired_run_ids(db_session, cutoff)
+
+        for start in range(0, len(run_ids), batch_size):
+            batch = run_ids[start:start + batch_size]
+            rollups = db_session.execute(
+                insert(ProviderRollup).from_select(ROLLUP_COLUMNS, rollup_query(batch))
+            ).rowcount
+
+            if not partitioned:
+                _delete_raw_results(db_session, batch)
+            db_session.execute(delete(RouteLeg).where(RouteLeg.run_id.in_(batch)))
+
+            db_session.execute(
+                update(BenchmarkRun)
+                .where(BenchmarkRun.id.in_(batch))
+                .values(downsampled_at=datetime.utcnow())
+            )
+            db_session.commit()
+
+            summary["runs"] += len(batch)
+            summary["rollups"] += max(rollups, 0)
+            print(f"✅ Rolled up runs #{batch[0]}-#{batch[-1]} ({rollups} rollup rows)")
+
+        if partitioned:
+            summary["dropped_partitions"] = _drop_expired_partitions(db_session)
+            db_session.commit()
+            for name in summary["dropped_partitions"]:
+                print(f"🗑️  Dropped partition {name}")
+
+        print(
+            f"🧹 Retention done: {summary['runs']} runs downsampled, "
+            f"{summary['rollups']} rollup rows, {len(summary['dropped_partitions'])} partitions dropped"
+        )
+        return summary
+
+    except Exception as e:
+        print(f"💥 Retention failed: {e}")
+        db_session.rollback()
+        raise
+
+    finally:
+        db_session.close()
@@ -0,0 +1,94 @@
+from typing import Iterable, List, Optional
+
+
+# keys aggregators use for the venue of a route leg, and for its share of the hop
+DEX_KEYS = ("dex", "dexName", "exchange", "protocol", "liquidityModule", "module", "routerName", "name")
+SHARE_KEYS = ("percentage", "percent", "share", "proportion", "portion", "split")
+
+
+def _dex(leg: dict) -> Optional[str]:
+    for key in DEX_KEYS:
+        value = leg.get(key)
+        if isinstance(value, str) and value:
+            return value
+        # eg: {"protocol": {"name": "uniswap_v3"}}
+        if isinstance(value, dict) and isinstance(value.get("name"), str):
+            return value["name"]
+    return None
+
+
+def _share(leg: dict) -> Optional[float]:
+    for key in SHARE_KEYS:
+        value = leg.get(key)
+        if value is None:
+            continue
+        try:
+            share = float(value)
+        except (TypeError, ValueError):
+            continue
+        # percentages (60) and fractions (0.6) are both common
+        return share / 100 if share > 1 else share
+    return None
+
+
+def summarize_route(hops: Iterable[Iterable[dict]]) -> Optional[dict]:
+    """
+    Compact, provider independent route summary
+
+    Args:
+        hops: The route's hops in order, each the list of legs (one per venue)
+              the hop's amount is split over
+
+    Returns:
+        {"hop_count", "dexes", "legs": [{"hop", "dex", "share"}]}, or None
+        when no venue could be found
+    """
+
+    legs = []
+    hop_count = 0
+
+    for hop in hops:
+        hop_legs = [
+            {"hop": hop_count, "dex": _dex(leg), "share": _share(leg)}
+            for leg in hop if isinstance(leg, dict)
+        ]
+        hop_legs = [leg for leg in hop_legs if leg["dex"]]
+        if not hop_legs:
+            continue
+
+        # a lone venue takes the whole hop
+        if len(hop_legs) == 1 and hop_legs[0]["share"] is None:
+            hop_legs[0]["share"] = 1.0
+
+        hop_count += 1
+        legs.extend(hop_legs)
+
+    if not legs:
+        return None
+
+    return {
+        "hop_count": hop_count,
+        "dexes": sorted({leg["dex"] for leg in legs}),
+        "legs": legs,
+    }
+
+
+def summarize_venues(venues: Iterable[dict]) -> Optional[dict]:
+    """
+    Route summary when only the venues a route used are known, not how it
+    hops or splits between them: hop_count is None and there are no legs
+
+    Returns:
+        {"hop_count": None, "dexes", "legs": []}, or None when no venue could
+        be found
+    """
+
+    dexes = sorted({dex for dex in (_dex(venue) for venue in venues if isinstance(venue, dict)) if dex})
+    if not dexes:
+        return None
+
+    return {"hop_count": None, "dexes": dexes, "legs": []}
+
+
+def as_list(value) -> List:
+    return value if isinstance(value, list) else []
@@ -1,15 +1,28 @@
 import concurrent.futures
-import requests
+import contextlib
+import itertools
+import threading
 import time
 from datetime import datetime
 
+from sqlalchemy import func, insert, select
+
+from ..core.codec import decode_response
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.events import run_progress, track_run, untrack_run
+from ..core.executor import DispatchGroup, QuoteExecutor, QuoteJob
+from ..core import metrics
+from ..core.http import get_http_session
+from ..core.metrics import DB_LATENCY, DISPATCH_SKEW, PRICE_LOOKUP_LATENCY
+from ..core.partitioning import reserve_run_id
+from ..core.pairs import iter_pair_matrix, sample_chain_pairs
+from ..core.plan import get_trade_plan, save_plan
+from ..core.profiling import phase, profile_run
+from ..core.sizing import AdaptiveSizer
 from ..data.chain import CHAIN_CONFIG
-from ..data.amount import TRADE_AMOUNTS
-from ..models import BenchmarkRun, TradeResult, ProviderResult
-
-from ..providers.gluex import GluexProvider
-from ..providers.liqdswap import LiqdswapProvider
+from ..models import BenchmarkRun, TradeResult, ProviderResult, RouteLeg, PriceSnapshot
+from ..providers.registry import provider_registry
 
 # token-decimals mapping for quick lookup
 TOKEN_DECIMALS = {}
@@ -24,6 +37,13 @@ print(
     f"🔧 DEBUG: Built TOKEN_DECIMALS mapping with {len(TOKEN_DECIMALS)} tokens"
 )
 
+# (chain_id, token address) -> (price in USD, monotonic fetch time)
+_PRICE_CACHE = {}
+_PRICE_CACHE_LOCK = threading.Lock()
+
+# rows per executemany when storing provider results and route legs
+INSERT_CHUNK_SIZE = 1000
+
 
 def get_token_symbol_by_address(chain_id, token_address):
     """Get token symbol by address from chain config"""
@@ -57,6 +77,33 @@ def get_token_symbol_by_address(chain_id, token_address):
 
 
 def get_token_price_in_usd(chain_id, token_address):
+    """
+    Get token price in USD, served from the in-process price cache while fresh
+    (BENCHMARK_PRICE_CACHE_TTL) so scheduled runs don't re-price every token
+    """
+
+    cache_key = (str(chain_id), token_address.lower())
+
+    if settings.price_cache_ttl > 0:
+        with _PRICE_CACHE_LOCK:
+            cached = _PRICE_CACHE.get(cache_key)
+
+        if cached and time.monotonic() - cached[1] < settings.price_cache_ttl:
+            print(f"💾 DEBUG: Using cached price for {token_address}: {cached[0]}")
+            PRICE_LOOKUP_LATENCY.labels(source="cache").observe(0.0)
+            return cached[0], 0.0
+
+    with PRICE_LOOKUP_LATENCY.labels(source="network").time():
+        price, elapsed_time = fetch_token_price_in_usd(chain_id, token_address)
+
+    if price and settings.price_cache_ttl > 0:
+        with _PRICE_CACHE_LOCK:
+            _PRICE_CACHE[cache_key] = (price, time.monotonic())
+
+    return price, elapsed_time
+
+
+def fetch_token_price_in_usd(chain_id, token_address):
     """Get token price in USD using the chain's normalization token (USD equivalent) via exchange rates API"""
 
     chain_config = CHAIN_CONFIG.get(str(chain_id))
@@ -103,7 +150,7 @@ def get_token_price_in_usd(chain_id, token_address):
         print(
             f"📡 DEBUG: Making POST request to exchange rates API with payload: {payload}"
         )
-        response = requests.post(url, json=payload, timeout=10)
+        response = get_http_session().post(url, json=payload, timeout=10)
         elapsed_time = time.time() - start_time
 
         print(
@@ -111,7 +158,7 @@ def get_token_price_in_usd(chain_id, token_address):
         )
 
         if response.status_code == 200:
-            data = response.json()
+            data, _, _ = decode_response(response, "exchange_rates")
             print(f"📄 DEBUG: Response data: {data}")
 
             if isinstance(data, list) and len(data) > 0 and "price" in data[0] and data[0]["price"] is not None:
@@ -202,45 +249,15 @@ def calculate_input_amount(usd_amount, token_price_in_usd, token_decimals):
 
 
 def generate_pairs_for_chain(chain_id):
-    """Generate trading pairs for a specific chain"""
+    """Trading pairs of a chain, from its compiled trade plan"""
 
-    print(f"🔗 DEBUG: Generating pairs for chain {chain_id}")
-    chain_config = CHAIN_CONFIG.get(chain_id)
+    plan = get_trade_plan(chain_id)
 
-    if not chain_config:
+    if not plan:
         print(f"❌ DEBUG: No config for chain {chain_id}")
         return []
 
-    normalization_token = chain_config["normalization_token"]
-    trading_tokens = chain_config["trading_tokens"]
-
-    print(f"🎯 DEBUG: Normalization token: {normalization_token['symbol']}")
-    print(f"📊 DEBUG: Trading tokens: {[t['symbol'] for t in trading_tokens]}")
-
-    pairs = []
-
-    # create pairs: trading_token -> normalization_token
-    for token in trading_tokens:
-        pair_name = f"{token['symbol']}->{normalization_token['symbol']}"
-        pairs.append({
-            "name": pair_name,
-            "input_token_address": token["address"],
-            "output_token_address": normalization_token["address"]
-        })
-        print(f"➡️  DEBUG: Created pair: {pair_name}")
-
-    # create pairs: normalization_token -> trading_token
-    for token in trading_tokens:
-        pair_name = f"{normalization_token['symbol']}->{token['symbol']}"
-        pairs.append({
-            "name": pair_name,
-            "input_token_address": normalization_token["address"],
-            "output_token_address": token["address"]
-        })
-        print(f"⬅️  DEBUG: Created pair: {pair_name}")
-
-    print(f"✅ DEBUG: Generated {len(pairs)} pairs total")
-    return pairs
+    return [dict(pair) for pair in plan.pairs]
 
 
 def get_all_token_pairs(chain_id):
@@ -261,263 +278,555 @@ def get_all_token_pairs(chain_id):
         return []
 
 
-def run_benchmark_for_all_chains():
-    """Run benchmark for all chains in a single benchmark run"""
+def run_benchmark_for_all_chains(providers=None, disabled_providers=None, chains=None, pair_names=None, executor=None):
+    """
+    Run benchmark for all chains in a single benchmark run
+
+    Args:
+        providers: Provider keys to use (defaults to BENCHMARK_PROVIDERS, or all registered)
+        disabled_providers: Provider keys to skip (defaults to BENCHMARK_DISABLED_PROVIDERS)
+        chains: Only benchmark these chain IDs (default: all configured chains)
+        pair_names: Only benchmark these pairs (eg: ["HYPE->USDe"], default: all pairs)
+        executor: A long-lived QuoteExecutor to reuse (default: one for this run)
+    """
 
     print("🚀 Starting benchmark run...")
 
+    metrics_window = metrics.RunWindow()
     db_session = next(get_db())
+    progress = None
 
     try:
         # create ONE run for all chains
-        run = BenchmarkRun(start_time=datetime.utcnow())
+        # with partitioning the run's partitions are created before it is inserted
+        run = BenchmarkRun(
+            id=reserve_run_id(db_session.get_bind()),
+            start_time=datetime.utcnow(),
+            vantage_point=settings.vantage_point
+        )
 
         db_session.add(run)
         db_session.flush()  # get the ID without committing
 
         print(f"✅ Created benchmark run #{run.id}")
 
-        chains = list(CHAIN_CONFIG.keys())
-        total_chains = len(chains)
+        # live progress for /benchmarks/{run_id}/stream
+        progress = track_run(run.id)
 
-        for idx, chain_id in enumerate(chains, 1):
-            print(
-                f"\n📊 [{idx}/{total_chains}] Running benchmark for chain {chain_id}..."
-            )
+        with profile_run(run.id):
+            chains = [
+                chain_id for chain_id in CHAIN_CONFIG.keys()
+                if chains is None or chain_id in chains
+            ]
+            total_chains = len(chains)
 
-            try:
-                run_benchmark_single_chain(chain_id, run, db_session)
-                print(
-                    f"✅ [{idx}/{total_chains}] Completed benchmark for chain {chain_id}"
-                )
+            # one worker pool for the whole run, quotes from every chain share it
+            with contextlib.nullcontext(executor) if executor else QuoteExecutor() as executor:
+                pending_by_chain = {}
 
-            except Exception as e:
-                # Continue with other chains even if one fails
-                print(f"❌ [{idx}/{total_chains}] Error in chain {chain_id}: {e}")
+                for idx, chain_id in enumerate(chains, 1):
+                    print(
+                        f"\n📊 [{idx}/{total_chains}] Queueing benchmark for chain {chain_id}..."
+                    )
+                    progress.chain_started(chain_id)
+
+                    pairs = None
+                    if pair_names is not None:
+                        pairs = [
+                            pair for pair in iter_pair_matrix(chain_id)
+                            if pair["name"] in pair_names
+                        ]
+                        if not pairs:
+                            print(f"⏭️  No selected pairs on chain {chain_id}")
+                            continue
 
-        # update run end time and commit everything at once
-        run.end_time = datetime.utcnow()
-        db_session.commit()
+                    try:
+                        pending_by_chain[chain_id] = submit_chain_quotes(
+                            chain_id, run, db_session, executor, pairs=pairs,
+                            providers=providers, disabled_providers=disabled_providers,
+                            priority=idx
+                        )
+
+                    except Exception as e:
+                        # Continue with other chains even if one fails
+                        executor.cancel(
+                            lambda job: job.run_id == run.id and job.chain_id == chain_id
+                        )
+                        print(f"❌ [{idx}/{total_chains}] Error in chain {chain_id}: {e}")
+
+                for idx, chain_id in enumerate(chains, 1):
+                    if chain_id not in pending_by_chain:
+                        continue
+
+                    try:
+                        collect_chain_quotes(
+                            chain_id, pending_by_chain[chain_id], db_session
+                        )
+                        print(
+                            f"✅ [{idx}/{total_chains}] Completed benchmark for chain {chain_id}"
+                        )
+
+                    except Exception as e:
+                        # Continue with other chains even if one fails
+                        print(f"❌ [{idx}/{total_chains}] Error in chain {chain_id}: {e}")
+
+            # update run end time and commit everything at once
+            run.end_time = datetime.utcnow()
+            with phase(run.id, "all", "persisting"), DB_LATENCY.labels(operation="commit").time():
+                db_session.commit()
         print(f"\n🎉 Benchmark run #{run.id} completed!")
+        untrack_run(run.id)
+
+        metrics.print_run_summary(run.id, metrics_window)
 
         return run.id
 
     except Exception as e:
         print(f"💥 Critical error in benchmark run: {e}")
         db_session.rollback()
+        if progress:
+            untrack_run(progress.run_id, error=str(e))
         raise
     finally:
+        metrics_window.close()
         db_session.close()
 
 
-def run_benchmark_single_chain(chain_id: str, benchmark_run, db_session, pairs=None):
+def run_benchmark_single_chain(chain_id: str, benchmark_run, db_session, pairs=None, providers=None, disabled_providers=None, executor=None):
     """Run benchmark for a single chain using an existing benchmark run"""
 
-    print(f"🔗 DEBUG: Starting benchmark for chain {chain_id}")
+    if executor is None:
+        with QuoteExecutor() as executor:
+            return run_benchmark_single_chain(
+                chain_id, benchmark_run, db_session, pairs=pairs,
+                providers=providers, disabled_providers=disabled_providers,
+                executor=executor
+            )
 
-    # available providers
-    all_providers = [
-        GluexProvider(),
-        LiqdswapProvider()
-    ]
+    pending_trades = submit_chain_quotes(
+        chain_id, benchmark_run, db_session, executor, pairs=pairs,
+        providers=providers, disabled_providers=disabled_providers
+    )
+    collect_chain_quotes(chain_id, pending_trades, db_session)
+
+
+def _chain_rotation(db_session, chain_id: str, benchmark_run) -> int:
+    """
+    Number of earlier runs of the chain from this vantage point, so pair
+    sampling moves to the next window every run of the chain (run ids also
+    count other schedules' and ingested runs)
+    """
+
+    # one price snapshot set per chain per run, kept by the retention job
+    earlier_runs = (
+        select(func.count(func.distinct(PriceSnapshot.run_id)))
+        .join(BenchmarkRun, BenchmarkRun.id == PriceSnapshot.run_id)
+        .where(
+            PriceSnapshot.chain == chain_id,
+            PriceSnapshot.run_id != benchmark_run.id,
+            BenchmarkRun.vantage_point == benchmark_run.vantage_point,
+        )
+    )
+    return db_session.execute(earlier_runs).scalar_one()
 
-    # filter providers based on chain support
-    providers = [
-        provider for provider in all_providers if provider.supports_chain(chain_id)
-    ]
+
+def submit_chain_quotes(chain_id: str, benchmark_run, db_session, executor, pairs=None, providers=None, disabled_providers=None, priority=0):
+    """
+    Price every pair of a chain, create its trades and queue one quote job
+    per (trade, provider) on the executor
+
+    With BENCHMARK_SIZING=adaptive only part of the trade size grid is
+    quoted: sizes are queued in rounds and this waits for every round
+    except the last one.
+
+    Returns:
+        A list of pending trades to hand to `collect_chain_quotes`
+    """
+
+    print(f"🔗 DEBUG: Starting benchmark for chain {chain_id}")
+
+    # enabled providers supporting the chain (instances are shared across chains)
+    providers = provider_registry.providers_for_chain(
+        chain_id, enabled=providers, disabled=disabled_providers
+    )
 
     if not providers:
         print(f"⚠️  No providers support chain {chain_id}")
-        return
+        return []
 
     provider_names = [provider.name for provider in providers]
     print(f"🔗 Chain {chain_id}: Using providers: {', '.join(provider_names)}")
 
-    token_pairs = get_all_token_pairs(chain_id) if pairs is None else pairs
-
-    # batch objects to be inserted
-    trade_results_to_insert = []
-    provider_results_to_insert = []
-
-    for pair in token_pairs:
-        print(f"\nProcessing pair {pair['name']} on {chain_id}")
-
-        # get input token price in USD (via normalization token)
+    if settings.dispatch_mode == "synchronized" and len(providers) > executor.max_workers:
         print(
-            f"💰 DEBUG: Getting input token price for {pair['input_token_address']}"
+            f"⚠️  Synchronized dispatch needs a worker per provider ({len(providers)}), "
+            f"only {executor.max_workers} workers: chain {chain_id} quotes are queued as usual"
         )
 
-        input_token_price, input_time = get_token_price_in_usd(
-            chain_id, pair["input_token_address"]
+    with phase(benchmark_run.id, chain_id, "planning"):
+        plan = get_trade_plan(chain_id)
+        if not plan:
+            print(f"❌ DEBUG: No config for chain {chain_id}")
+            return []
+
+        if pairs is not None:
+            plan = plan.with_pairs(pairs)
+        elif settings.pair_source == "matrix":
+            # sample the full pair matrix within the quote budget, rotating every run
+            quotes_per_pair = len(plan.amounts) * len(providers)
+            max_pairs = settings.quote_budget // quotes_per_pair if settings.quote_budget > 0 else None
+            plan = plan.with_pairs(list(
+                sample_chain_pairs(
+                    chain_id, max_pairs, rotation=_chain_rotation(db_session, chain_id, benchmark_run)
+                )
+            ))
+
+        # price every token of the selected pairs once, then fill in all input amounts
+        token_indices = sorted(
+            set(plan.pair_input.tolist()) | set(plan.pair_output.tolist())
         )
+        prices = {}
+        price_snapshots = []
+        with phase(benchmark_run.id, chain_id, "pricing"):
+            for token_idx in token_indices:
+                token_address = plan.tokens[token_idx]
+                print(f"💰 DEBUG: Getting token price for {token_address}")
+
+                fetched_at = datetime.utcnow()
+                prices[token_address], latency = get_token_price_in_usd(chain_id, token_address)
+                if not prices[token_address]:
+                    print(f"Failed to get price for {token_address} in USD")
+
+                price_snapshots.append(PriceSnapshot(
+                    run_id=benchmark_run.id,
+                    chain=chain_id,
+                    token=token_address,
+                    symbol=plan.symbols[token_idx],
+                    price_usd=prices[token_address] or None,
+                    fetched_at=fetched_at,
+                    latency=latency
+                ))
+
+        # keep the prices for USD analytics, once per chain per run
+        with phase(benchmark_run.id, chain_id, "persisting"), DB_LATENCY.labels(operation="bulk_insert").time():
+            db_session.bulk_save_objects(price_snapshots)
+
+        plan = plan.priced(prices)
+        save_plan(plan, benchmark_run.id)
+
+    adaptive = settings.sizing == "adaptive"
+
+    pending_trades = []
+    # pair name -> {"sizer", "pair_idx", "round"} while adaptive sizing is in progress
+    sizing_pairs = {}
+
+    for pair_idx, pair in enumerate(plan.pairs):
+        print(f"\nProcessing pair {pair['name']} on {chain_id}")
 
-        if not input_token_price:
-            print(
-                f"Failed to get price for {pair['input_token_address']} in USD"
-            )
+        if not plan.pair_priced(pair_idx):
+            print(f"⏭️  Skipping pair {pair['name']}, missing token price")
             continue
 
-        # get output token price in USD (for calculating USD differences)
-        print(
-            f"💰 DEBUG: Getting output token price for {pair['output_token_address']}"
-        )
-        output_token_price, output_time = get_token_price_in_usd(
-            chain_id, pair["output_token_address"]
+        sizer = AdaptiveSizer() if adaptive else None
+        amount_indices = (
+            [plan.amount_index(amount) for amount in sizer.next_round()]
+            if adaptive else range(len(plan.amounts))
         )
-        if not output_token_price:
-            print(
-                f"Failed to get price for {pair['output_token_address']} in USD"
+
+        with phase(benchmark_run.id, chain_id, "planning"):
+            round_trades = queue_trades(
+                chain_id, plan, pair_idx, amount_indices, providers,
+                benchmark_run, db_session, executor, priority
             )
-            continue
+        pending_trades.extend(round_trades)
 
-        exchange_rates_time = input_time + output_time
+        if adaptive:
+            sizing_pairs[pair["name"]] = {
+                "sizer": sizer, "pair_idx": pair_idx, "round": round_trades
+            }
 
-        for amount in TRADE_AMOUNTS:
-            print(f"  Testing ${amount['usd']} trade...")
+    # adaptive sizing: wait for each round, then quote the sizes it points to
+    while sizing_pairs:
+        next_sizing_pairs = {}
 
-            # calculate proper input amount based on USD amount and token decimals
-            input_decimals = TOKEN_DECIMALS.get(
-                pair["input_token_address"].lower()
-            )
-            if input_decimals is None:
+        for pair_name, sizing in sizing_pairs.items():
+            for pending in sizing["round"]:
+                with phase(benchmark_run.id, chain_id, "quoting"):
+                    collect_trade_quotes(pending)
+                sizing["sizer"].record(pending["amount"], pending["valid_outputs"])
+
+            amounts = sizing["sizer"].next_round()
+
+            if not amounts:
                 print(
-                    f"❌ ERROR: Input token {pair['input_token_address']} not found in TOKEN_DECIMALS mapping"
+                    f"📐 {pair_name}: quoted {len(sizing['sizer'].outcomes)} sizes, skipped {sizing['sizer'].skipped}"
                 )
                 continue
-            token_amount = calculate_input_amount(
-                amount["usd"], input_token_price, input_decimals
-            )
-            if not token_amount:
-                continue
 
-            # get token symbols for the new database schema
-            input_token_symbol = get_token_symbol_by_address(
-                chain_id, pair["input_token_address"]
-            )
+            with phase(benchmark_run.id, chain_id, "planning"):
+                sizing["round"] = queue_trades(
+                    chain_id, plan, sizing["pair_idx"],
+                    [plan.amount_index(amount) for amount in amounts], providers,
+                    benchmark_run, db_session, executor, priority
+                )
+            pending_trades.extend(sizing["round"])
+            next_sizing_pairs[pair_name] = sizing
 
-            output_token_symbol = get_token_symbol_by_address(
-                chain_id, pair["output_token_address"]
-            )
+        sizing_pairs = next_sizing_pairs
 
-            print(
-                f"💾 DEBUG: Creating TradeResult with symbols: {input_token_symbol} -> {output_token_symbol}"
-            )
+    return pending_trades
 
-            # create trade result object but don't insert yet
-            trade_result = TradeResult(
-                run_id=benchmark_run.id,
-                chain=chain_id,
-                pair=pair["name"],
-                from_token=pair["input_token_address"],
-                to_token=pair["output_token_address"],
-                from_token_symbol=input_token_symbol,
-                to_token_symbol=output_token_symbol,
-                amount_usd=amount["usd"],
-                input_amount=str(
-                    int((int(token_amount) / (10 ** input_decimals))))
-            )
 
-            print(
-                f"📦 DEBUG: Created TradeResult: {trade_result.input_amount} {trade_result.from_token_symbol} -> {trade_result.to_token_symbol}"
-            )
+def queue_trades(chain_id: str, plan, pair_idx, amount_indices, providers, benchmark_run, db_session, executor, priority=0):
+    """
+    Create the trades of a pair of a priced trade plan for the given amount
+    buckets and queue their quotes
+
+    Returns:
+        A list of pending trades
+    """
+
+    pair = plan.pairs[pair_idx]
+    input_token = plan.pair_input[pair_idx]
+    output_token = plan.pair_output[pair_idx]
+    output_token_price = plan.token_price(output_token)
+
+    pending_trades = []
+    progress = run_progress(benchmark_run.id)
+
+    for amount_idx in amount_indices:
+        amount = plan.amounts[amount_idx]
+        print(f"  Queueing ${amount['usd']} trade...")
 
-            # add to session and flush to get the ID, but don't commit yet
-            db_session.add(trade_result)
+        token_amount = plan.token_amounts[pair_idx, amount_idx]
+        if not token_amount:
+            continue
+
+        # create trade result object but don't insert yet
+        trade_result = TradeResult(
+            run_id=benchmark_run.id,
+            chain=chain_id,
+            pair=pair["name"],
+            from_token=pair["input_token_address"],
+            to_token=pair["output_token_address"],
+            from_token_symbol=plan.symbols[input_token],
+            to_token_symbol=plan.symbols[output_token],
+            amount_usd=amount["usd"],
+            input_amount=plan.input_amounts[pair_idx, amount_idx]
+        )
+
+        print(
+            f"📦 DEBUG: Created TradeResult: {trade_result.input_amount} {trade_result.from_token_symbol} -> {trade_result.to_token_symbol}"
+        )
+
+        # add to session and flush to get the ID, but don't commit yet
+        db_session.add(trade_result)
+        with phase(benchmark_run.id, chain_id, "persisting"), DB_LATENCY.labels(operation="flush").time():
             db_session.flush()
 
-            # make concurrent requests to all providers
-            with concurrent.futures.ThreadPoolExecutor(max_workers=len(providers)) as executor:
-                futures = {
-                    executor.submit(p.get_quote, chain_id, pair["input_token_address"], pair["output_token_address"], token_amount): p
-                    for p in providers
-                }
+        # the trade's requests, released together with BENCHMARK_DISPATCH_MODE=synchronized
+        dispatch = DispatchGroup(
+            len(providers),
+            synchronized=settings.dispatch_mode == "synchronized" and len(providers) <= executor.max_workers
+        )
 
-                results = {}
-                for future in concurrent.futures.as_completed(futures):
-                    provider = futures[future]
-                    try:
-                        result = future.result()
-                        results[provider.name] = result
-
-                        # Create provider result object but don't insert yet
-                        provider_result = ProviderResult(
-                            trade_id=trade_result.id,
-                            provider=provider.name,
-                            output_amount=result.get("output_amount"),
-                            elapsed_time=result.get("elapsed_time"),
-                            status_code=result.get("status_code"),
-                            error=result.get("error"),
-                            raw_response=result.get("raw_response")
-                        )
+        # queue the quotes, workers start on them while we keep planning
+        futures = {
+            executor.submit(QuoteJob(
+                chain_id=chain_id,
+                pair=pair,
+                amount=amount,
+                provider=provider,
+                token_amount=token_amount,
+                priority=priority,
+                run_id=benchmark_run.id,
+                dispatch=dispatch
+            )): provider
+            for provider in providers
+        }
 
-                        provider_results_to_insert.append(provider_result)
+        if progress:
+            progress.queued(trades=1, quotes=len(futures))
+            for future, provider in futures.items():
+                progress.track(future, provider.name)
+
+        pending_trades.append({
+            "pair": pair,
+            "amount": amount,
+            "trade_result": trade_result,
+            "output_token_price": output_token_price,
+            "futures": futures,
+            "dispatch": dispatch,
+        })
 
-                    except Exception as e:
-                        print(
-                            f"Error processing result for {provider.name}: {e}"
-                        )
+    return pending_trades
+
+
+def collect_trade_quotes(pending):
+    """
+    Wait for the quotes of a pending trade and work out its winner
 
-            # calculate winner and output differences using provider formatted amounts
+    Fills in `quotes` (the providers' `QuoteResult`s, not yet inserted) and
+    `valid_outputs` on the pending trade, collecting the same trade twice is
+    a no-op
+    """
+
+    if "quotes" in pending:
+        return
+
+    pair = pending["pair"]
+    amount = pending["amount"]
+    futures = pending["futures"]
+    dispatch = pending["dispatch"]
+    dispatch_mode = "synchronized" if dispatch.synchronized else "queued"
+
+    quotes = []
+    for future in concurrent.futures.as_completed(futures):
+        provider = futures[future]
+        try:
+            quotes.append(future.result())
+        except Exception as e:
             print(
-                f"\n🏆 FINAL COMPARISON for {pair['name']} (${amount['usd']} trade):"
+                f"Error processing result for {provider.name}: {e}"
             )
+            continue
 
-            print(f"📊 All provider results:")
-            for provider_name, result in results.items():
-                status = result.get("status_code")
-                output = result.get("output_amount")
-                error = result.get("error")
-                print(
-                    f"  {provider_name}: Status={status}, Output={output}, Error={error}"
-                )
+        dispatch_skew = dispatch.skew(provider.name)
+        if dispatch_skew is not None:
+            DISPATCH_SKEW.labels(mode=dispatch_mode).observe(dispatch_skew)
 
-            valid_outputs = {}
-            for provider_name, result in results.items():
-                if result.get("output_amount") and result.get("status_code") == 200:
-                    # use the provider formatted amount directly
-                    output_amount = result.get("output_amount")
-                    if output_amount:
-                        try:
-                            float_amount = float(output_amount)
-                            valid_outputs[provider_name] = float_amount
-                            print(
-                                f"✅ {provider_name}: Valid output = {float_amount}")
-                        except (ValueError, TypeError) as e:
-                            print(
-                                f"❌ {provider_name}: Could not convert output amount {output_amount} to float: {e}")
-
-            print(f"🎯 Valid outputs for comparison: {valid_outputs}")
-
-            # determine winner and calculate differences
-            winner = "All Error"
-            output_diff = None
-            output_diff_usd = None
-
-            if len(valid_outputs) > 1:
-                # find winner (highest output)
-                winner = max(valid_outputs.items(), key=lambda x: x[1])[0]
-
-                # calculate difference between best and second best
-                sorted_outputs = sorted(valid_outputs.values(), reverse=True)
-                output_diff = sorted_outputs[0] - sorted_outputs[1]
-                output_diff_usd = output_diff * output_token_price
-
-                print(f"🥇 Winner: {winner} with {sorted_outputs[0]} output")
+    # calculate winner and output differences using provider formatted amounts
+    print(
+        f"\n🏆 FINAL COMPARISON for {pair['name']} (${amount['usd']} trade):"
+    )
+
+    print(f"📊 All provider results:")
+    for quote in quotes:
+        print(
+            f"  {quote.provider}: Status={quote.status_code}, Output={quote.output_amount}, Error={quote.error}"
+        )
+
+    valid_outputs = {}
+    for quote in quotes:
+        if quote.successful:
+            # use the provider formatted amount directly
+            try:
+                float_amount = float(quote.output_amount)
+                valid_outputs[quote.provider] = float_amount
                 print(
-                    f"📈 Output difference: {output_diff} ({output_diff_usd} USD)"
-                )
+                    f"✅ {quote.provider}: Valid output = {float_amount}")
+            except (ValueError, TypeError) as e:
+                print(
+                    f"❌ {quote.provider}: Could not convert output amount {quote.output_amount} to float: {e}")
 
-            elif len(valid_outputs) == 1:
-                winner = list(valid_outputs.keys())[0]
-                print(f"🥇 Single winner: {winner}")
+    print(f"🎯 Valid outputs for comparison: {valid_outputs}")
 
-            # store additional calculated data
-            print(
-                f"🏁 Final result - Winner: {winner}, Output diff: {output_diff}, USD diff: {output_diff_usd}"
-            )
+    # determine winner and calculate differences
+    winner = "All Error"
+    output_diff = None
+    output_diff_usd = None
+
+    if len(valid_outputs) > 1:
+        # find winner (highest output)
+        winner = max(valid_outputs.items(), key=lambda x: x[1])[0]
+
+        # calculate difference between best and second best
+        sorted_outputs = sorted(valid_outputs.values(), reverse=True)
+        output_diff = sorted_outputs[0] - sorted_outputs[1]
+        output_diff_usd = output_diff * pending["output_token_price"]
 
-    # bulk insert all provider results at once
-    if provider_results_to_insert:
-        db_session.bulk_save_objects(provider_results_to_insert)
+        print(f"🥇 Winner: {winner} with {sorted_outputs[0]} output")
         print(
-            f"📦 Bulk inserted {len(provider_results_to_insert)} provider results for chain {chain_id}")
+            f"📈 Output difference: {output_diff} ({output_diff_usd} USD)"
+        )
+
+    elif len(valid_outputs) == 1:
+        winner = list(valid_outputs.keys())[0]
+        print(f"🥇 Single winner: {winner}")
+
+    # store additional calculated data
+    print(
+        f"🏁 Final result - Winner: {winner}, Output diff: {output_diff}, USD diff: {output_diff_usd}"
+    )
+
+    pending["quotes"] = quotes
+    pending["valid_outputs"] = valid_outputs
+
+    progress = run_progress(pending["trade_result"].run_id)
+    if progress:
+        progress.trade_done()
+
+
+def collect_chain_quotes(chain_id: str, pending_trades, db_session):
+    """Wait for the queued quotes of a chain and store the provider results"""
+
+    if not pending_trades:
+        return
+    run_id = pending_trades[0]["trade_result"].run_id
+
+    for pending in pending_trades:
+        with phase(run_id, chain_id, "quoting"):
+            collect_trade_quotes(pending)
+
+    # quote records go straight into Core inserts, a chunk of rows at a time
+    with phase(run_id, chain_id, "persisting"), DB_LATENCY.labels(operation="bulk_insert").time():
+        inserted = _insert_rows(db_session, ProviderResult.__table__, _provider_result_rows(pending_trades))
+    if inserted:
+        print(
+            f"📦 Bulk inserted {inserted} provider results for chain {chain_id}")
+
+    with phase(run_id, chain_id, "persisting"), DB_LATENCY.labels(operation="bulk_insert").time():
+        _insert_rows(db_session, RouteLeg.__table__, _route_leg_rows(pending_trades))
+
+
+def _provider_result_rows(pending_trades):
+    """provider_results rows of the collected quotes"""
+
+    for pending in pending_trades:
+        trade_result = pending["trade_result"]
+        dispatch = pending["dispatch"]
+
+        for quote in pending["quotes"]:
+            route = quote.route
+            yield {
+                "trade_id": trade_result.id,
+                "run_id": trade_result.run_id,
+                "provider": quote.provider,
+                "output_amount": quote.output_amount,
+                "elapsed_time": quote.elapsed_time,
+                "status_code": quote.status_code,
+                "error": quote.error,
+                "raw_response": quote.raw_response,
+                "dispatch_skew": dispatch.skew(quote.provider),
+                "hop_count": route["hop_count"] if route else None,
+                "dex_count": len(route["dexes"]) if route else None,
+            }
+
+
+def _route_leg_rows(pending_trades):
+    """route_legs rows of the collected quotes' routes"""
+
+    for pending in pending_trades:
+        trade_result = pending["trade_result"]
+
+        for quote in pending["quotes"]:
+            for leg in (quote.route or {}).get("legs", []):
+                yield {
+                    "run_id": trade_result.run_id,
+                    "trade_id": trade_result.id,
+                    "provider": quote.provider,
+                    "hop": leg["hop"],
+                    "dex": leg["dex"],
+                    "share": leg["share"],
+                }
+
+
+def _insert_rows(db_session, table, rows, chunk_size: int = INSERT_CHUNK_SIZE) -> int:
+    """Executemany inserts of `rows` (an iterable of dicts), `chunk_size` rows at a time"""
+
+    inserted = 0
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        db_session.execute(insert(table), chunk)
+        inserted += len(chunk)
+    return inserted
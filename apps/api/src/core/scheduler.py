@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from .config import settings
+from .executor import QuoteExecutor
+
+
+# benchmark everything once an hour when no schedules are configured
+DEFAULT_SCHEDULES = [
+    {"name": "all", "interval": 3600},
+]
+
+
+# keys a schedule config can have
+SCHEDULE_KEYS = ("name", "interval", "chains", "pairs", "providers")
+
+
+@dataclass
+class Schedule:
+    """A benchmark that repeats every `interval` seconds"""
+
+    name: str
+    interval: float
+    chains: Optional[List[str]] = None
+    pairs: Optional[List[str]] = None
+    providers: Optional[List[str]] = None
+
+    next_run: float = 0.0
+    running: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "Schedule":
+        """
+        Raises:
+            ValueError: For unknown keys, a missing name, a missing or
+                non-positive interval, or selections that aren't lists of strings
+        """
+
+        if not isinstance(config, dict):
+            raise ValueError(f"A schedule is an object, got {config!r}")
+
+        unknown = set(config) - set(SCHEDULE_KEYS)
+        if unknown:
+            raise ValueError(
+                f"Unknown schedule keys: {', '.join(sorted(unknown))} (expected {', '.join(SCHEDULE_KEYS)})"
+            )
+
+        name = config.get("name")
+        if not name or not isinstance(name, str):
+            raise ValueError(f"Schedule {config!r} needs a name")
+
+        try:
+            interval = float(config["interval"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Schedule '{name}' needs an interval in seconds")
+        # also rejects nan
+        if not interval > 0:
+            raise ValueError(f"Schedule '{name}' interval must be positive, got {config['interval']!r}")
+
+        for key in ("chains", "pairs", "providers"):
+            value = config.get(key)
+            if value is not None and not (isinstance(value, list) and all(isinstance(item, str) for item in value)):
+                raise ValueError(f"Schedule '{name}' {key} must be a list of strings")
+
+        return cls(
+            name=name,
+            interval=interval,
+            chains=config.get("chains"),
+            pairs=config.get("pairs"),
+            providers=config.get("providers"),
+        )
+
+
+def load_schedules() -> List[Schedule]:
+    """
+    Load schedules from BENCHMARK_SCHEDULES_FILE or BENCHMARK_SCHEDULES, eg:
+
+        [
+            {"name": "hot", "interval": 300, "chains": ["999"], "pairs": ["HYPE->USDe", "USDe->HYPE"]},
+            {"name": "long-tail", "interval": 3600}
+        ]
+    """
+
+    configs = settings.schedules
+
+    if settings.schedules_file:
+        with open(settings.schedules_file) as file:
+            configs = json.load(file)
+
+    return [Schedule.from_dict(config) for config in (configs or DEFAULT_SCHEDULES)]
+
+
+class BenchmarkScheduler:
+    """
+    Long-running in-process scheduler for benchmark runs
+
+    Every schedule runs on its own thread when due. A schedule whose previous
+    run is still going is skipped until its next interval. All runs share one
+    quote executor, and the process keeps its HTTP connection pool, DB pool and
+    price cache warm between runs.
+    """
+
+    def __init__(self, schedules: Optional[List[Schedule]] = None, run_benchmark: Optional[Callable] = None):
+        if run_benchmark is None:
+            from .runner import run_benchmark_for_all_chains
+            run_benchmark = run_benchmark_for_all_chains
+
+        self.schedules = schedules if schedules is not None else load_schedules()
+        self.run_benchmark = run_benchmark
+
+        if not self.schedules:
+            raise ValueError("at least one schedule is required")
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._executor = QuoteExecutor()
+
+    def _run(self, schedule: Schedule):
+        try:
+            print(f"\n⏰ Starting scheduled benchmark '{schedule.name}'")
+            run_id = self.run_benchmark(
+                providers=schedule.providers,
+                chains=schedule.chains,
+                pair_names=schedule.pairs,
+                executor=self._executor
+            )
+            print(f"⏰ Scheduled benchmark '{schedule.name}' finished: run #{run_id}")
+
+        except Exception as e:
+            print(f"💥 Scheduled benchmark '{schedule.name}' failed: {e}")
+
+        finally:
+            schedule.running.release()
+
+    def tick(self, now: Optional[float] = None):
+        """Start every schedule that is due, skipping ones still running"""
+
+        now = time.monotonic() if now is None else now
+
+        for schedule in self.schedules:
+            if now < schedule.next_run:
+                continue
+
+            schedule.next_run = now + schedule.interval
+
+            if not schedule.running.acquire(blocking=False):
+                print(
+                    f"⏭️  Skipping scheduled benchmark '{schedule.name}', previous run still going"
+                )
+                continue
+
+            thread = threading.Thread(
+                target=self._run,
+                args=(schedule,),
+                name=f"schedule-{schedule.name}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+    def run_forever(self):
+        """Run schedules until `stop` is called"""
+
+        names = ", ".join(
+            f"{schedule.name} (every {schedule.interval:g}s)" for schedule in self.schedules
+        )
+        print(f"⏰ Benchmark scheduler started: {names}")
+
+        try:
+            while not self._stop.is_set():
+                self.tick()
+
+                next_run = min(schedule.next_run for schedule in self.schedules)
+                self._stop.wait(max(0.0, next_run - time.monotonic()))
+
+        finally:
+            print("⏰ Benchmark scheduler stopping, waiting for running benchmarks...")
+            for thread in self._threads:
+                thread.join()
+            self._executor.shutdown()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,124 @@
+import math
+from typing import Dict, List, Optional
+
+from .config import settings
+from ..data.amount import TRADE_AMOUNTS
+
+
+class AdaptiveSizer:
+    """
+    Picks which trade sizes of the grid to quote for a single pair
+
+    Quoting happens in rounds. The first round takes a few log-spaced sizes
+    across the grid, every later round bisects the gaps between quoted sizes
+    where something interesting happens: the winner changes, providers start
+    failing, or the winning margin hasn't converged yet. Sizes above the point
+    where every provider fails are never quoted.
+    """
+
+    def __init__(self, amounts: Optional[List[dict]] = None, initial_points: Optional[int] = None, convergence: Optional[float] = None):
+        self.amounts = sorted(amounts or TRADE_AMOUNTS, key=lambda amount: amount["usd"])
+        self.initial_points = initial_points or settings.adaptive_initial_points
+        self.convergence = settings.adaptive_convergence if convergence is None else convergence
+
+        # grid index -> {"winner": provider or None, "margin": relative gap to 2nd best or None}
+        self.outcomes: Dict[int, dict] = {}
+        self._started = False
+
+    def _initial_indices(self) -> List[int]:
+        count = len(self.amounts)
+        points = min(self.initial_points, count)
+
+        if points >= count:
+            return list(range(count))
+
+        low = math.log(self.amounts[0]["usd"])
+        high = math.log(self.amounts[-1]["usd"])
+
+        indices = set()
+        for step in range(points):
+            target = low + (high - low) * step / max(points - 1, 1)
+            nearest = min(
+                range(count),
+                key=lambda idx: abs(math.log(self.amounts[idx]["usd"]) - target)
+            )
+            indices.add(nearest)
+
+        return sorted(indices)
+
+    def _dead_from(self) -> Optional[int]:
+        """Smallest quoted index from which every quoted size failed"""
+
+        dead_from = None
+        for idx in sorted(self.outcomes, reverse=True):
+            if self.outcomes[idx]["winner"] is not None:
+                break
+            dead_from = idx
+
+        return dead_from
+
+    def _needs_refining(self, low: int, high: int) -> bool:
+        low_outcome = self.outcomes[low]
+        high_outcome = self.outcomes[high]
+
+        # winner flips or providers start failing somewhere in between
+        if low_outcome["winner"] != high_outcome["winner"]:
+            return True
+
+        # same winner, compare how far ahead it is at both ends
+        if low_outcome["margin"] is None or high_outcome["margin"] is None:
+            return False
+
+        return abs(low_outcome["margin"] - high_outcome["margin"]) > self.convergence
+
+    def next_round(self) -> List[dict]:
+        """
+        Returns:
+            The trade amounts to quote next, empty once the pair is done
+        """
+
+        if not self._started:
+            self._started = True
+            return [self.amounts[idx] for idx in self._initial_indices()]
+
+        dead_from = self._dead_from()
+        quoted = sorted(
+            idx for idx in self.outcomes if dead_from is None or idx <= dead_from
+        )
+
+        indices = []
+        for low, high in zip(quoted, quoted[1:]):
+            if high - low > 1 and self._needs_refining(low, high):
+                indices.append((low + high) // 2)
+
+        return [self.amounts[idx] for idx in indices]
+
+    def record(self, amount: dict, valid_outputs: Dict[str, float]):
+        """
+        Record the outcome of a quoted size
+
+        Args:
+            amount (dict): The trade amount that was quoted
+            valid_outputs (dict): Provider name -> output amount of the successful quotes
+        """
+
+        idx = next(
+            idx for idx, candidate in enumerate(self.amounts)
+            if candidate["usd"] == amount["usd"]
+        )
+
+        winner = None
+        margin = None
+
+        if valid_outputs:
+            winner = max(valid_outputs.items(), key=lambda x: x[1])[0]
+
+            sorted_outputs = sorted(valid_outputs.values(), reverse=True)
+            if len(sorted_outputs) > 1 and sorted_outputs[0] > 0:
+                margin = (sorted_outputs[0] - sorted_outputs[1]) / sorted_outputs[0]
+
+        self.outcomes[idx] = {"winner": winner, "margin": margin}
+
+    @property
+    def skipped(self) -> int:
+        return len(self.amounts) - len(self.outcomes)
@@ -0,0 +1,317 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, null, select
+
+from .database import fetch_columns
+from ..models import PriceSnapshot, ProviderResult, TradeResult
+
+
+TRADE_COLUMNS = (
+    "id", "run_id", "chain", "pair", "from_token", "to_token",
+    "from_token_symbol", "to_token_symbol", "amount_usd", "input_amount",
+)
+RESULT_COLUMNS = ("provider", "output_amount", "elapsed_time", "status_code", "error")
+
+
+def _categorical(values) -> Tuple[List[str], np.ndarray]:
+    """Categories and the integer code of every value"""
+
+    if not len(values):
+        return [], np.zeros(0, dtype=np.int64)
+
+    categories, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return categories.tolist(), codes.astype(np.int64)
+
+
+def _to_float(values) -> np.ndarray:
+    def parse(value):
+        try:
+            return float(value) if value not in (None, "") else np.nan
+        except (TypeError, ValueError):
+            return np.nan
+
+    return np.fromiter((parse(value) for value in values), dtype=np.float64, count=len(values))
+
+
+class RunSnapshot:
+    """
+    Columnar, in-memory copy of the trades and provider results of one or more
+    runs, loaded with a single query
+
+    Trades are rows of the per trade arrays (`trade_*`), provider results rows
+    of the per result arrays, sorted by trade, with `trade` pointing at their
+    trade's row. Chains, pairs and providers are categorical codes into
+    `chains`, `pairs` and `providers`. Winners, diffs and every aggregate are
+    computed with vectorized group-bys over these arrays instead of looping
+    over ORM objects.
+    """
+
+    def __init__(self, columns: Sequence[Sequence]):
+        # trade columns, the output token's price, then the result id and columns
+        trade_columns = dict(zip(TRADE_COLUMNS, columns[:len(TRADE_COLUMNS)]))
+        output_prices = columns[len(TRADE_COLUMNS)]
+        result_ids = columns[len(TRADE_COLUMNS) + 1]
+        result_columns = dict(zip(RESULT_COLUMNS, columns[len(TRADE_COLUMNS) + 2:]))
+
+        # rows are ordered by trade, so the first row of each trade holds its columns
+        row_trade_ids = np.asarray(trade_columns["id"], dtype=np.int64)
+        self.trade_id, first_rows = np.unique(row_trade_ids, return_index=True)
+
+        def per_trade(name, dtype=object):
+            return np.asarray(trade_columns[name], dtype=dtype)[first_rows]
+
+        self.trade_run_id = per_trade("run_id", np.int64)
+        self.trade_amount_usd = per_trade("amount_usd", np.float64)
+        self.trade_from_token = per_trade("from_token")
+        self.trade_to_token = per_trade("to_token")
+        self.trade_from_symbol = per_trade("from_token_symbol")
+        self.trade_to_symbol = per_trade("to_token_symbol")
+        self.trade_input_amount = per_trade("input_amount")
+        # USD price of the output token when the run was priced (nan when unknown)
+        self.trade_output_price = _to_float(np.asarray(output_prices, dtype=object)[first_rows])
+        self.chains, self.trade_chain = _categorical(per_trade("chain"))
+        self.pairs, self.trade_pair = _categorical(per_trade("pair"))
+
+        # trades without any provider result only show up in the trade arrays
+        has_result = np.fromiter((result_id is not None for result_id in result_ids), dtype=bool, count=len(result_ids))
+
+        def per_result(name):
+            return np.asarray(result_columns[name], dtype=object)[has_result]
+
+        self.trade = np.searchsorted(self.trade_id, row_trade_ids[has_result])
+        self.providers, self.provider = _categorical(per_result("provider"))
+        self.output_raw = per_result("output_amount")
+        self.error = per_result("error")
+        self.latency = _to_float(per_result("elapsed_time"))
+        self.status = np.fromiter(
+            (-1 if status is None else status for status in per_result("status_code")),
+            dtype=np.int64, count=int(has_result.sum())
+        )
+
+        self.output = _to_float(self.output_raw)
+        self.success = (self.status == 200) & ~np.isnan(self.output)
+
+        # result rows of trade i are bounds[i]:bounds[i + 1]
+        self._bounds = np.searchsorted(self.trade, np.arange(len(self.trade_id) + 1))
+        self._outcomes = None
+
+    @classmethod
+    def load(cls, db_session, run_ids: Iterable[int], **filters) -> "RunSnapshot":
+        """
+        Load the trades of some runs with their provider results, see `query`
+        for the filters. Async routes fetch `query`'s columns with
+        `fetch_columns_async` and build the snapshot in the threadpool.
+
+        Args:
+            db_session: Sync session
+            run_ids: Runs to load
+        """
+
+        return cls(fetch_columns(db_session, cls.query(run_ids, **filters)))
+
+    @staticmethod
+    def query(run_ids: Iterable[int], chain: Optional[str] = None, pair: Optional[str] = None,
+              offset: Optional[int] = None, limit: Optional[int] = None, priced: bool = True):
+        """
+        The single select behind a snapshot: the trades of some runs
+        (optionally only a page of them) with their provider results
+
+        Args:
+            run_ids: Runs to load
+            chain: Only trades on this chain
+            pair: Only trades of this pair (eg: "HYPE->USDe")
+            offset, limit: Page of trades, in trade id order
+            priced: Join the output tokens' price snapshots (for `diff_usd`)
+        """
+
+        trade = TradeResult.__table__
+        result = ProviderResult.__table__
+        price = PriceSnapshot.__table__
+
+        trade_filter = [trade.c.run_id.in_(list(run_ids))]
+        if chain:
+            trade_filter.append(trade.c.chain == chain)
+        if pair:
+            trade_filter.append(trade.c.pair == pair)
+
+        if offset is not None or limit is not None:
+            page = select(trade.c.id).where(*trade_filter).order_by(trade.c.id).offset(offset).limit(limit)
+            trade_filter.append(trade.c.id.in_(page.scalar_subquery()))
+
+        source = trade
+        if priced:
+            source = source.outerjoin(price, and_(
+                price.c.run_id == trade.c.run_id,
+                price.c.chain == trade.c.chain,
+                price.c.token == trade.c.to_token,
+            ))
+
+        return (
+            select(
+                *[trade.c[name] for name in TRADE_COLUMNS],
+                price.c.price_usd if priced else null(),
+                result.c.id,
+                *[result.c[name] for name in RESULT_COLUMNS],
+            )
+            .select_from(source.outerjoin(result, result.c.trade_id == trade.c.id))
+            .where(*trade_filter)
+            .order_by(trade.c.id, result.c.id)
+        )
+
+    @property
+    def trade_count(self) -> int:
+        return len(self.trade_id)
+
+    def outcomes(self) -> Dict[str, np.ndarray]:
+        """
+        Per trade outcome arrays:
+            valid:      number of successful quotes
+            best:       best output (nan without successful quotes)
+            diff:       best minus 2nd best output, 0 with a single successful quote
+            diff_usd:   diff at the run's price of the output token (nan when unpriced)
+            winner:     provider code of the best quote, -1 without one
+            winner_row: result row of the best quote, -1 without one
+        """
+
+        if self._outcomes is not None:
+            return self._outcomes
+
+        count = self.trade_count
+        trade = self.trade[self.success]
+        output = self.output[self.success]
+
+        valid = np.bincount(trade, minlength=count)
+
+        best = np.full(count, -np.inf)
+        np.maximum.at(best, trade, output)
+
+        # ties go to the first result row, like max() over the trade's results
+        best_rows = np.flatnonzero(self.success & (self.output == best[self.trade]))
+        winning_trades, first = np.unique(self.trade[best_rows], return_index=True)
+        winner_row = np.full(count, -1, dtype=np.int64)
+        winner_row[winning_trades] = best_rows[first]
+
+        winner = np.full(count, -1, dtype=np.int64)
+        winner[winning_trades] = self.provider[winner_row[winning_trades]]
+
+        runner_up = np.full(count, -np.inf)
+        others = self.success.copy()
+        others[winner_row[winning_trades]] = False
+        np.maximum.at(runner_up, self.trade[others], self.output[others])
+
+        with np.errstate(invalid="ignore"):
+            diff = np.where(valid > 1, best - runner_up, np.where(valid == 1, 0.0, np.nan))
+        best[valid == 0] = np.nan
+
+        self._outcomes = {
+            "valid": valid, "best": best, "diff": diff, "diff_usd": diff * self.trade_output_price,
+            "winner": winner, "winner_row": winner_row,
+        }
+        return self._outcomes
+
+    def _group_keys(self, by: Optional[str]) -> Tuple[List, np.ndarray]:
+        """Group labels and the group of every trade"""
+
+        if by is None:
+            return [None], np.zeros(self.trade_count, dtype=np.int64)
+        if by == "chain":
+            return self.chains, self.trade_chain
+        if by == "pair":
+            return self.pairs, self.trade_pair
+        if by == "run":
+            runs, codes = np.unique(self.trade_run_id, return_inverse=True)
+            return runs.tolist(), codes
+        if by == "amount":
+            amounts, codes = np.unique(self.trade_amount_usd, return_inverse=True)
+            return amounts.tolist(), codes
+        raise ValueError(f"can't group by {by!r}")
+
+    def provider_stats(self, by: Optional[str] = None) -> Dict:
+        """
+        Quote, success, error, win and response time counts per provider
+
+        Args:
+            by: Group trades by "chain", "pair", "amount" or "run" (default: one group)
+
+        Returns:
+            dict: group -> {"trades": count, "providers": {provider: stats}}
+        """
+
+        groups, trade_group = self._group_keys(by)
+        group_count = len(groups)
+        provider_count = len(self.providers)
+        cells = group_count * provider_count
+
+        # one bincount per statistic over a (group, provider) key
+        key = trade_group[self.trade] * provider_count + self.provider
+        outcomes = self.outcomes()
+        won = np.zeros(len(self.trade), dtype=bool)
+        won[outcomes["winner_row"][outcomes["winner_row"] >= 0]] = True
+
+        quotes = np.bincount(key, minlength=cells).reshape(group_count, provider_count)
+        successful = np.bincount(key[self.success], minlength=cells).reshape(group_count, provider_count)
+        wins = np.bincount(key[won], minlength=cells).reshape(group_count, provider_count)
+        response_time = np.bincount(
+            key[self.success], weights=np.nan_to_num(self.latency[self.success]), minlength=cells
+        ).reshape(group_count, provider_count)
+        trades = np.bincount(trade_group, minlength=group_count)
+
+        stats = {}
+        for group_idx, group in enumerate(groups):
+            providers = {}
+            for provider_idx, provider in enumerate(self.providers):
+                if not quotes[group_idx, provider_idx]:
+                    continue
+                providers[provider] = {
+                    "total_quotes": int(quotes[group_idx, provider_idx]),
+                    "successful_quotes": int(successful[group_idx, provider_idx]),
+                    "error_count": int(quotes[group_idx, provider_idx] - successful[group_idx, provider_idx]),
+                    "wins": int(wins[group_idx, provider_idx]),
+                    "total_response_time": float(response_time[group_idx, provider_idx]),
+                }
+            stats[group] = {"trades": int(trades[group_idx]), "providers": providers}
+
+        return stats
+
+    def latency_percentiles(self, percentiles: Sequence[float] = (50, 90, 95, 99)) -> Dict[str, Dict[str, float]]:
+        """Response time percentiles of successful quotes per provider"""
+
+        latency = {}
+        for provider_idx, provider in enumerate(self.providers):
+            values = self.latency[self.success & (self.provider == provider_idx)]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            latency[provider] = dict(zip(
+                (f"p{percentile:g}" for percentile in percentiles),
+                np.percentile(values, percentiles).tolist()
+            ))
+        return latency
+
+    def win_matrix(self) -> Dict[str, Dict[float, Dict[str, int]]]:
+        """Wins per pair, trade size and provider"""
+
+        amounts, trade_amount = np.unique(self.trade_amount_usd, return_inverse=True)
+        winner = self.outcomes()["winner"]
+        decided = winner >= 0
+
+        shape = (len(self.pairs), len(amounts), len(self.providers))
+        key = np.ravel_multi_index(
+            (self.trade_pair[decided], trade_amount[decided], winner[decided]), shape
+        ) if len(self.providers) else np.zeros(0, dtype=np.int64)
+        wins = np.bincount(key, minlength=int(np.prod(shape))).reshape(shape)
+
+        matrix = {}
+        for pair_idx, amount_idx in zip(*np.nonzero(wins.sum(axis=2))):
+            by_provider = {
+                self.providers[provider_idx]: int(count)
+                for provider_idx, count in enumerate(wins[pair_idx, amount_idx]) if count
+            }
+            matrix.setdefault(self.pairs[pair_idx], {})[float(amounts[amount_idx])] = by_provider
+
+        return matrix
+
+    def trade_results(self, idx: int) -> range:
+        """Result rows of a trade"""
+        return range(self._bounds[idx], self._bounds[idx + 1])
@@ -1,3 +1,4 @@
+# token tier: liquidity tier (1 = deepest), stratifies pair matrix sampling (see core/pairs.py)
 CHAIN_CONFIG = {
     # HyperEVM
     "999": {
@@ -7,79 +8,94 @@ CHAIN_CONFIG = {
         "normalization_token": {
             "address": "0x5d3a1ff2b6bab83b63cd9ad0787074081a52ef34",
             "symbol": "USDe",
-            "decimals": 18
+            "decimals": 18,
+            "tier": 1
         },
 
         "trading_tokens": [
             {
                 "address": "0xb8ce59fc3717ada4c02eadf9682a9e934f625ebb",  # USDT0
                 "symbol": "USDT0",
-                "decimals": 6
+                "decimals": 6,
+                "tier": 1
             },
             {
                 "address": "0x02c6a2fa58cc01a18b8d9e00ea48d65e4df26c70",  # FEUSD
                 "symbol": "FEUSD",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 2
             },
             {
                 "address": "0x2222222222222222222222222222222222222222",  # HYPE
                 "symbol": "HYPE",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 1
             },
             {
                 "address": "0xffaa4a3d97fe9107cef8a3f48c069f577ff76cc1",  # stHYPE
                 "symbol": "stHYPE",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 2
             },
             {
                 "address": "0x5748ae796ae46a4f1348a1693de4b50560485562",  # LHYPE
                 "symbol": "LHYPE",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 2
             },
             {
                 "address": "0xca79db4b49f608ef54a5cb813fbed3a6387bc645",  # USDXL
                 "symbol": "USDXL",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 3
             },
             {
                 "address": "0x9fdbda0a5e284c32744d2f17ee5c74b284993463",  # UBTC
                 "symbol": "UBTC",
-                "decimals": 8
+                "decimals": 8,
+                "tier": 1
             },
             {
                 "address": "0x94e8396e0869c9f2200760af0621afd240e1cf38",  # WSTHYPE
                 "symbol": "WSTHYPE",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 2
             },
             {
                 "address": "0x9b498c3c8a0b8cd8ba1d9851d40d186f1872b44e",  # PURR
                 "symbol": "PURR",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 2
             },
             {
                 "address": "0xfD739d4e423301CE9385c1fb8850539D657C296D",  # kHYPE
                 "symbol": "kHYPE",
-                "decimals": 18
+                "decimals": 18,
+                "tier": 2
             },
             {
                 "address": "0xcb0ac0aa94c67dde8688ac34c8e4d6c18e78b638",  # LIQD
                 "symbol": "LIQD",
-                "decimals": 6
+                "decimals": 6,
+                "tier": 3
             },
             {
                 "address": "0xf4d9235269a96aadafc9adae454a0618ebe37949",  # XAUTO
                 "symbol": "XAUTO",
-                "decimals": 6
+                "decimals": 6,
+                "tier": 3
             },
             {
                 "address": "0x27ec642013bcb3d80ca3706599d3cda04f6f4452",  # UPUMP
                 "symbol": "UPUMP",
-                "decimals": 6
+                "decimals": 6,
+                "tier": 3
             },
             {
                 "address": "0xb50A96253aBDF803D85efcDce07Ad8becBc52BD5",  # USDHL
                 "symbol": "USDHL",
-                "decimals": 6
+                "decimals": 6,
+                "tier": 3
             },
         ]
     },
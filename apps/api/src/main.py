@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 
-from .routers import analytics, benchmarks, health
+from .core.metrics import API_LATENCY
+from .core.responses import CompressionMiddleware
+from .routers import analytics, benchmarks, health, metrics
 
 app = FastAPI(
     title="GlueX - DEX Aggregator Benchmarking API",
@@ -18,8 +22,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli / gzip for the big analytics payloads
+app.add_middleware(CompressionMiddleware)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start_time = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+
+    finally:
+        # route templates (eg: /benchmarks/{run_id}) keep the label set small
+        route = request.scope.get("route")
+        API_LATENCY.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        ).observe(time.perf_counter() - start_time)
+
+
 app.include_router(health.router, prefix="/health")
 app.include_router(analytics.router, prefix="/analytics")
 app.include_router(benchmarks.router, prefix="/benchmarks")
+app.include_router(metrics.router, prefix="/metrics")
 
 handler = Mangum(app)
@@ -1,3 +1,3 @@
-from .models import BenchmarkRun, TradeResult, ProviderResult
+from .models import BenchmarkRun, TradeResult, ProviderResult, ProviderRollup, RouteLeg, PriceSnapshot, IngestBatch
 
-__all__ = ["BenchmarkRun", "TradeResult", "ProviderResult"]
+__all__ = ["BenchmarkRun", "TradeResult", "ProviderResult", "ProviderRollup", "RouteLeg", "PriceSnapshot", "IngestBatch"]
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -13,6 +13,12 @@ class BenchmarkRun(Base):
 
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime)
+    # set once the retention job rolled the run up and dropped its raw results
+    downsampled_at = Column(DateTime, nullable=True)
+    # where the quotes were sent from (eg: "gha-us-east"), None for runs before vantage points
+    vantage_point = Column(String, nullable=True, index=True)
+    # agent's key of runs uploaded through /benchmarks/ingest, one run per key
+    run_key = Column(String, nullable=True, unique=True, index=True)
     trades = relationship("TradeResult", back_populates="run")
 
 
@@ -40,6 +46,8 @@ class ProviderResult(Base):
 
     id = Column(Integer, primary_key=True)
     trade_id = Column(Integer, ForeignKey('trade_results.id'))
+    # denormalized from the trade, partition key of provider_results
+    run_id = Column(Integer, ForeignKey('benchmark_runs.id'), index=True, nullable=True)
 
     provider = Column(String)
     output_amount = Column(String)
@@ -48,4 +56,83 @@ class ProviderResult(Base):
     error = Column(String, nullable=True)
     raw_response = Column(JSON)
 
+    # seconds this request went out after the first request of its trade (None for cached quotes)
+    dispatch_skew = Column(Float, nullable=True)
+
+    # route summary extracted at ingest, the legs themselves are in route_legs
+    hop_count = Column(Integer, nullable=True)
+    dex_count = Column(Integer, nullable=True)
+
     trade = relationship("TradeResult", back_populates="provider_results")
+
+
+class RouteLeg(Base):
+    """One venue of one hop of a provider's quoted route, with its share of the hop"""
+
+    __tablename__ = 'route_legs'
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('benchmark_runs.id'), index=True)
+    # no foreign key: trade_results may be partitioned
+    trade_id = Column(Integer, index=True)
+    provider = Column(String)
+
+    hop = Column(Integer)
+    dex = Column(String, index=True)
+    share = Column(Float, nullable=True)
+
+
+class ProviderRollup(Base):
+    """Per (run, chain, pair, amount, provider) aggregates kept after raw results expire"""
+
+    __tablename__ = 'provider_rollups'
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('benchmark_runs.id'), index=True)
+    run_date = Column(DateTime)
+
+    chain = Column(String)
+    pair = Column(String)
+    amount_usd = Column(Float)
+    provider = Column(String)
+
+    quotes = Column(Integer)
+    successful_quotes = Column(Integer)
+    wins = Column(Integer)
+    average_response_time = Column(Float, nullable=True)
+    best_output = Column(Float, nullable=True)
+
+
+class IngestBatch(Base):
+    """A batch of results uploaded by a runner agent, its key makes uploads idempotent"""
+
+    __tablename__ = 'ingest_batches'
+
+    id = Column(Integer, primary_key=True)
+    batch_key = Column(String, unique=True)
+    run_id = Column(Integer, ForeignKey('benchmark_runs.id'), index=True)
+    vantage_point = Column(String)
+
+    trades = Column(Integer)
+    provider_results = Column(Integer)
+    received_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PriceSnapshot(Base):
+    """USD price of a token as fetched (or served from the price cache) for a run"""
+
+    __tablename__ = 'price_snapshots'
+    __table_args__ = (
+        Index('ix_price_snapshots_run_chain_token', 'run_id', 'chain', 'token', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('benchmark_runs.id'))
+
+    chain = Column(String)
+    token = Column(String)
+    symbol = Column(String)
+    # None when the price couldn't be fetched
+    price_usd = Column(Float, nullable=True)
+    fetched_at = Column(DateTime)
+    latency = Column(Float)
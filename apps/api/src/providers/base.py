@@ -1,5 +1,46 @@
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass, fields, replace
+from typing import Any, List, Optional
+
+
+@dataclass(slots=True)
+class QuoteResult:
+    """
+    Outcome of one quote request, the same shape for every provider. Kept
+    slotted: a large run holds one per (trade, provider) until its chain is
+    stored.
+    """
+
+    provider: str
+    # None when the request never got a response
+    status_code: Optional[int] = None
+    # formatted by the provider (decimal amount of the output token)
+    output_amount: Optional[str] = None
+    elapsed_time: Optional[float] = None
+    error: Optional[str] = None
+    # the body as received (a `RawJSON`, or the error text)
+    raw_response: Any = None
+    # see `BaseProvider.extract_route`
+    route: Optional[dict] = None
+    decode_time: Optional[float] = None
+    # served from the quote cache
+    cached: bool = False
+
+    @property
+    def successful(self) -> bool:
+        """Whether the quote has a usable output amount"""
+        return self.status_code == 200 and bool(self.output_amount)
+
+    def as_cached(self) -> "QuoteResult":
+        return replace(self, cached=True)
+
+    def to_dict(self) -> dict:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuoteResult":
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
 
 
 class BaseProvider(ABC):
@@ -23,10 +64,24 @@ class BaseProvider(ABC):
             user_address (str): The address of the user initiating the trade
 
         Returns:
-            A dictionary containing the provider's response, or None if an error occurs
+            QuoteResult: The outcome, failed requests included (with their error)
         """
         pass
 
+    def extract_route(self, raw_response) -> Optional[dict]:
+        """
+        Compact route summary of a successful quote response, see
+        `core.routes.summarize_route` (or `summarize_venues` when only the
+        venues are known). Called once in `get_quote`.
+
+        Args:
+            raw_response: The decoded response body
+
+        Returns:
+            The route summary, or None if the provider doesn't expose its route
+        """
+        return None
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -1,12 +1,26 @@
 import requests
 import time
-from typing import List
+from typing import Any, List
 
 from .config import settings
-from ..base import BaseProvider
+from ..base import BaseProvider, QuoteResult
+from ...core.codec import ResponseDecodeError, decode_response, response_struct
+from ...core.http import get_http_session
+from ...core.routes import as_list, summarize_route, summarize_venues
 from ...data.user import USER_ADDRESS
 
 
+# the only parts of a quote response that get decoded (with msgspec)
+QUOTE_RESPONSE = response_struct("GluexQuote", {
+    "result": {
+        "outputAmount": Any,
+        "route": Any,
+        "routes": Any,
+        "liquidityModules": Any,
+    },
+})
+
+
 class GluexProvider(BaseProvider):
     def __init__(self):
         super().__init__(api_key=settings.api_key)
@@ -20,6 +34,23 @@ class GluexProvider(BaseProvider):
         # Ethereum, BNB, Polygon, Arbitrum, HyperEVM, Base, Avalanche
         return ["1", "10", "56", "100", "137", "42161", "999",  "8453", "43114"]
 
+    def extract_route(self, raw_response):
+        result = (raw_response.get("result") or {}) if isinstance(raw_response, dict) else {}
+
+        # hops with the swaps each hop is split over
+        hops = as_list(result.get("route")) or as_list(result.get("routes"))
+        if hops:
+            return summarize_route(
+                as_list(hop.get("swaps")) or as_list(hop.get("splits")) or [hop]
+                for hop in hops if isinstance(hop, dict)
+            )
+
+        # otherwise only the liquidity modules used are known, not the hops
+        return summarize_venues(
+            {"liquidityModule": module} if isinstance(module, str) else module
+            for module in as_list(result.get("liquidityModules"))
+        )
+
     def get_quote(self, chain: str, from_token: str, to_token: str, from_amount: int, user_address: str = USER_ADDRESS):
         headers = {
             "accept": "*/*",
@@ -44,7 +75,7 @@ class GluexProvider(BaseProvider):
         start_time = time.perf_counter()
 
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 settings.url, headers=headers, json=body, timeout=10
             )
 
@@ -52,8 +83,13 @@ class GluexProvider(BaseProvider):
 
             response.raise_for_status()
 
+            # decoded once, the body is stored as received
+            data, raw_response, decode_time = decode_response(
+                response, self.name, QUOTE_RESPONSE
+            )
+
             # extract raw output amount
-            raw_output = response.json().get("result", {}).get("outputAmount")
+            raw_output = (data.get("result") or {}).get("outputAmount")
             formatted_output = None
 
             if raw_output:
@@ -96,20 +132,32 @@ class GluexProvider(BaseProvider):
             else:
                 print(f"❌ GlueX: No raw output found")
 
-            return {
-                "name": self.name,
-                "output_amount": formatted_output,
-                "elapsed_time": elapsed_time,
-                "status_code": response.status_code,
-                "raw_response": response.json(),
-            }
+            return QuoteResult(
+                provider=self.name,
+                output_amount=formatted_output,
+                elapsed_time=elapsed_time,
+                status_code=response.status_code,
+                raw_response=raw_response,
+                decode_time=decode_time,
+                route=self.extract_route(data) if formatted_output else None,
+            )
+
+        except ResponseDecodeError as e:
+            # eg: an html error page served with a 200
+            return QuoteResult(
+                provider=self.name,
+                error=str(e),
+                elapsed_time=elapsed_time,
+                status_code=response.status_code,
+                raw_response=response.text,
+            )
 
         except requests.RequestException as e:
             elapsed_time = time.perf_counter() - start_time
 
-            return {
-                "name": self.name,
-                "error": str(e),
-                "elapsed_time": elapsed_time,
-                "status_code": e.response.status_code if e.response else None,
-            }
+            return QuoteResult(
+                provider=self.name,
+                error=str(e),
+                elapsed_time=elapsed_time,
+                status_code=e.response.status_code if e.response is not None else None,
+            )
@@ -1,12 +1,24 @@
 import requests
 import time
-from typing import List
+from typing import Any, List
 
 from .config import settings
-from ..base import BaseProvider
+from ..base import BaseProvider, QuoteResult
+from ...core.codec import ResponseDecodeError, decode_response, response_struct
+from ...core.http import get_http_session
+from ...core.routes import as_list, summarize_route
 from ...data.user import USER_ADDRESS
 
 
+# the only parts of a quote response that get decoded (with msgspec)
+QUOTE_RESPONSE = response_struct("LiqdswapQuote", {
+    "estimatedTotalOutput": Any,
+    "bestRoute": Any,
+    "route": Any,
+    "data": Any,
+})
+
+
 class LiqdswapProvider(BaseProvider):
     def __init__(self):
         super().__init__(api_key=None)
@@ -20,6 +32,21 @@ class LiqdswapProvider(BaseProvider):
         # HyperEVM
         return ["999"]
 
+    def extract_route(self, raw_response):
+        if not isinstance(raw_response, dict):
+            return None
+
+        data = raw_response.get("data") if isinstance(raw_response.get("data"), dict) else raw_response
+        route = data.get("bestRoute") or data.get("route") or {}
+        if isinstance(route, dict):
+            route = as_list(route.get("hops")) or as_list(route.get("path"))
+
+        # every hop is split over pools through their router
+        return summarize_route(
+            as_list(hop.get("allocations")) or as_list(hop.get("splits")) or [hop]
+            for hop in as_list(route) if isinstance(hop, dict)
+        )
+
     def get_quote(self, chain: str, from_token: str, to_token: str, from_amount: int, user_address: str = USER_ADDRESS):
         """
         Get quote from Liqd.ag API
@@ -34,13 +61,12 @@ class LiqdswapProvider(BaseProvider):
             # adjust amount by dividing by token decimals (Liqd expects decimal amount, not wei)
             input_decimals = TOKEN_DECIMALS.get(from_token.lower())
             if input_decimals is None:
-                return {
-                    "output_amount": None,
-                    "elapsed_time": time.time() - start_time,
-                    "status_code": 500,
-                    "error": f"Token {from_token} not found in TOKEN_DECIMALS mapping",
-                    "raw_response": None
-                }
+                return QuoteResult(
+                    provider=self.name,
+                    elapsed_time=time.time() - start_time,
+                    status_code=500,
+                    error=f"Token {from_token} not found in TOKEN_DECIMALS mapping",
+                )
             adjusted_amount = int(from_amount) / (10 ** input_decimals)
 
             # prepare request parameters
@@ -56,7 +82,7 @@ class LiqdswapProvider(BaseProvider):
             }
 
             # API request
-            response = requests.get(
+            response = get_http_session().get(
                 settings.url,
                 params=params,
                 headers=headers,
@@ -66,11 +92,14 @@ class LiqdswapProvider(BaseProvider):
             elapsed_time = time.time() - start_time
 
             if response.status_code == 200:
-                data = response.json()
+                # decoded once, the body is stored as received
+                data, raw_response, decode_time = decode_response(
+                    response, self.name, QUOTE_RESPONSE
+                )
 
                 # extract output amount from response
                 output_amount = None
-                if isinstance(data, dict) and "estimatedTotalOutput" in data:
+                if isinstance(data, dict) and data.get("estimatedTotalOutput") is not None:
                     try:
                         raw_output = data["estimatedTotalOutput"]
                         print(f"🔍 Liqdswap RAW OUTPUT: {raw_output}")
@@ -87,48 +116,57 @@ class LiqdswapProvider(BaseProvider):
                 else:
                     print(f"❌ Liqdswap: No estimatedTotalOutput found in response")
 
-                return {
-                    "output_amount": output_amount,
-                    "elapsed_time": elapsed_time,
-                    "status_code": response.status_code,
-                    "error": None,
-                    "raw_response": data
-                }
+                return QuoteResult(
+                    provider=self.name,
+                    output_amount=output_amount,
+                    elapsed_time=elapsed_time,
+                    status_code=response.status_code,
+                    raw_response=raw_response,
+                    decode_time=decode_time,
+                    route=self.extract_route(data) if output_amount else None,
+                )
             else:
-                return {
-                    "output_amount": None,
-                    "elapsed_time": elapsed_time,
-                    "status_code": response.status_code,
-                    "error": f"HTTP {response.status_code}: {response.text}",
-                    "raw_response": response.text
-                }
+                return QuoteResult(
+                    provider=self.name,
+                    elapsed_time=elapsed_time,
+                    status_code=response.status_code,
+                    error=f"HTTP {response.status_code}: {response.text}",
+                    raw_response=response.text,
+                )
 
         except requests.exceptions.Timeout:
             elapsed_time = time.time() - start_time
-            return {
-                "output_amount": None,
-                "elapsed_time": elapsed_time,
-                "status_code": 408,
-                "error": "Request timeout",
-                "raw_response": None
-            }
+            return QuoteResult(
+                provider=self.name,
+                elapsed_time=elapsed_time,
+                status_code=408,
+                error="Request timeout",
+            )
+
+        except ResponseDecodeError as e:
+            # eg: an html error page served with a 200, stored like any provider's
+            return QuoteResult(
+                provider=self.name,
+                elapsed_time=elapsed_time,
+                status_code=response.status_code,
+                error=str(e),
+                raw_response=response.text,
+            )
 
         except requests.exceptions.RequestException as e:
             elapsed_time = time.time() - start_time
-            return {
-                "output_amount": None,
-                "elapsed_time": elapsed_time,
-                "status_code": 500,
-                "error": f"Request error: {str(e)}",
-                "raw_response": None
-            }
+            return QuoteResult(
+                provider=self.name,
+                elapsed_time=elapsed_time,
+                status_code=500,
+                error=f"Request error: {str(e)}",
+            )
 
         except Exception as e:
             elapsed_time = time.time() - start_time
-            return {
-                "output_amount": None,
-                "elapsed_time": elapsed_time,
-                "status_code": 500,
-                "error": f"Unexpected error: {str(e)}",
-                "raw_response": None
-            }
+            return QuoteResult(
+                provider=self.name,
+                elapsed_time=elapsed_time,
+                status_code=500,
+                error=f"Unexpected error: {str(e)}",
+            )
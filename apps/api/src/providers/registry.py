@@ -0,0 +1,185 @@
+import importlib
+import json
+import threading
+from importlib.metadata import entry_points
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .base import BaseProvider
+from ..core.config import settings
+
+
+# entry point group third-party aggregators register their providers under
+ENTRY_POINT_GROUP = "gluex_benchmarking.providers"
+
+# providers shipped with the service, used when the package is not installed
+BUILTIN_PROVIDERS = {
+    "gluex": ".gluex:GluexProvider",
+    "liqdswap": ".liqdswap:LiqdswapProvider",
+}
+
+# provider names that can't be used as-is for response keys
+PROVIDER_KEY_ALIASES = {
+    "0x": "zerox",
+}
+
+
+def provider_key(provider_name: str) -> str:
+    """
+    Standardized key for a provider name (eg: "GlueX" -> "gluex", "0x" -> "zerox")
+    """
+    key = provider_name.lower().replace(" ", "_")
+    return PROVIDER_KEY_ALIASES.get(key, key)
+
+
+def _load_object(target: str):
+    """Load `module.path:ClassName` references (relative to this package when starting with a dot)"""
+
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, attribute)
+
+
+class ProviderRegistry:
+    """
+    Discovers provider classes and hands out one instance of each per process
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], BaseProvider]] = {}
+        self._instances: Dict[str, BaseProvider] = {}
+        self._failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._discovered = False
+
+    def register(self, key: str, factory: Callable[[], BaseProvider]):
+        """
+        Register a provider factory (usually the provider class) under a key
+
+        Args:
+            key (str): The registry key (eg: "gluex")
+            factory (Callable): Zero argument callable returning a provider
+        """
+        with self._lock:
+            self._factories[key] = factory
+            self._instances.pop(key, None)
+            self._failed.pop(key, None)
+
+    def discover(self):
+        """
+        Collect providers from the builtins, the `gluex_benchmarking.providers`
+        entry point group and the optional BENCHMARK_PROVIDERS_FILE json file
+        ({"odos": "my_package.odos:OdosProvider"})
+        """
+
+        if self._discovered:
+            return
+
+        targets = dict(BUILTIN_PROVIDERS)
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            targets[entry_point.name] = entry_point.value
+
+        if settings.providers_file:
+            try:
+                with open(settings.providers_file) as file:
+                    targets.update(json.load(file))
+            except Exception as e:
+                print(
+                    f"❌ Could not read providers file {settings.providers_file}: {e}"
+                )
+
+        for key, target in targets.items():
+            if key not in self._factories:
+                self._factories[key] = lambda target=target: _load_object(target)()
+
+        self._discovered = True
+        print(f"🔌 Discovered providers: {', '.join(sorted(self._factories))}")
+
+    def keys(self) -> List[str]:
+        self.discover()
+        return sorted(self._factories)
+
+    def get(self, key: str) -> Optional[BaseProvider]:
+        """
+        Get the process wide instance of a provider, creating it on first use
+
+        Returns:
+            The provider, or None if it is unknown or failed to initialise
+        """
+
+        self.discover()
+
+        with self._lock:
+            if key in self._instances:
+                return self._instances[key]
+
+            if key in self._failed or key not in self._factories:
+                return None
+
+            try:
+                self._instances[key] = self._factories[key]()
+            except Exception as e:
+                # eg: missing api keys, don't take the whole run down
+                self._failed[key] = str(e)
+                print(f"❌ Could not initialise provider {key}: {e}")
+                return None
+
+            return self._instances[key]
+
+    def enabled_keys(self, enabled: Optional[Iterable[str]] = None, disabled: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Resolve the provider keys for a run
+
+        Args:
+            enabled: Only use these providers (defaults to BENCHMARK_PROVIDERS, or all)
+            disabled: Never use these providers (defaults to BENCHMARK_DISABLED_PROVIDERS)
+        """
+
+        enabled = settings.providers if enabled is None else enabled
+        disabled = settings.disabled_providers if disabled is None else disabled
+
+        # explicit keys are checked against the discovered providers too
+        self.discover()
+        keys = self.keys() if not enabled else list(enabled)
+        disabled = set(disabled or [])
+
+        for key in keys:
+            if key not in self._factories:
+                print(f"⚠️  Unknown provider requested: {key}")
+
+        return [
+            key for key in keys
+            if key in self._factories and key not in disabled
+        ]
+
+    def providers(self, enabled: Optional[Iterable[str]] = None, disabled: Optional[Iterable[str]] = None) -> List[BaseProvider]:
+        """Get the provider instances enabled for a run"""
+
+        providers = [self.get(key) for key in self.enabled_keys(enabled, disabled)]
+        return [provider for provider in providers if provider is not None]
+
+    def providers_for_chain(self, chain_id: str, enabled: Optional[Iterable[str]] = None, disabled: Optional[Iterable[str]] = None) -> List[BaseProvider]:
+        """Get the enabled provider instances that support a chain"""
+
+        return [
+            provider for provider in self.providers(enabled, disabled)
+            if provider.supports_chain(chain_id)
+        ]
+
+    def capabilities(self, enabled: Optional[Iterable[str]] = None, disabled: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        Chain ID -> provider keys supporting it (eg: {"999": ["gluex", "liqdswap"]})
+        """
+
+        chains: Dict[str, List[str]] = {}
+        for key in self.enabled_keys(enabled, disabled):
+            provider = self.get(key)
+            if provider is None:
+                continue
+            for chain_id in provider.supported_chains:
+                chains.setdefault(chain_id, []).append(key)
+
+        return chains
+
+
+provider_registry = ProviderRegistry()
@@ -1,42 +1,270 @@
+import collections
+import threading
+from datetime import datetime, timedelta
+import numpy as np
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Literal, Optional
 
 from ..models import models
-from ..core.database import get_db
+from ..core.compare import compare_query, compare_rows
+from ..core.config import settings
+from ..core.database import fetch_columns_async, get_read_db
+from ..core.responses import FastJSONResponse, to_columns
+from ..core.retention import successful_quote
+from ..core.snapshot import RunSnapshot
+from ..providers.registry import provider_key
 
 router = APIRouter()
 
+# (base, head, chain) -> comparison of two finished runs, which never change
+COMPARE_CACHE_SIZE = 128
+_compare_cache = collections.OrderedDict()
+_compare_cache_lock = threading.Lock()
 
-@router.get("/detailed-results")
-def get_detailed_benchmark_results(
+# response time percentiles of /latency-by-vantage
+VANTAGE_PERCENTILES = (50, 90, 95, 99)
+
+# "columns" sends row lists as {column: [values]}, see `to_columns`
+ResponseFormat = Literal["rows", "columns"]
+
+
+def _optional(value):
+    """numpy scalar -> plain python value, None for missing values (nan / -1 status)"""
+    value = value.item() if hasattr(value, "item") else value
+    if value is None or value != value or value == -1:
+        return None
+    return value
+
+
+async def _target_run(db_session: AsyncSession, run_id=None):
+    """The requested run, the latest one without run_id (None if there is none)"""
+
+    query = select(models.BenchmarkRun)
+    if run_id:
+        query = query.where(models.BenchmarkRun.id == run_id)
+    else:
+        query = query.order_by(models.BenchmarkRun.id.desc()).limit(1)
+
+    return (await db_session.execute(query)).scalars().first()
+
+
+def _provider_analytics(provider_stats, total_trades):
+    """Win rate metrics from `RunSnapshot.provider_stats` counts"""
+
+    analytics = {}
+    for provider, stats in provider_stats.items():
+        analytics[provider] = {
+            "total_quotes": stats["total_quotes"],
+            "successful_quotes": stats["successful_quotes"],
+            "error_count": stats["error_count"],
+            "participation_rate": (stats["successful_quotes"] / total_trades * 100) if total_trades > 0 else 0,
+            "win_rate": (stats["wins"] / stats["successful_quotes"] * 100) if stats["successful_quotes"] > 0 else 0,
+            "average_response_time": (stats["total_response_time"] / stats["successful_quotes"]) if stats["successful_quotes"] > 0 else 0,
+            "total_wins": stats["wins"]
+        }
+    return analytics
+
+
+# detailed-results fields of the trade itself -> trade_results column
+DETAILED_TRADE_FIELDS = {
+    "chain": "chain",
+    "trading_pair": "pair",
+    "from_token": "from_token_symbol",      # Human-readable symbol (e.g., "USDC")
+    "to_token": "to_token_symbol",          # Human-readable symbol (e.g., "WETH")
+    "from_address": "from_token",           # Contract address
+    "to_address": "to_token",               # Contract address
+    "amount_usd": "amount_usd",
+}
+# detailed-results fields computed over all provider results of a trade
+DETAILED_OUTCOME_FIELDS = ("winner", "output_diff", "output_diff_usd")
+
+
+@router.get("/detailed-results", response_class=FastJSONResponse)
+async def get_detailed_benchmark_results(
     run_id: Optional[int] = None,
     chain: Optional[str] = None,
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
     page_size: int = Query(
         50, ge=10, le=200, description="Items per page (10-200)"),
-    db_session: Session = Depends(get_db)
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, eg: chain,trading_pair,gluex_output (default: all)"),
+    format: ResponseFormat = "rows",
+    db_session: AsyncSession = Depends(get_read_db)
 ):
     """Get detailed benchmark results with pagination"""
+    requested = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    results = await _detailed_benchmark_results(
+        db_session, run_id, chain, page, page_size, requested
+    )
+    if format == "columns" and "results" in results:
+        results["results"] = await run_in_threadpool(to_columns, results["results"])
+    return FastJSONResponse(results)
+
+
+def _detailed_fields(provider_keys):
+    """Every detailed-results field of a run, in response order"""
+    return [
+        *DETAILED_TRADE_FIELDS,
+        *[f"{key}_time" for key in provider_keys],
+        *[f"{key}_output" for key in provider_keys],
+        *DETAILED_OUTCOME_FIELDS,
+    ]
+
+
+def _detailed_outcome_results(columns, fields):
+    """Detailed result records from a `RunSnapshot` of the page (winners need every result of a trade)"""
+
+    snapshot = RunSnapshot(columns)
+    outcomes = snapshot.outcomes()
+
+    detailed_results = []
+
+    for idx in range(snapshot.trade_count):
+        result_record = dict.fromkeys(fields)
+        result_record.update({
+            "chain": snapshot.chains[snapshot.trade_chain[idx]],
+            "trading_pair": snapshot.pairs[snapshot.trade_pair[idx]],
+            "from_token": snapshot.trade_from_symbol[idx],
+            "to_token": snapshot.trade_to_symbol[idx],
+            "from_address": snapshot.trade_from_token[idx],
+            "to_address": snapshot.trade_to_token[idx],
+            "amount_usd": float(snapshot.trade_amount_usd[idx]),
+        })
+
+        # Process provider results
+        for row in snapshot.trade_results(idx):
+            # Map provider names to standardized keys
+            key = provider_key(snapshot.providers[snapshot.provider[row]])
+
+            # Set response time
+            result_record[f"{key}_time"] = _optional(snapshot.latency[row])
+
+            # Set output amount (already formatted by the backend)
+            if snapshot.output_raw[row] and snapshot.status[row] == 200:
+                result_record[f"{key}_output"] = snapshot.output_raw[row]
+
+        # Winner and output differences
+        valid = outcomes["valid"][idx]
+        if valid > 1:
+            result_record["winner"] = snapshot.providers[outcomes["winner"][idx]]
+            result_record["output_diff"] = float(outcomes["diff"][idx])
+            # priced with the run's price snapshot of the output token
+            result_record["output_diff_usd"] = _optional(outcomes["diff_usd"][idx])
+        elif valid == 1:
+            result_record["winner"] = snapshot.providers[outcomes["winner"][idx]]
+            result_record["output_diff"] = 0
+            result_record["output_diff_usd"] = 0
+        else:
+            result_record["winner"] = "All Error"
+            result_record["output_diff"] = None
+            result_record["output_diff_usd"] = None
+
+        detailed_results.append({field: result_record[field] for field in fields})
+
+    return detailed_results
+
+
+async def _detailed_projected_results(db_session: AsyncSession, trade_filter, offset, limit, fields, provider_names):
+    """
+    Detailed result records selecting only the columns behind `fields`:
+    the page of trades, then the requested providers' results of that page
+    """
+
+    trade = models.TradeResult.__table__
+    result = models.ProviderResult.__table__
+
+    trade_fields = [field for field in fields if field in DETAILED_TRADE_FIELDS]
+    trades = (await db_session.execute(
+        select(trade.c.id, *[trade.c[DETAILED_TRADE_FIELDS[field]] for field in trade_fields])
+        .where(*trade_filter)
+        .order_by(trade.c.id)
+        .offset(offset)
+        .limit(limit)
+    )).all()
+
+    records = {}
+    for row in trades:
+        record = records[row[0]] = dict.fromkeys(fields)
+        record.update(zip(trade_fields, row[1:]))
+        if "amount_usd" in record:
+            record["amount_usd"] = float(record["amount_usd"])
+
+    # provider name -> whether its time / output is requested
+    wanted = {
+        name: (f"{key}_time" in fields, f"{key}_output" in fields)
+        for name, key in provider_names.items()
+        if f"{key}_time" in fields or f"{key}_output" in fields
+    }
+
+    if wanted and records:
+        with_time = any(time for time, _ in wanted.values())
+        with_output = any(output for _, output in wanted.values())
+
+        columns = [result.c.trade_id, result.c.provider]
+        if with_time:
+            columns.append(result.c.elapsed_time)
+        if with_output:
+            columns.extend([result.c.output_amount, result.c.status_code])
+
+        rows = (await db_session.execute(
+            select(*columns)
+            .where(result.c.trade_id.in_(list(records)), result.c.provider.in_(list(wanted)))
+            .order_by(result.c.id)
+        )).all()
 
+        for row in rows:
+            record = records[row[0]]
+            key = provider_names[row[1]]
+            time, output = wanted[row[1]]
+            if time:
+                record[f"{key}_time"] = row[2]
+            if output and row[-2] and row[-1] == 200:
+                record[f"{key}_output"] = row[-2]
+
+    return list(records.values())
+
+
+async def _detailed_benchmark_results(db_session: AsyncSession, run_id, chain, page, page_size, fields=None):
     # Determine which run to analyze
-    if run_id:
-        target_run = db_session.query(models.BenchmarkRun).filter(
-            models.BenchmarkRun.id == run_id).first()
-    else:
-        target_run = db_session.query(models.BenchmarkRun).order_by(
-            models.BenchmarkRun.id.desc()).first()
+    target_run = await _target_run(db_session, run_id)
 
     if not target_run:
         return {"error": "No benchmark runs found"}
 
-    # Get trades count for pagination (before applying limit/offset)
-    trades_query = db_session.query(models.TradeResult).filter(
-        models.TradeResult.run_id == target_run.id)
+    trade = models.TradeResult.__table__
+    result = models.ProviderResult.__table__
+
+    trade_filter = [trade.c.run_id == target_run.id]
     if chain:
-        trades_query = trades_query.filter(models.TradeResult.chain == chain)
+        trade_filter.append(trade.c.chain == chain)
+
+    # Provider columns of the providers that quoted in this run (and chain)
+    provider_names = {
+        name: provider_key(name)
+        for name in sorted((await db_session.execute(
+            select(result.c.provider)
+            .select_from(result.join(trade, trade.c.id == result.c.trade_id))
+            .where(*trade_filter)
+            .distinct()
+        )).scalars())
+    }
+    available = _detailed_fields(dict.fromkeys(provider_names.values()))
+
+    if fields is None:
+        fields = available
+    else:
+        unknown = [field for field in fields if field not in available]
+        if unknown:
+            return {"error": f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(available)}"}
+        fields = list(dict.fromkeys(fields))
 
-    total_count = trades_query.count()
+    # Get trades count for pagination (before applying limit/offset)
+    total_count = (await db_session.execute(
+        select(func.count()).select_from(trade).where(*trade_filter)
+    )).scalar()
 
     if total_count == 0:
         return {
@@ -54,88 +282,16 @@ def get_detailed_benchmark_results(
             "results": []
         }
 
-    # Apply pagination to query
+    # Load just this page of trades, with as little as the fields need
     offset = (page - 1) * page_size
-    trades = trades_query.offset(offset).limit(page_size).all()
-
-    detailed_results = []
-
-    for trade in trades:
-        # Initialize the result record with trade data
-        result_record = {
-            "chain": trade.chain,
-            "trading_pair": trade.pair,
-            # Human-readable symbol (e.g., "USDC")
-            "from_token": trade.from_token_symbol,
-            # Human-readable symbol (e.g., "WETH")
-            "to_token": trade.to_token_symbol,
-            "from_address": trade.from_token,           # Contract address
-            "to_address": trade.to_token,               # Contract address
-            "amount_usd": trade.amount_usd,
-            # Initialize provider times and outputs
-            "gluex_time": None,
-            "zerox_time": None,
-            "odos_time": None,
-            "enso_time": None,
-            "1inch_time": None,
-            "liqdswap_time": None,
-            "gluex_output": None,
-            "zerox_output": None,
-            "odos_output": None,
-            "enso_output": None,
-            "1inch_output": None,
-            "liqdswap_output": None,
-        }
-
-        # Process provider results
-        valid_outputs = {}
-
-        for provider_result in trade.provider_results:
-            provider_name = provider_result.provider.lower()
-
-            # Map provider names to standardized keys
-            provider_key_map = {
-                "gluex": "gluex",
-                "0x": "zerox",
-                "odos": "odos",
-                "enso": "enso",
-                "1inch": "1inch",
-                "liqdswap": "liqdswap"
-            }
-
-            provider_key = provider_key_map.get(provider_name, provider_name)
-
-            # Set response time
-            result_record[f"{provider_key}_time"] = provider_result.elapsed_time
-
-            # Set output amount (already formatted by the backend)
-            if provider_result.output_amount and provider_result.status_code == 200:
-                result_record[f"{provider_key}_output"] = provider_result.output_amount
-                try:
-                    valid_outputs[provider_result.provider] = float(
-                        provider_result.output_amount)
-                except (ValueError, TypeError):
-                    # Skip invalid outputs
-                    pass
-
-        # Calculate winner and output differences
-        if len(valid_outputs) > 1:
-            winner_provider = max(valid_outputs.items(), key=lambda x: x[1])[0]
-            result_record["winner"] = winner_provider
-            sorted_outputs = sorted(valid_outputs.values(), reverse=True)
-            output_diff = sorted_outputs[0] - sorted_outputs[1]
-            result_record["output_diff"] = output_diff
-            result_record["output_diff_usd"] = None
-        elif len(valid_outputs) == 1:
-            result_record["winner"] = list(valid_outputs.keys())[0]
-            result_record["output_diff"] = 0
-            result_record["output_diff_usd"] = 0
-        else:
-            result_record["winner"] = "All Error"
-            result_record["output_diff"] = None
-            result_record["output_diff_usd"] = None
-
-        detailed_results.append(result_record)
+    if any(field in DETAILED_OUTCOME_FIELDS for field in fields):
+        columns = await fetch_columns_async(db_session, RunSnapshot.query(
+            [target_run.id], chain=chain, offset=offset, limit=page_size,
+            priced="output_diff_usd" in fields))
+        detailed_results = await run_in_threadpool(_detailed_outcome_results, columns, fields)
+    else:
+        detailed_results = await _detailed_projected_results(
+            db_session, trade_filter, offset, page_size, fields, provider_names)
 
     # Calculate pagination metadata
     total_pages = (total_count + page_size - 1) // page_size
@@ -146,6 +302,7 @@ def get_detailed_benchmark_results(
         "run_id": target_run.id,
         "run_date": target_run.start_time,
         "chain_filter": chain,
+        "fields": fields,
         "pagination": {
             "page": page,
             "page_size": page_size,
@@ -159,83 +316,36 @@ def get_detailed_benchmark_results(
 
 
 @router.get("/win-rates")
-def get_win_rates(
+async def get_win_rates(
     chain: Optional[str] = None,
     run_id: Optional[int] = None,
-    db_session: Session = Depends(get_db)
+    db_session: AsyncSession = Depends(get_read_db)
 ):
     """Get win rate analysis across all providers, optionally filtered by chain or run"""
+    return await _win_rates(db_session, chain, run_id)
+
 
+async def _win_rates(db_session: AsyncSession, chain, run_id):
     # Determine which run to analyze
-    if run_id:
-        target_run = db_session.query(models.BenchmarkRun).filter(
-            models.BenchmarkRun.id == run_id).first()
-    else:
-        target_run = db_session.query(models.BenchmarkRun).order_by(
-            models.BenchmarkRun.id.desc()).first()
+    target_run = await _target_run(db_session, run_id)
 
     if not target_run:
         return {"error": "No benchmark runs found"}
 
     # Get trades, optionally filtered by chain
-    trades_query = db_session.query(models.TradeResult).filter(
-        models.TradeResult.run_id == target_run.id)
-    if chain:
-        trades_query = trades_query.filter(models.TradeResult.chain == chain)
-    trades = trades_query.all()
+    columns = await fetch_columns_async(db_session, RunSnapshot.query([target_run.id], chain=chain))
+    return await run_in_threadpool(_win_rates_from, columns, target_run, chain)
 
-    if not trades:
+
+def _win_rates_from(columns, target_run, chain):
+    snapshot = RunSnapshot(columns)
+
+    if not snapshot.trade_count:
         return {"error": "No trades found for the specified criteria"}
 
-    # Calculate analytics
-    provider_stats = {}
-    total_trades = len(trades)
-
-    # Initialize provider stats
-    for trade in trades:
-        for result in trade.provider_results:
-            if result.provider not in provider_stats:
-                provider_stats[result.provider] = {
-                    "total_quotes": 0,
-                    "successful_quotes": 0,
-                    "wins": 0,
-                    "total_response_time": 0.0,
-                    "error_count": 0
-                }
-
-    # Count participations and calculate response times
-    for trade in trades:
-        for result in trade.provider_results:
-            provider_stats[result.provider]["total_quotes"] += 1
-
-            if result.output_amount and result.status_code == 200:
-                provider_stats[result.provider]["successful_quotes"] += 1
-                provider_stats[result.provider]["total_response_time"] += result.elapsed_time or 0
-            else:
-                provider_stats[result.provider]["error_count"] += 1
-
-    # Determine winners for each trade
-    for trade in trades:
-        valid_results = [
-            r for r in trade.provider_results if r.output_amount and r.status_code == 200]
-        if valid_results:
-            # Find the provider with the highest output amount
-            winner = max(valid_results, key=lambda x: float(
-                x.output_amount) if x.output_amount else 0)
-            provider_stats[winner.provider]["wins"] += 1
-
-    # Calculate final metrics
-    analytics = {}
-    for provider, stats in provider_stats.items():
-        analytics[provider] = {
-            "total_quotes": stats["total_quotes"],
-            "successful_quotes": stats["successful_quotes"],
-            "error_count": stats["error_count"],
-            "participation_rate": (stats["successful_quotes"] / total_trades * 100) if total_trades > 0 else 0,
-            "win_rate": (stats["wins"] / stats["successful_quotes"] * 100) if stats["successful_quotes"] > 0 else 0,
-            "average_response_time": (stats["total_response_time"] / stats["successful_quotes"]) if stats["successful_quotes"] > 0 else 0,
-            "total_wins": stats["wins"]
-        }
+    total_trades = snapshot.trade_count
+    analytics = _provider_analytics(
+        snapshot.provider_stats()[None]["providers"], total_trades)
 
     return {
         "run_id": target_run.id,
@@ -247,53 +357,35 @@ def get_win_rates(
 
 
 @router.get("/chain-performance")
-def get_chain_performance(db_session: Session = Depends(get_db)):
+async def get_chain_performance(db_session: AsyncSession = Depends(get_read_db)):
     """Get performance breakdown by chain"""
+    return await _chain_performance(db_session)
 
-    latest_run = db_session.query(models.BenchmarkRun).order_by(
-        models.BenchmarkRun.id.desc()).first()
+
+async def _chain_performance(db_session: AsyncSession):
+    latest_run = await _target_run(db_session)
     if not latest_run:
         return {"error": "No benchmark runs found"}
 
+    columns = await fetch_columns_async(db_session, RunSnapshot.query([latest_run.id]))
+    return await run_in_threadpool(_chain_performance_from, columns, latest_run)
+
+
+def _chain_performance_from(columns, latest_run):
     # Group trades by chain
-    chains = db_session.query(models.TradeResult.chain).filter(
-        models.TradeResult.run_id == latest_run.id).distinct().all()
+    snapshot = RunSnapshot(columns)
 
     chain_analytics = {}
-    for (chain_id,) in chains:
-        chain_trades = db_session.query(models.TradeResult).filter(
-            models.TradeResult.run_id == latest_run.id,
-            models.TradeResult.chain == chain_id
-        ).all()
-
-        # Calculate chain-specific metrics
-        total_trades = len(chain_trades)
-        provider_wins = {}
-        provider_participations = {}
-
-        for trade in chain_trades:
-            valid_results = [
-                r for r in trade.provider_results if r.output_amount and r.status_code == 200]
-
-            # Count participations
-            for result in trade.provider_results:
-                if result.provider not in provider_participations:
-                    provider_participations[result.provider] = 0
-                if result.output_amount and result.status_code == 200:
-                    provider_participations[result.provider] += 1
-
-            # Determine winner
-            if valid_results:
-                winner = max(valid_results, key=lambda x: float(
-                    x.output_amount) if x.output_amount else 0)
-                if winner.provider not in provider_wins:
-                    provider_wins[winner.provider] = 0
-                provider_wins[winner.provider] += 1
-
+    for chain_id, group in snapshot.provider_stats(by="chain").items():
+        providers = group["providers"]
         chain_analytics[chain_id] = {
-            "total_trades": total_trades,
-            "provider_wins": provider_wins,
-            "provider_participations": provider_participations
+            "total_trades": group["trades"],
+            "provider_wins": {
+                provider: stats["wins"] for provider, stats in providers.items() if stats["wins"]
+            },
+            "provider_participations": {
+                provider: stats["successful_quotes"] for provider, stats in providers.items()
+            }
         }
 
     return {
@@ -303,80 +395,79 @@ def get_chain_performance(db_session: Session = Depends(get_db)):
     }
 
 
-@router.get("/pair-analysis")
-def get_pair_analysis(
+@router.get("/pair-analysis", response_class=FastJSONResponse)
+async def get_pair_analysis(
     chain: Optional[str] = None,
     pair_name: Optional[str] = None,
-    db_session: Session = Depends(get_db)
+    format: ResponseFormat = "rows",
+    db_session: AsyncSession = Depends(get_read_db)
 ):
     """Get detailed analysis for specific trading pairs"""
+    analysis = await _pair_analysis(db_session, chain, pair_name, format)
+    return FastJSONResponse(analysis)
+
 
-    latest_run = db_session.query(models.BenchmarkRun).order_by(
-        models.BenchmarkRun.id.desc()).first()
+async def _pair_analysis(db_session: AsyncSession, chain, pair_name, format: ResponseFormat = "rows"):
+    latest_run = await _target_run(db_session)
     if not latest_run:
         return {"error": "No benchmark runs found"}
 
-    # Build query
-    trades_query = db_session.query(models.TradeResult).filter(
-        models.TradeResult.run_id == latest_run.id)
-    if chain:
-        trades_query = trades_query.filter(models.TradeResult.chain == chain)
-    if pair_name:
-        trades_query = trades_query.filter(
-            models.TradeResult.pair == pair_name)
+    columns = await fetch_columns_async(
+        db_session, RunSnapshot.query([latest_run.id], chain=chain, pair=pair_name))
+    return await run_in_threadpool(_pair_analysis_from, columns, latest_run, chain, pair_name, format)
+
 
-    trades = trades_query.all()
+def _pair_analysis_from(columns, latest_run, chain, pair_name, format):
+    snapshot = RunSnapshot(columns)
 
-    if not trades:
+    if not snapshot.trade_count:
         return {"error": "No trades found for the specified criteria"}
 
+    outcomes = snapshot.outcomes()
+
     pair_analytics = {}
-    for trade in trades:
-        pair_key = f"{trade.chain}_{trade.pair}"
+    for idx in range(snapshot.trade_count):
+        trade_chain = snapshot.chains[snapshot.trade_chain[idx]]
+        trade_pair = snapshot.pairs[snapshot.trade_pair[idx]]
+
+        pair_key = f"{trade_chain}_{trade_pair}"
         if pair_key not in pair_analytics:
             pair_analytics[pair_key] = {
-                "chain": trade.chain,
-                "pair": trade.pair,
-                "from_token": trade.from_token,
-                "to_token": trade.to_token,
+                "chain": trade_chain,
+                "pair": trade_pair,
+                "from_token": snapshot.trade_from_token[idx],
+                "to_token": snapshot.trade_to_token[idx],
                 "trades": []
             }
 
         # Process each trade's results
         trade_data = {
-            "amount_usd": trade.amount_usd,
-            "input_amount": trade.input_amount,
+            "amount_usd": float(snapshot.trade_amount_usd[idx]),
+            "input_amount": snapshot.trade_input_amount[idx],
             "provider_results": {}
         }
 
-        valid_outputs = {}
-        for result in trade.provider_results:
-            trade_data["provider_results"][result.provider] = {
-                "output_amount": result.output_amount,
-                "elapsed_time": result.elapsed_time,
-                "status_code": result.status_code,
-                "error": result.error
+        for row in snapshot.trade_results(idx):
+            trade_data["provider_results"][snapshot.providers[snapshot.provider[row]]] = {
+                "output_amount": snapshot.output_raw[row],
+                "elapsed_time": _optional(snapshot.latency[row]),
+                "status_code": _optional(snapshot.status[row]),
+                "error": snapshot.error[row]
             }
 
-            if result.output_amount and result.status_code == 200:
-                valid_outputs[result.provider] = float(result.output_amount)
-
-        # Determine winner and calculate differences
-        if valid_outputs:
-            winner = max(valid_outputs.items(), key=lambda x: x[1])
-            trade_data["winner"] = winner[0]
-            trade_data["winning_amount"] = winner[1]
-
-            # Calculate output differences
-            sorted_outputs = sorted(valid_outputs.values(), reverse=True)
-            if len(sorted_outputs) > 1:
-                trade_data["output_diff"] = sorted_outputs[0] - \
-                    sorted_outputs[1]
-            else:
-                trade_data["output_diff"] = 0
+        # Winner and output differences
+        if outcomes["valid"][idx]:
+            trade_data["winner"] = snapshot.providers[outcomes["winner"][idx]]
+            trade_data["winning_amount"] = float(outcomes["best"][idx])
+            trade_data["output_diff"] = float(outcomes["diff"][idx])
+            trade_data["output_diff_usd"] = _optional(outcomes["diff_usd"][idx])
 
         pair_analytics[pair_key]["trades"].append(trade_data)
 
+    if format == "columns":
+        for pair in pair_analytics.values():
+            pair["trades"] = to_columns(pair["trades"])
+
     return {
         "run_id": latest_run.id,
         "run_date": latest_run.start_time,
@@ -385,57 +476,59 @@ def get_pair_analysis(
     }
 
 
-@router.get("/performance-summary")
-def get_performance_summary(db_session: Session = Depends(get_db)):
+@router.get("/performance-summary", response_class=FastJSONResponse)
+async def get_performance_summary(
+    format: ResponseFormat = "rows",
+    db_session: AsyncSession = Depends(get_read_db)
+):
     """Get comprehensive performance summary matching the original CSV structure"""
+    summary = await _performance_summary(db_session, format)
+    return FastJSONResponse(summary)
+
 
-    latest_run = db_session.query(models.BenchmarkRun).order_by(
-        models.BenchmarkRun.id.desc()).first()
+async def _performance_summary(db_session: AsyncSession, format: ResponseFormat = "rows"):
+    latest_run = await _target_run(db_session)
     if not latest_run:
         return {"error": "No benchmark runs found"}
 
     # Get all trades for the latest run
-    trades = db_session.query(models.TradeResult).filter(
-        models.TradeResult.run_id == latest_run.id).all()
+    columns = await fetch_columns_async(db_session, RunSnapshot.query([latest_run.id]))
+    return await run_in_threadpool(_performance_summary_from, columns, latest_run, format)
+
+
+def _performance_summary_from(columns, latest_run, format):
+    snapshot = RunSnapshot(columns)
+    outcomes = snapshot.outcomes()
 
     summary_data = []
-    for trade in trades:
+    for idx in range(snapshot.trade_count):
         trade_summary = {
-            "chain": trade.chain,
-            "pair": trade.pair,
-            "from_address": trade.from_token,
-            "to_address": trade.to_token,
-            "amount_usd": trade.amount_usd,
-            "input_amount": trade.input_amount
+            "chain": snapshot.chains[snapshot.trade_chain[idx]],
+            "pair": snapshot.pairs[snapshot.trade_pair[idx]],
+            "from_address": snapshot.trade_from_token[idx],
+            "to_address": snapshot.trade_to_token[idx],
+            "amount_usd": float(snapshot.trade_amount_usd[idx]),
+            "input_amount": snapshot.trade_input_amount[idx]
         }
 
         # Add provider-specific data
         provider_data = {}
-        valid_outputs = {}
-
-        for result in trade.provider_results:
-            provider_key = result.provider.lower().replace(" ", "_")
-            provider_data[f"{provider_key}_status"] = result.status_code
-            provider_data[f"{provider_key}_time"] = result.elapsed_time
-            provider_data[f"{provider_key}_output"] = result.output_amount
-
-            if result.output_amount and result.status_code == 200:
-                valid_outputs[result.provider] = float(result.output_amount)
-
-        # Calculate winner and differences
-        if valid_outputs:
-            winner = max(valid_outputs.items(), key=lambda x: x[1])
-            provider_data["better_rate"] = winner[0]
-
-            sorted_outputs = sorted(valid_outputs.values(), reverse=True)
-            if len(sorted_outputs) > 1:
-                provider_data["output_diff"] = sorted_outputs[0] - \
-                    sorted_outputs[1]
-            else:
-                provider_data["output_diff"] = 0
+
+        for row in snapshot.trade_results(idx):
+            key = provider_key(snapshot.providers[snapshot.provider[row]])
+            provider_data[f"{key}_status"] = _optional(snapshot.status[row])
+            provider_data[f"{key}_time"] = _optional(snapshot.latency[row])
+            provider_data[f"{key}_output"] = snapshot.output_raw[row]
+
+        # Winner and differences
+        if outcomes["valid"][idx]:
+            provider_data["better_rate"] = snapshot.providers[outcomes["winner"][idx]]
+            provider_data["output_diff"] = float(outcomes["diff"][idx])
+            provider_data["output_diff_usd"] = _optional(outcomes["diff_usd"][idx])
         else:
             provider_data["better_rate"] = "All Error"
             provider_data["output_diff"] = None
+            provider_data["output_diff_usd"] = None
 
         trade_summary.update(provider_data)
         summary_data.append(trade_summary)
@@ -444,5 +537,319 @@ def get_performance_summary(db_session: Session = Depends(get_db)):
         "run_id": latest_run.id,
         "run_date": latest_run.start_time,
         "total_trades": len(summary_data),
-        "detailed_results": summary_data
+        "detailed_results": to_columns(summary_data) if format == "columns" else summary_data
+    }
+
+
+@router.get("/route-analysis")
+async def get_route_analysis(
+    run_id: Optional[int] = None,
+    chain: Optional[str] = None,
+    db_session: AsyncSession = Depends(get_read_db)
+):
+    """Hop counts, DEXs used and route splits per provider, from the route summaries extracted at ingest"""
+    return await _route_analysis(db_session, run_id, chain)
+
+
+async def _route_analysis(db_session: AsyncSession, run_id, chain):
+    # Determine which run to analyze
+    target_run = await _target_run(db_session, run_id)
+
+    if not target_run:
+        return {"error": "No benchmark runs found"}
+
+    result = models.ProviderResult
+    leg = models.RouteLeg
+
+    hops_query = select(
+        result.provider, result.hop_count, func.count(result.id)
+    ).where(result.run_id == target_run.id, result.hop_count.isnot(None))
+
+    dex_query = select(
+        leg.provider,
+        leg.dex,
+        func.count(func.distinct(leg.trade_id)),
+        func.count(leg.id),
+        func.avg(leg.share)
+    ).where(leg.run_id == target_run.id)
+
+    # hops split over more than one venue
+    split_hops = select(
+        leg.provider, leg.trade_id
+    ).where(leg.run_id == target_run.id).group_by(
+        leg.provider, leg.trade_id, leg.hop).having(func.count(leg.id) > 1)
+
+    if chain:
+        hops_query = hops_query.join(models.TradeResult, models.TradeResult.id == result.trade_id).where(
+            models.TradeResult.chain == chain)
+        dex_query = dex_query.join(models.TradeResult, models.TradeResult.id == leg.trade_id).where(
+            models.TradeResult.chain == chain)
+        split_hops = split_hops.join(models.TradeResult, models.TradeResult.id == leg.trade_id).where(
+            models.TradeResult.chain == chain)
+
+    split_hops = split_hops.subquery()
+    split_query = select(
+        split_hops.c.provider, func.count(func.distinct(split_hops.c.trade_id))
+    ).group_by(split_hops.c.provider)
+
+    providers = {}
+
+    def provider_entry(provider):
+        return providers.setdefault(provider, {
+            "routed_quotes": 0,
+            "average_hops": None,
+            "hop_counts": {},
+            "split_quotes": 0,
+            "dexes": {}
+        })
+
+    for provider, hop_count, count in await db_session.execute(hops_query.group_by(result.provider, result.hop_count)):
+        entry = provider_entry(provider)
+        entry["hop_counts"][hop_count] = count
+        entry["routed_quotes"] += count
+
+    for entry in providers.values():
+        entry["average_hops"] = sum(
+            hops * count for hops, count in entry["hop_counts"].items()) / entry["routed_quotes"]
+
+    for provider, dex, quotes, legs, average_share in await db_session.execute(dex_query.group_by(leg.provider, leg.dex)):
+        provider_entry(provider)["dexes"][dex] = {
+            "quotes": quotes,
+            "legs": legs,
+            "average_share": average_share
+        }
+
+    for provider, count in await db_session.execute(split_query):
+        provider_entry(provider)["split_quotes"] = count
+
+    return {
+        "run_id": target_run.id,
+        "run_date": target_run.start_time,
+        "chain_filter": chain,
+        "providers": providers
+    }
+
+
+@router.get("/aggregate")
+async def get_aggregate(
+    runs: int = Query(10, ge=1, le=500, description="Number of latest runs to aggregate"),
+    chain: Optional[str] = None,
+    pair_name: Optional[str] = None,
+    db_session: AsyncSession = Depends(get_read_db)
+):
+    """Provider win rates, latency percentiles and win matrix across the latest runs and chains"""
+    return await _aggregate(db_session, runs, chain, pair_name)
+
+
+async def _aggregate(db_session: AsyncSession, runs, chain, pair_name):
+    run_ids = (await db_session.execute(select(models.BenchmarkRun.id).order_by(
+        models.BenchmarkRun.id.desc()).limit(runs))).scalars().all()
+    if not run_ids:
+        return {"error": "No benchmark runs found"}
+
+    columns = await fetch_columns_async(db_session, RunSnapshot.query(run_ids, chain=chain, pair=pair_name))
+    return await run_in_threadpool(_aggregate_from, columns, run_ids, chain, pair_name)
+
+
+def _aggregate_from(columns, run_ids, chain, pair_name):
+    snapshot = RunSnapshot(columns)
+    if not snapshot.trade_count:
+        return {"error": "No trades found for the specified criteria"}
+
+    by_chain = {
+        chain_id: _provider_analytics(group["providers"], group["trades"])
+        for chain_id, group in snapshot.provider_stats(by="chain").items()
+    }
+    by_run = {
+        run_id: _provider_analytics(group["providers"], group["trades"])
+        for run_id, group in snapshot.provider_stats(by="run").items()
+    }
+
+    return {
+        "run_ids": run_ids,
+        "filters": {"chain": chain, "pair_name": pair_name},
+        "total_trades_analyzed": snapshot.trade_count,
+        "provider_analytics": _provider_analytics(
+            snapshot.provider_stats()[None]["providers"], snapshot.trade_count),
+        "chain_analytics": by_chain,
+        "run_analytics": by_run,
+        "latency_percentiles": snapshot.latency_percentiles(),
+        "win_matrix": snapshot.win_matrix()
+    }
+
+
+@router.get("/rollups")
+async def get_rollups(
+    chain: Optional[str] = None,
+    pair_name: Optional[str] = None,
+    days: int = Query(365, ge=1, description="How far back to look"),
+    db_session: AsyncSession = Depends(get_read_db)
+):
+    """Win rates and response times of downsampled runs (see the retention job)"""
+    return await _rollups(db_session, chain, pair_name, days)
+
+
+async def _rollups(db_session: AsyncSession, chain, pair_name, days):
+    rollup = models.ProviderRollup
+    since = datetime.utcnow() - timedelta(days=days)
+
+    query = select(
+        rollup.provider,
+        func.count(func.distinct(rollup.run_id)),
+        func.sum(rollup.quotes),
+        func.sum(rollup.successful_quotes),
+        func.sum(rollup.wins),
+        # weight the per amount averages by their successful quotes
+        func.sum(rollup.average_response_time * rollup.successful_quotes),
+    ).where(rollup.run_date >= since)
+
+    if chain:
+        query = query.where(rollup.chain == chain)
+    if pair_name:
+        query = query.where(rollup.pair == pair_name)
+
+    providers = {}
+    for provider, runs, quotes, successful, wins, response_time_total in await db_session.execute(
+            query.group_by(rollup.provider)):
+        providers[provider_key(provider)] = {
+            "runs": runs,
+            "quotes": quotes,
+            "successful_quotes": successful,
+            "wins": wins,
+            "success_rate": successful / quotes if quotes else 0,
+            "average_response_time": response_time_total / successful if successful and response_time_total else None,
+        }
+
+    return {
+        "since": since,
+        "chain": chain,
+        "pair": pair_name,
+        "providers": providers
+    }
+
+
+@router.get("/latency-by-vantage")
+async def get_latency_by_vantage(
+    chain: Optional[str] = None,
+    provider: Optional[str] = None,
+    days: int = Query(7, ge=1, le=365, description="How far back to look"),
+    db_session: AsyncSession = Depends(get_read_db)
+):
+    """Response time percentiles per vantage point (where runner agents quote from) and provider"""
+    return await _latency_by_vantage(db_session, chain, provider, days)
+
+
+async def _latency_by_vantage(db_session: AsyncSession, chain, provider, days):
+    run = models.BenchmarkRun.__table__
+    trade = models.TradeResult.__table__
+    result = models.ProviderResult.__table__
+    since = datetime.utcnow() - timedelta(days=days)
+
+    # runs from before vantage points were sent from the central runner
+    vantage_point = func.coalesce(run.c.vantage_point, settings.vantage_point)
+
+    query = (
+        select(vantage_point, result.c.provider, result.c.elapsed_time, successful_quote(result), run.c.id)
+        .select_from(
+            result
+            .join(trade, trade.c.id == result.c.trade_id)
+            .join(run, run.c.id == trade.c.run_id)
+        )
+        .where(run.c.start_time >= since)
+    )
+    if chain:
+        query = query.where(trade.c.chain == chain)
+    if provider:
+        query = query.where(result.c.provider == provider)
+
+    columns = await fetch_columns_async(db_session, query)
+    if not columns[0]:
+        return {"error": "No provider results found for the specified criteria"}
+
+    return await run_in_threadpool(_latency_by_vantage_from, columns, since, chain, provider)
+
+
+def _latency_by_vantage_from(columns, since, chain, provider):
+    vantages, providers, latencies, successes, run_ids = columns
+
+    vantages = np.asarray(vantages, dtype=object)
+    providers = np.asarray(providers, dtype=object)
+    latency = np.asarray([np.nan if value is None else value for value in latencies], dtype=np.float64)
+    success = np.asarray(successes, dtype=bool) & ~np.isnan(latency)
+    run_ids = np.asarray(run_ids)
+
+    by_vantage = {}
+    for vantage in sorted(set(vantages)):
+        of_vantage = vantages == vantage
+        vantage_providers = {}
+
+        for name in sorted(set(providers[of_vantage])):
+            of_provider = of_vantage & (providers == name)
+            values = latency[of_provider & success]
+            quotes = int(of_provider.sum())
+
+            vantage_providers[name] = {
+                "quotes": quotes,
+                "successful_quotes": len(values),
+                "success_rate": len(values) / quotes * 100 if quotes else 0,
+                "average_response_time": float(values.mean()) if len(values) else None,
+                **dict(zip(
+                    (f"p{percentile}" for percentile in VANTAGE_PERCENTILES),
+                    np.percentile(values, VANTAGE_PERCENTILES).tolist() if len(values) else [None] * len(VANTAGE_PERCENTILES)
+                )),
+            }
+
+        by_vantage[vantage] = {
+            "runs": len(set(run_ids[of_vantage].tolist())),
+            "providers": vantage_providers,
+        }
+
+    return {
+        "since": since,
+        "filters": {"chain": chain, "provider": provider},
+        "vantage_points": by_vantage,
+    }
+
+
+@router.get("/compare")
+async def get_compare(
+    base: int = Query(..., description="Run to compare against"),
+    head: int = Query(..., description="Run to compare"),
+    chain: Optional[str] = None,
+    db_session: AsyncSession = Depends(get_read_db)
+):
+    """Per provider win rate, output and latency changes between two runs, and the trades whose winner flipped"""
+    return await _compare(db_session, base, head, chain)
+
+
+async def _compare(db_session: AsyncSession, base, head, chain):
+    cache_key = (base, head, chain)
+    with _compare_cache_lock:
+        if cache_key in _compare_cache:
+            _compare_cache.move_to_end(cache_key)
+            return _compare_cache[cache_key]
+
+    runs = {
+        run.id: run for run in (await db_session.execute(select(models.BenchmarkRun).where(
+            models.BenchmarkRun.id.in_([base, head])))).scalars()
     }
+    if base not in runs or head not in runs:
+        return {"error": "Run not found"}
+
+    rows = (await db_session.execute(compare_query(base, head, chain))).all()
+
+    comparison = {
+        "base": {"run_id": base, "run_date": runs[base].start_time},
+        "head": {"run_id": head, "run_date": runs[head].start_time},
+        "chain_filter": chain,
+        **await run_in_threadpool(compare_rows, rows)
+    }
+
+    # runs still going (or already rolled up by retention) would change under the cache
+    if all(runs[run_id].end_time and not runs[run_id].downsampled_at for run_id in (base, head)):
+        with _compare_cache_lock:
+            _compare_cache[cache_key] = comparison
+            while len(_compare_cache) > COMPARE_CACHE_SIZE:
+                _compare_cache.popitem(last=False)
+
+    return comparison
@@ -1,38 +1,119 @@
-from fastapi import APIRouter, Depends
+import hmac
+import time
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..models import models
-from ..core.database import get_db
+from ..core.codec import dumps
+from ..core.config import settings
+from ..core.database import get_db, get_read_db, read_session
+from ..core.events import event_bus, get_event_bridge
+from ..core.ingest import IngestError, decode_batch, ingest_batch, ingested_batch
+
+# seconds between keep-alives (or stall warnings) of quiet streams
+STREAM_HEARTBEAT = 15
 
 router = APIRouter()
 
 
 @router.get("/")
-def get_all_runs(db_session: Session = Depends(get_db)):
+async def get_all_runs(db_session: AsyncSession = Depends(get_read_db)):
     """Get all benchmark runs"""
-    runs = db_session.query(models.BenchmarkRun).order_by(
-        models.BenchmarkRun.id.desc()).all()
+    return await _all_runs(db_session)
+
+
+async def _all_runs(db_session: AsyncSession):
+    run = models.BenchmarkRun
+    trade = models.TradeResult
+
+    # trades are counted in the query, async sessions can't lazy load run.trades
+    runs = await db_session.execute(
+        select(run.id, run.start_time, run.end_time, func.count(trade.id))
+        .outerjoin(trade, trade.run_id == run.id)
+        .group_by(run.id)
+        .order_by(run.id.desc())
+    )
 
     return [
         {
-            "id": run.id,
-            "start_time": run.start_time,
-            "end_time": run.end_time,
-            "trade_count": len(run.trades)
+            "id": run_id,
+            "start_time": start_time,
+            "end_time": end_time,
+            "trade_count": trade_count
         }
-        for run in runs
+        for run_id, start_time, end_time, trade_count in runs
     ]
 
 
+@router.post("/ingest")
+async def ingest_results(request: Request, db_session: Session = Depends(get_db)):
+    """
+    Store a batch of trade and provider results uploaded by a runner agent
+    (BENCHMARK_INGEST_URL), optionally gzip, deflate or br compressed.
+    Needs `Authorization: Bearer <BENCHMARK_INGEST_TOKEN>`. Batches are
+    idempotent through their batch key: uploading one again answers
+    "duplicate" without storing anything.
+    """
+
+    if not settings.ingest_token:
+        return JSONResponse({"error": "Ingest is disabled (BENCHMARK_INGEST_TOKEN is not set)"}, status_code=403)
+    authorization = request.headers.get("authorization", "").encode()
+    if not hmac.compare_digest(authorization, f"Bearer {settings.ingest_token}".encode()):
+        return JSONResponse({"error": "Invalid ingest token"}, status_code=401)
+
+    try:
+        batch = await run_in_threadpool(decode_batch, await request.body(), request.headers.get("content-encoding"))
+    except IngestError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status)
+
+    # decoding and inserting run in the threadpool, off the event loop
+    return await run_in_threadpool(_ingest, db_session, batch)
+
+
+def _ingest(db_session: Session, batch: dict):
+    try:
+        answer = ingest_batch(db_session, batch)
+        db_session.commit()
+    except IntegrityError:
+        # the same batch committed concurrently
+        db_session.rollback()
+        answer = ingested_batch(db_session, batch["batch_key"])
+        if answer is None:
+            raise
+
+    return answer
+
+
 @router.get("/{run_id}")
-def get_run_details(run_id: int, db_session: Session = Depends(get_db)):
+async def get_run_details(run_id: int, db_session: AsyncSession = Depends(get_read_db)):
     """Get detailed information about a specific run"""
-    run = db_session.query(models.BenchmarkRun).filter(
-        models.BenchmarkRun.id == run_id).first()
+    return await _run_details(db_session, run_id)
+
+
+async def _run_details(db_session: AsyncSession, run_id: int):
+    run = await db_session.get(models.BenchmarkRun, run_id)
 
     if not run:
         return {"error": "Run not found"}
 
+    trades = (await db_session.execute(
+        select(models.TradeResult).where(models.TradeResult.run_id == run_id).order_by(models.TradeResult.id)
+    )).scalars().all()
+
+    # counted in the query, async sessions can't lazy load trade.provider_results
+    result_counts = dict((await db_session.execute(
+        select(models.ProviderResult.trade_id, func.count(models.ProviderResult.id))
+        .join(models.TradeResult, models.TradeResult.id == models.ProviderResult.trade_id)
+        .where(models.TradeResult.run_id == run_id)
+        .group_by(models.ProviderResult.trade_id)
+    )).all())
+
     return {
         "id": run.id,
         "start_time": run.start_time,
@@ -46,8 +127,94 @@ def get_run_details(run_id: int, db_session: Session = Depends(get_db)):
                 "to_token": trade.to_token,
                 "amount_usd": trade.amount_usd,
                 "input_amount": trade.input_amount,
-                "provider_results_count": len(trade.provider_results)
+                "provider_results_count": result_counts.get(trade.id, 0)
             }
-            for trade in run.trades
+            for trade in trades
         ]
     }
+
+
+@router.get("/{run_id}/stream")
+async def stream_run_progress(run_id: int, request: Request):
+    """
+    Server-Sent Events of a run's progress while it goes: "started",
+    "progress" (completed/total quotes, quotes per second, ETA and error
+    rate per provider), then "completed" or "failed". Runs quiet for
+    BENCHMARK_STALL_SECONDS get "stalled" events.
+
+    Runs in other processes are only seen with BENCHMARK_EVENT_BRIDGE=postgres,
+    without it a stalled stream checks whether the run has ended meanwhile.
+    The stream holds no database session: each lookup uses a short-lived one.
+    """
+
+    bridge = get_event_bridge()
+    if bridge:
+        bridge.start_listener()
+
+    subscription = event_bus.subscribe(run_id)
+    latest = event_bus.latest(run_id)
+
+    if latest is None:
+        run = await _run_status(run_id)
+        if run is None:
+            subscription.close()
+            return {"error": "Run not found"}
+        if run["end_time"] is not None:
+            latest = {"type": "completed", "run_id": run_id, **run}
+
+    async def events():
+        try:
+            if latest is not None:
+                yield _sse(latest)
+                if latest["type"] in ("completed", "failed"):
+                    return
+
+            last_event = time.monotonic()
+
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=STREAM_HEARTBEAT)
+
+                if event is None:
+                    idle = time.monotonic() - last_event
+                    if idle >= settings.stall_seconds:
+                        run = await _run_status(run_id)
+                        if run is not None and run["end_time"] is not None:
+                            yield _sse({"type": "completed", "run_id": run_id, **run})
+                            return
+                        yield _sse({"type": "stalled", "run_id": run_id, "idle_seconds": idle})
+                    else:
+                        yield ": keep-alive\n\n"
+                    continue
+
+                last_event = time.monotonic()
+                yield _sse(event)
+
+                if event["type"] in ("completed", "failed"):
+                    return
+
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {dumps(event)}\n\n"
+
+
+async def _run_status(run_id: int):
+    # a fresh session per lookup, closed before the stream goes on
+    async with read_session() as db_session:
+        run = await db_session.get(models.BenchmarkRun, run_id)
+
+        if not run:
+            return None
+
+        return {
+            "start_time": run.start_time.isoformat() if run.start_time else None,
+            "end_time": run.end_time.isoformat() if run.end_time else None,
+        }
@@ -1,9 +1,17 @@
 from fastapi import APIRouter
 
+from ..core.database import get_pool_stats
+
 router = APIRouter()
 
 
 @router.get("/", tags=["health"])
-def health_check():
-    """Health check endpoint"""
+async def health_check():
+    """Health check endpoint, served on the event loop so busy threadpool routes can't hold it up"""
     return {"status": "ok"}
+
+
+@router.get("/db", tags=["health"])
+async def database_pool_stats():
+    """Database engine profile and connection pool statistics"""
+    return get_pool_stats()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+
+import pytest
+
+
+# set before `src` is imported: provider settings are required and the
+# database engine is created on import
+os.environ.setdefault("GLUEX_API_KEY", "test")
+os.environ.setdefault("GLUEX_URL", "http://gluex.test")
+os.environ.setdefault("GLUEX_UNIQUE_PID", "test")
+os.environ.setdefault("LIQDSWAP_URL", "http://liqdswap.test")
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    """Sessions on fresh SQLite databases (eg: an agent's spool and the central one)"""
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from src.core.database import Base, engine_options
+    from src.models import models  # noqa: F401 (registers the tables)
+
+    sessions = []
+
+    def make(name: str = "benchmark"):
+        url = f"sqlite:///{tmp_path / name}.db"
+        engine = create_engine(url, **engine_options(url))
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        sessions.append(session)
+        return session
+
+    yield make
+
+    for session in sessions:
+        session.close()
+        session.get_bind().dispose()
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from src.core.executor import DispatchGroup, QuoteExecutor, QuoteJob
+from src.providers.base import BaseProvider, QuoteResult
+
+
+class StubProvider(BaseProvider):
+    def __init__(self, name: str, delay: float = 0.0):
+        super().__init__()
+        self._name = name
+        self.delay = delay
+        self.requested_at = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def supported_chains(self):
+        return ["999"]
+
+    def get_quote(self, chain, from_token, to_token, from_amount, user_address=None):
+        self.requested_at = time.perf_counter()
+        time.sleep(self.delay)
+        return QuoteResult(provider=self.name, status_code=200, output_amount="1")
+
+
+def _job(provider: BaseProvider, dispatch: DispatchGroup = None, priority: int = 0) -> QuoteJob:
+    return QuoteJob(
+        chain_id="999",
+        pair={"name": "A->B", "input_token_address": "0xa", "output_token_address": "0xb"},
+        amount={"usd": 10},
+        provider=provider,
+        token_amount="1000",
+        priority=priority,
+        dispatch=dispatch,
+    )
+
+
+def _wait_in_thread(group: DispatchGroup) -> threading.Thread:
+    thread = threading.Thread(target=group.wait)
+    thread.start()
+    return thread
+
+
+def test_queued_group_does_not_wait():
+    group = DispatchGroup(3, synchronized=False)
+    assert not group.synchronized
+
+    start = time.perf_counter()
+    group.wait()
+    assert time.perf_counter() - start < 0.1
+
+
+def test_single_request_is_never_synchronized():
+    assert not DispatchGroup(1, synchronized=True).synchronized
+
+
+def test_synchronized_group_waits_for_every_request():
+    group = DispatchGroup(2, synchronized=True, timeout=5)
+
+    first = _wait_in_thread(group)
+    first.join(0.1)
+    assert first.is_alive()
+
+    group.wait()
+    first.join(1)
+    assert not first.is_alive()
+
+
+def test_barrier_timeout_lets_requests_go_ahead():
+    group = DispatchGroup(3, synchronized=True, timeout=0.05)
+
+    start = time.perf_counter()
+    group.wait()
+    assert time.perf_counter() - start < 1
+
+
+def test_abort_releases_waiting_requests():
+    group = DispatchGroup(2, synchronized=True, timeout=5)
+
+    waiting = _wait_in_thread(group)
+    waiting.join(0.05)
+    group.abort()
+    waiting.join(1)
+    assert not waiting.is_alive()
+
+
+def test_skew_is_relative_to_the_first_request():
+    group = DispatchGroup(2)
+    assert group.skew("GlueX") is None
+
+    group.dispatched("GlueX")
+    time.sleep(0.01)
+    group.dispatched("Liqdswap")
+
+    assert group.skew("GlueX") == 0
+    assert group.skew("Liqdswap") >= 0.01
+    assert group.skew("Other") is None
+
+
+def test_executor_sends_synchronized_requests_together():
+    providers = [StubProvider("GlueX"), StubProvider("Liqdswap")]
+    group = DispatchGroup(len(providers), synchronized=True, timeout=5)
+
+    with QuoteExecutor(max_workers=2, max_pending=8) as executor:
+        # the second job is only picked up once the blocker has run
+        blocker = executor.submit(_job(StubProvider("Blocker", delay=0.1), priority=-1))
+        futures = [executor.submit(_job(provider, group)) for provider in providers]
+        results = [future.result(5) for future in futures]
+        blocker.result(5)
+
+    assert all(result.successful for result in results)
+    assert abs(providers[0].requested_at - providers[1].requested_at) < 0.05
+    assert group.skew("GlueX") is not None and group.skew("Liqdswap") is not None
+
+
+def test_cancelled_request_does_not_hold_back_its_group():
+    gluex, liqdswap = StubProvider("GlueX"), StubProvider("Liqdswap")
+    group = DispatchGroup(2, synchronized=True, timeout=5)
+
+    with QuoteExecutor(max_workers=2, max_pending=8) as executor:
+        blocker = executor.submit(_job(StubProvider("Blocker", delay=0.2), priority=-1))
+        # one worker waits at the barrier, the other reaches the cancelled job after the blocker
+        waiting = executor.submit(_job(gluex, group))
+        cancelled = executor.submit(_job(liqdswap, group, priority=1))
+        assert executor.cancel(lambda job: job.provider is liqdswap) == 1
+
+        start = time.perf_counter()
+        assert waiting.result(4).successful
+        blocker.result(4)
+
+    assert cancelled.cancelled()
+    assert liqdswap.requested_at is None
+    # released by the abort, not the barrier timeout
+    assert time.perf_counter() - start < 2
@@ -0,0 +1,170 @@
+import gzip
+import zlib
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from src.core import ingest
+from src.core.codec import dumpb
+from src.core.config import settings
+from src.core.ingest import IngestError, build_batches, decode_batch, ingest_batch
+from src.models import BenchmarkRun, IngestBatch, PriceSnapshot, ProviderResult, RouteLeg, TradeResult
+
+
+BATCH = {
+    "version": ingest.INGEST_VERSION,
+    "batch_key": "gha-us-east:1:20260101T000000000000:0",
+    "run": {"run_key": "gha-us-east:1:20260101T000000000000"},
+    "trades": [],
+}
+
+
+@pytest.mark.parametrize("encoding, compress", [
+    (None, lambda body: body),
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+])
+def test_decode_batch(encoding, compress):
+    assert decode_batch(compress(dumpb(BATCH)), encoding) == BATCH
+
+
+def test_decode_brotli_batch():
+    if ingest.brotli is None:
+        pytest.skip("brotli is not installed")
+    assert decode_batch(ingest.brotli.compress(dumpb(BATCH)), "br") == BATCH
+
+
+@pytest.mark.parametrize("body, encoding, status", [
+    (dumpb(BATCH), "zstd", 415),
+    (b"not gzip", "gzip", 400),
+    (b"not json", None, 400),
+    (dumpb({**BATCH, "version": ingest.INGEST_VERSION + 1}), None, 400),
+    (dumpb({key: value for key, value in BATCH.items() if key != "trades"}), None, 400),
+    (dumpb({**BATCH, "run": {}}), None, 400),
+])
+def test_decode_batch_rejects(body, encoding, status):
+    with pytest.raises(IngestError) as error:
+        decode_batch(body, encoding)
+    assert error.value.status == status
+
+
+def test_decode_batch_limits_the_decompressed_size(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_max_bytes", 1024)
+    body = gzip.compress(dumpb({**BATCH, "padding": "x" * 4096}))
+
+    # well under the limit compressed, over it once decompressed
+    assert len(body) < 1024
+    with pytest.raises(IngestError) as error:
+        decode_batch(body, "gzip")
+    assert error.value.status == 413
+
+
+@pytest.fixture
+def spooled_run(make_session):
+    """An agent's run: 5 trades, 2 provider results each, one with a route"""
+
+    spool = make_session("spool")
+    run = BenchmarkRun(start_time=datetime(2026, 1, 1), end_time=datetime(2026, 1, 1, 0, 5), vantage_point="gha-us-east")
+    spool.add(run)
+    spool.flush()
+
+    for index in range(5):
+        trade = TradeResult(run_id=run.id, chain="999", pair=f"T{index}->USDC", amount_usd=100.0, input_amount="1000")
+        spool.add(trade)
+        spool.flush()
+        for provider in ("GlueX", "Liqdswap"):
+            spool.add(ProviderResult(
+                trade_id=trade.id, run_id=run.id, provider=provider, output_amount="1.5",
+                status_code=200, raw_response={"ok": True}, hop_count=1, dex_count=1,
+            ))
+        spool.add(RouteLeg(run_id=run.id, trade_id=trade.id, provider="GlueX", hop=0, dex="uni", share=1.0))
+
+    spool.add(PriceSnapshot(run_id=run.id, chain="999", token="0xusdc", symbol="USDC", price_usd=1.0, fetched_at=datetime(2026, 1, 1)))
+    spool.commit()
+
+    # uploaded as json, like upload_run does
+    return [decode_batch(dumpb(batch), None) for batch in build_batches(spool, run.id, batch_size=2)]
+
+
+def _count(db_session, model) -> int:
+    return db_session.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def _ingest(db_session, batches):
+    answers = []
+    for batch in batches:
+        answers.append(ingest_batch(db_session, batch))
+        db_session.commit()
+    return answers
+
+
+def test_build_batches_splits_the_run(spooled_run):
+    assert [len(batch["trades"]) for batch in spooled_run] == [2, 2, 1]
+    assert len({batch["batch_key"] for batch in spooled_run}) == 3
+    assert "price_snapshots" in spooled_run[0] and "price_snapshots" not in spooled_run[1]
+    assert [bool(batch["run"]["end_time"]) for batch in spooled_run] == [False, False, True]
+
+
+def test_ingest_batches_into_one_run(make_session, spooled_run):
+    central = make_session("central")
+    answers = _ingest(central, spooled_run)
+
+    assert {answer["status"] for answer in answers} == {"ingested"}
+    assert len({answer["run_id"] for answer in answers}) == 1
+
+    run = central.get(BenchmarkRun, answers[0]["run_id"])
+    assert run.vantage_point == "gha-us-east"
+    assert run.end_time == datetime(2026, 1, 1, 0, 5)
+    assert (_count(central, TradeResult), _count(central, ProviderResult), _count(central, RouteLeg)) == (5, 10, 5)
+    assert _count(central, PriceSnapshot) == 1
+
+
+def test_ingest_is_idempotent(make_session, spooled_run):
+    central = make_session("central")
+    first = _ingest(central, spooled_run)
+
+    # eg: the agent retrying the whole upload after a lost response
+    again = _ingest(central, spooled_run)
+
+    assert {answer["status"] for answer in again} == {"duplicate"}
+    assert [(answer["run_id"], answer["trades"], answer["provider_results"]) for answer in again] == [
+        (answer["run_id"], answer["trades"], answer["provider_results"]) for answer in first
+    ]
+    assert (_count(central, TradeResult), _count(central, ProviderResult), _count(central, RouteLeg)) == (5, 10, 5)
+    assert (_count(central, BenchmarkRun), _count(central, IngestBatch)) == (1, 3)
+
+
+def test_resumed_upload_only_adds_missing_batches(make_session, spooled_run):
+    central = make_session("central")
+    _ingest(central, spooled_run[:2])
+
+    answers = _ingest(central, spooled_run)
+
+    assert [answer["status"] for answer in answers] == ["duplicate", "duplicate", "ingested"]
+    assert _count(central, TradeResult) == 5
+    assert _count(central, BenchmarkRun) == 1
+
+
+def test_concurrently_created_run_is_shared(make_session, spooled_run, monkeypatch):
+    central = make_session("central")
+    other = make_session("central")
+
+    reserve_run_id = ingest.reserve_run_id
+
+    def other_batch_first(bind):
+        # the run's other batch creates the run between our lookup and insert
+        monkeypatch.setattr(ingest, "reserve_run_id", reserve_run_id)
+        ingest_batch(other, spooled_run[1])
+        other.commit()
+        return reserve_run_id(bind)
+
+    monkeypatch.setattr(ingest, "reserve_run_id", other_batch_first)
+    answer = ingest_batch(central, spooled_run[0])
+    central.commit()
+
+    assert answer["status"] == "ingested"
+    assert _count(central, BenchmarkRun) == 1
+    assert _count(central, TradeResult) == 4
+
+    assert {answer["run_id"] for answer in _ingest(central, spooled_run)} == {answer["run_id"]}
@@ -0,0 +1,70 @@
+import threading
+
+from src.core import metrics
+from src.core.metrics import Counter, Histogram, Registry, RunWindow
+
+
+def test_snapshots_are_copies():
+    registry = Registry()
+    counter = Counter("test_sent", "Sent", ["provider"], registry=registry)
+    histogram = Histogram("test_latency", "Latency", ["provider"], buckets=(0.1, 1.0), registry=registry)
+
+    counter.labels(provider="GlueX").inc()
+    histogram.labels(provider="GlueX").observe(0.5)
+    snapshot = registry.snapshot()
+
+    counter.labels(provider="GlueX").inc()
+    histogram.labels(provider="GlueX").observe(0.5)
+
+    assert snapshot["test_sent"] == {("GlueX",): 1.0}
+    assert snapshot["test_latency"] == {("GlueX",): [0, 1, 0, 0.5, 1]}
+    assert counter.snapshot() == {("GlueX",): 2.0}
+
+
+def test_counter_snapshot_while_incrementing():
+    counter = Counter("test_busy", "Busy", ["provider"], registry=Registry())
+    stop = threading.Event()
+
+    def increment():
+        index = 0
+        while not stop.is_set():
+            counter.labels(provider=f"p{index % 1000}").inc()
+            index += 1
+
+    worker = threading.Thread(target=increment)
+    worker.start()
+    try:
+        for _ in range(200):
+            # iterating over a dict growing underneath would raise
+            sum(counter.snapshot().values())
+    finally:
+        stop.set()
+        worker.join()
+
+
+def test_run_windows_count_overlapping_runs():
+    first = RunWindow()
+    second = RunWindow()
+    second.close()
+    third = RunWindow()
+    first.close()
+    third.close()
+
+    assert (first.overlapping_runs, second.overlapping_runs, third.overlapping_runs) == (2, 1, 1)
+    fourth = RunWindow()
+    fourth.close()
+    assert fourth.overlapping_runs == 0
+
+
+def test_run_summary_only_counts_the_window(capsys):
+    metrics.QUOTES_SENT.labels(provider="Summary").inc(5)
+    window = RunWindow()
+    metrics.QUOTES_SENT.labels(provider="Summary").inc(2)
+    metrics.QUOTES_FAILED.labels(provider="Summary", status="500").inc()
+
+    metrics.print_run_summary(7, window)
+
+    output = capsys.readouterr().out
+    assert "Run #7 metrics" in output
+    assert "quotes Summary: sent=2 failed={'500': 1}" in output
+    assert "overlapped" not in output
@@ -0,0 +1,48 @@
+import pytest
+
+import src.providers.gluex as gluex_module
+import src.providers.liqdswap as liqdswap_module
+from src.core.runner import TOKEN_DECIMALS
+from src.providers.gluex import GluexProvider
+from src.providers.liqdswap import LiqdswapProvider
+
+
+TOKEN = next(iter(TOKEN_DECIMALS))
+
+
+class StubResponse:
+    headers = {"content-type": "text/html"}
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+
+    def raise_for_status(self):
+        pass
+
+
+class StubSession:
+    def __init__(self, response: StubResponse):
+        self.response = response
+
+    def get(self, *args, **kwargs):
+        return self.response
+
+    post = get
+
+
+@pytest.mark.parametrize("module, provider_class", [
+    (gluex_module, GluexProvider),
+    (liqdswap_module, LiqdswapProvider),
+])
+def test_undecodable_response_keeps_its_status(monkeypatch, module, provider_class):
+    response = StubResponse(200, "<html>maintenance</html>")
+    monkeypatch.setattr(module, "get_http_session", lambda: StubSession(response))
+
+    quote = provider_class().get_quote("999", TOKEN, TOKEN, 10 ** 18, "0xuser")
+
+    assert not quote.successful
+    assert quote.status_code == 200
+    assert "decode" in quote.error
+    assert quote.raw_response == response.text
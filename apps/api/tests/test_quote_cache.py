@@ -0,0 +1,206 @@
+import threading
+import time
+
+import pytest
+
+from src.core.quote_cache import MemoryQuoteStore, QuoteCache, SqliteQuoteStore, quote_key
+from src.providers.base import QuoteResult
+
+
+KEY = quote_key("GlueX", "999", "0xIn", "0xOut", 10 ** 18)
+
+
+def _quote(status_code: int = 200) -> QuoteResult:
+    if status_code != 200:
+        return QuoteResult(provider="GlueX", status_code=status_code, error="failed")
+    return QuoteResult(provider="GlueX", status_code=200, output_amount="1.5")
+
+
+def test_quote_key_normalizes_tokens_and_amount():
+    assert quote_key("GlueX", 999, "0xIN", "0xOUT", 10) == ("GlueX", "999", "0xin", "0xout", "10")
+
+
+def test_concurrent_requests_are_fetched_once():
+    cache = QuoteCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return _quote()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch(KEY, fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # let the followers queue up on the leader's request
+    while cache.coalesced + cache.misses < 8:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 7)
+    assert sorted(quote.cached for quote in results) == [False] + [True] * 7
+    assert {quote.output_amount for quote in results} == {"1.5"}
+
+
+def test_successful_quotes_are_reused_within_ttl():
+    cache = QuoteCache(ttl=60)
+    cache.get_or_fetch(KEY, _quote)
+
+    quote = cache.get_or_fetch(KEY, lambda: pytest.fail("should be cached"))
+    assert quote.cached and cache.hits == 1
+
+
+def test_failed_quotes_are_not_cached():
+    cache = QuoteCache(ttl=60)
+    cache.get_or_fetch(KEY, lambda: _quote(500))
+
+    assert not cache.get_or_fetch(KEY, _quote).cached
+    assert cache.misses == 2
+
+
+def test_fetch_errors_reach_every_caller_and_clear_the_flight():
+    cache = QuoteCache(ttl=60)
+
+    def fetch():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch(KEY, fetch)
+
+    assert cache.get_or_fetch(KEY, _quote).successful
+
+
+def test_memory_store_expires_quotes():
+    store = MemoryQuoteStore()
+    store.set(KEY, _quote())
+
+    assert store.get(KEY, ttl=60) is not None
+    assert store.get(KEY, ttl=0) is None
+
+
+@pytest.fixture
+def quote_db(tmp_path):
+    return tmp_path / "quotes.db"
+
+
+def test_sqlite_store_round_trips_quotes(quote_db):
+    SqliteQuoteStore(quote_db).set(KEY, _quote())
+
+    assert SqliteQuoteStore(quote_db).get(KEY, ttl=60) == _quote()
+
+
+def test_sqlite_lease_is_held_by_one_process(quote_db):
+    first, second = SqliteQuoteStore(quote_db), SqliteQuoteStore(quote_db)
+
+    lease = first.acquire_lease(KEY, 60)
+    assert lease is not None
+    assert second.acquire_lease(KEY, 60) is None
+
+    first.release_lease(KEY, lease)
+    assert second.acquire_lease(KEY, 60) is not None
+
+
+def test_sqlite_expired_lease_can_be_taken_over(quote_db):
+    first, second = SqliteQuoteStore(quote_db), SqliteQuoteStore(quote_db)
+
+    stale = first.acquire_lease(KEY, -1)
+    lease = second.acquire_lease(KEY, 60)
+    assert lease is not None
+
+    # releasing the expired lease leaves the new holder's alone
+    first.release_lease(KEY, stale)
+    assert first.acquire_lease(KEY, 60) is None
+
+
+class SteppedStore(SqliteQuoteStore):
+    """
+    Plays the other process at exact points: `steps` maps a store method
+    to the actions run before each of its calls, in order (None: nothing)
+    """
+
+    def __init__(self, path, steps):
+        super().__init__(path)
+        self.steps = steps
+
+    def _step(self, method: str):
+        actions = self.steps.get(method)
+        action = actions.pop(0) if actions else None
+        if action is not None:
+            action()
+
+    def get(self, key, ttl):
+        self._step("get")
+        return super().get(key, ttl)
+
+    def acquire_lease(self, key, seconds):
+        self._step("acquire_lease")
+        return super().acquire_lease(key, seconds)
+
+
+@pytest.fixture
+def other_process(quote_db):
+    """Another process holding the lease, `finish` caches its quote and releases it"""
+
+    store = SqliteQuoteStore(quote_db)
+    lease = store.acquire_lease(KEY, 60)
+
+    def finish():
+        store.set(KEY, _quote())
+        store.release_lease(KEY, lease)
+
+    return finish
+
+
+def _fail_fetch():
+    pytest.fail("fetched by the other process")
+
+
+def test_other_process_quote_is_reused(quote_db, other_process):
+    # done while we wait: after our first lookup and failed lease
+    store = SteppedStore(quote_db, {"get": [None, other_process]})
+    cache = QuoteCache(ttl=60, store=store)
+
+    quote = cache.get_or_fetch(KEY, _fail_fetch)
+
+    assert quote.cached and cache.hits == 1
+
+
+@pytest.mark.parametrize("acquire_steps", [
+    # between the first lookup and the first lease attempt
+    [None],
+    # between a lookup while waiting and the lease takeover
+    [None, None],
+])
+def test_quote_cached_just_before_the_lease_is_reused(quote_db, other_process, acquire_steps):
+    store = SteppedStore(quote_db, {"acquire_lease": acquire_steps[:-1] + [other_process]})
+    cache = QuoteCache(ttl=60, store=store)
+    cache.POLL_INTERVAL = 0
+
+    quote = cache.get_or_fetch(KEY, _fail_fetch)
+
+    assert quote.cached and cache.hits == 1
+    # and the lease taken on the way is released
+    assert SqliteQuoteStore(quote_db).acquire_lease(KEY, 60) is not None
+
+
+def test_other_process_lease_survives_a_timed_out_wait(quote_db):
+    other = SqliteQuoteStore(quote_db)
+    lease = other.acquire_lease(KEY, 60)
+
+    cache = QuoteCache(ttl=60, store=SqliteQuoteStore(quote_db))
+    cache.LEASE_SECONDS = 0.1
+    cache.POLL_INTERVAL = 0.01
+
+    assert cache.get_or_fetch(KEY, _quote).successful
+    assert SqliteQuoteStore(quote_db).acquire_lease(KEY, 60) is None
+
+    other.release_lease(KEY, lease)
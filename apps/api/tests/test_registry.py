@@ -0,0 +1,45 @@
+import pytest
+
+from src.core.config import settings
+from src.providers.registry import BUILTIN_PROVIDERS, ProviderRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(settings, "providers", None)
+    monkeypatch.setattr(settings, "disabled_providers", [])
+    monkeypatch.setattr(settings, "providers_file", None)
+    return ProviderRegistry()
+
+
+def test_enabled_keys_defaults_to_every_discovered_provider(registry):
+    assert registry.enabled_keys() == sorted(BUILTIN_PROVIDERS)
+
+
+def test_enabled_keys_drops_unknown_explicit_keys(registry):
+    # without discovery every explicit key looked unknown
+    assert registry.enabled_keys(["gluex", "nope"]) == ["gluex"]
+
+
+def test_enabled_keys_keeps_explicit_order(registry):
+    assert registry.enabled_keys(["liqdswap", "gluex"]) == ["liqdswap", "gluex"]
+
+
+def test_enabled_keys_excludes_disabled(registry):
+    assert registry.enabled_keys(disabled=["gluex"]) == ["liqdswap"]
+    assert registry.enabled_keys(["gluex", "liqdswap"], ["liqdswap"]) == ["gluex"]
+
+
+def test_enabled_keys_uses_settings(registry, monkeypatch):
+    monkeypatch.setattr(settings, "providers", ["liqdswap"])
+    assert registry.enabled_keys() == ["liqdswap"]
+
+    monkeypatch.setattr(settings, "providers", None)
+    monkeypatch.setattr(settings, "disabled_providers", ["liqdswap"])
+    assert registry.enabled_keys() == ["gluex"]
+
+
+def test_enabled_keys_includes_registered_providers(registry):
+    registry.register("odos", lambda: None)
+    assert registry.enabled_keys() == sorted([*BUILTIN_PROVIDERS, "odos"])
+    assert registry.enabled_keys(["odos"]) == ["odos"]
@@ -0,0 +1,38 @@
+import pytest
+
+from src.core import responses
+from src.core.responses import accepted_encodings, choose_encoding, to_columns
+
+
+def test_accepted_encodings_parses_q_values():
+    assert accepted_encodings("gzip, deflate;q=0.5, BR;q=0, *;q=0.1, zstd;q=nope") == {
+        "gzip": 1.0, "deflate": 0.5, "br": 0.0, "*": 0.1, "zstd": 0.0,
+    }
+    assert accepted_encodings("") == {}
+
+
+@pytest.mark.parametrize("header, with_brotli, without_brotli", [
+    ("", None, None),
+    ("gzip, deflate, br", "br", "gzip"),
+    ("br;q=0, gzip", "gzip", "gzip"),
+    ("br;q=0.0", None, None),
+    ("gzip;q=0", None, None),
+    ("br;q=0.5, gzip;q=0.8", "gzip", "gzip"),
+    ("identity", None, None),
+    ("*", "br", "gzip"),
+    ("*;q=0.5, br;q=0", "gzip", "gzip"),
+    # "br" inside another coding's name isn't brotli
+    ("xbrotli", None, None),
+])
+def test_choose_encoding(monkeypatch, header, with_brotli, without_brotli):
+    monkeypatch.setattr(responses, "brotli", object())
+    assert choose_encoding(header) == with_brotli
+
+    monkeypatch.setattr(responses, "brotli", None)
+    assert choose_encoding(header) == without_brotli
+
+
+def test_to_columns_flattens_rows():
+    assert to_columns([{"id": 1, "results": {"GlueX": 2}}, {"id": 2, "extra": True}]) == {
+        "id": [1, 2], "results.GlueX": [2, None], "extra": [None, True],
+    }
@@ -0,0 +1,92 @@
+import pytest
+
+from src.core.routes import summarize_route, summarize_venues
+from src.providers.gluex import GluexProvider
+from src.providers.liqdswap import LiqdswapProvider
+
+
+@pytest.fixture(scope="module")
+def gluex():
+    return GluexProvider()
+
+
+@pytest.fixture(scope="module")
+def liqdswap():
+    return LiqdswapProvider()
+
+
+def test_summarize_route_normalizes_legs():
+    route = summarize_route([
+        [{"dex": "uniswap_v3", "percentage": 60}, {"protocol": {"name": "curve"}, "share": 0.4}],
+        [{"exchange": "balancer"}],
+    ])
+
+    assert route == {
+        "hop_count": 2,
+        "dexes": ["balancer", "curve", "uniswap_v3"],
+        "legs": [
+            {"hop": 0, "dex": "uniswap_v3", "share": 0.6},
+            {"hop": 0, "dex": "curve", "share": 0.4},
+            # a lone venue takes the whole hop
+            {"hop": 1, "dex": "balancer", "share": 1.0},
+        ],
+    }
+
+
+def test_summarize_route_skips_hops_without_venues():
+    route = summarize_route([[{"amount": "1"}], [{"dex": "uni", "share": "n/a"}]])
+
+    assert route["hop_count"] == 1
+    assert route["legs"] == [{"hop": 0, "dex": "uni", "share": 1.0}]
+    assert summarize_route([[{"amount": "1"}], ["uni"]]) is None
+
+
+def test_summarize_venues_has_no_hops():
+    assert summarize_venues([{"name": "uni"}, {"module": "curve"}, {"module": "uni"}, "x"]) == {
+        "hop_count": None, "dexes": ["curve", "uni"], "legs": [],
+    }
+    assert summarize_venues([{"amount": "1"}]) is None
+
+
+def test_gluex_route_hops(gluex):
+    route = gluex.extract_route({"result": {"outputAmount": "1", "route": [
+        {"swaps": [{"liquidityModule": "uniswap_v3", "percentage": 50}, {"liquidityModule": "curve", "percentage": 50}]},
+        {"dex": "balancer"},
+    ]}})
+
+    assert route["hop_count"] == 2
+    assert route["dexes"] == ["balancer", "curve", "uniswap_v3"]
+    assert [leg["share"] for leg in route["legs"]] == [0.5, 0.5, 1.0]
+
+
+def test_gluex_liquidity_modules_only_give_the_venues(gluex):
+    route = gluex.extract_route({"result": {"liquidityModules": ["uniswap_v3", {"name": "curve"}]}})
+
+    # no hop is made up from the module list
+    assert route == {"hop_count": None, "dexes": ["curve", "uniswap_v3"], "legs": []}
+
+
+@pytest.mark.parametrize("raw_response", [None, "html", {}, {"result": None}, {"result": {"route": "x"}}])
+def test_gluex_without_route(gluex, raw_response):
+    assert gluex.extract_route(raw_response) is None
+
+
+def test_liqdswap_route_hops(liqdswap):
+    route = liqdswap.extract_route({"data": {"bestRoute": {"hops": [
+        {"allocations": [{"routerName": "hyperswap", "percentage": 70}, {"routerName": "kittenswap", "percentage": 30}]},
+        {"allocations": [{"routerName": "hyperswap"}]},
+    ]}}})
+
+    assert route["hop_count"] == 2
+    assert route["dexes"] == ["hyperswap", "kittenswap"]
+    assert [(leg["hop"], leg["share"]) for leg in route["legs"]] == [(0, 0.7), (0, 0.3), (1, 1.0)]
+
+
+def test_liqdswap_route_list(liqdswap):
+    route = liqdswap.extract_route({"route": [{"dex": "hyperswap"}]})
+    assert route["legs"] == [{"hop": 0, "dex": "hyperswap", "share": 1.0}]
+
+
+@pytest.mark.parametrize("raw_response", [None, [], {"data": {}}, {"data": {"bestRoute": {"hops": None}}}])
+def test_liqdswap_without_route(liqdswap, raw_response):
+    assert liqdswap.extract_route(raw_response) is None
@@ -0,0 +1,78 @@
+from src.core.sizing import AdaptiveSizer
+
+
+# $1 to $100M, log-spaced
+AMOUNTS = [{"usd": 10 ** exponent} for exponent in range(9)]
+
+
+def _run(sizer, outputs):
+    """Quote round after round, `outputs(index)` giving each size's valid outputs"""
+
+    rounds = []
+    while True:
+        amounts = sizer.next_round()
+        if not amounts:
+            return rounds
+        rounds.append([AMOUNTS.index(amount) for amount in amounts])
+        for amount in amounts:
+            sizer.record(amount, outputs(AMOUNTS.index(amount)))
+
+
+def test_initial_round_spreads_over_the_grid():
+    sizer = AdaptiveSizer(AMOUNTS, initial_points=3)
+    assert sizer.next_round() == [AMOUNTS[0], AMOUNTS[4], AMOUNTS[8]]
+
+
+def test_small_grid_is_quoted_whole():
+    sizer = AdaptiveSizer(AMOUNTS[:3], initial_points=4)
+    assert sizer.next_round() == AMOUNTS[:3]
+
+
+def test_stable_winner_stops_after_the_first_round():
+    sizer = AdaptiveSizer(AMOUNTS, initial_points=3, convergence=0.01)
+
+    rounds = _run(sizer, lambda idx: {"GlueX": 110.0, "Liqdswap": 100.0})
+
+    assert rounds == [[0, 4, 8]]
+    assert sizer.skipped == 6
+
+
+def test_winner_flip_is_bisected():
+    sizer = AdaptiveSizer(AMOUNTS, initial_points=3, convergence=0.01)
+
+    rounds = _run(sizer, lambda idx: {"GlueX": 110.0, "Liqdswap": 100.0} if idx <= 6 else {"GlueX": 100.0, "Liqdswap": 110.0})
+
+    # down to the two neighbouring sizes the winner changes between
+    assert rounds == [[0, 4, 8], [6], [7]]
+    assert sizer.outcomes[6]["winner"] == "GlueX" and sizer.outcomes[7]["winner"] == "Liqdswap"
+
+
+def test_sizes_past_the_failure_point_are_skipped():
+    sizer = AdaptiveSizer(AMOUNTS, initial_points=3, convergence=0.01)
+
+    rounds = _run(sizer, lambda idx: {"GlueX": 110.0, "Liqdswap": 100.0} if idx <= 4 else {})
+
+    assert rounds == [[0, 4, 8], [6], [5]]
+    assert 7 not in sizer.outcomes
+
+
+def test_unconverged_margin_is_refined():
+    sizer = AdaptiveSizer(AMOUNTS, initial_points=3, convergence=0.001)
+
+    # same winner, pulling further ahead with every size
+    rounds = _run(sizer, lambda idx: {"GlueX": 100.0 + idx, "Liqdswap": 100.0})
+
+    assert rounds[0] == [0, 4, 8]
+    assert sorted(sizer.outcomes) == list(range(9))
+
+
+def test_record_keeps_the_winner_and_its_margin():
+    sizer = AdaptiveSizer(AMOUNTS, initial_points=3)
+
+    sizer.record(AMOUNTS[1], {"GlueX": 90.0, "Liqdswap": 100.0})
+    sizer.record(AMOUNTS[2], {"GlueX": 90.0})
+    sizer.record(AMOUNTS[3], {})
+
+    assert sizer.outcomes[1] == {"winner": "Liqdswap", "margin": 0.1}
+    assert sizer.outcomes[2] == {"winner": "GlueX", "margin": None}
+    assert sizer.outcomes[3] == {"winner": None, "margin": None}
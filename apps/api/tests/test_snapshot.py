@@ -0,0 +1,80 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.core.database import engine_options, fetch_columns, fetch_columns_async, to_async_url
+from src.core.snapshot import RunSnapshot
+from src.models import BenchmarkRun, ProviderResult, TradeResult
+
+
+def test_fetch_columns_transposes_every_chunk(make_session):
+    db_session = make_session()
+    db_session.add_all([BenchmarkRun(vantage_point=f"vp-{index}") for index in range(2500)])
+    db_session.commit()
+
+    ids, vantage_points = fetch_columns(
+        db_session,
+        select(BenchmarkRun.id, BenchmarkRun.vantage_point).order_by(BenchmarkRun.id).execution_options(yield_per=1000),
+    )
+
+    assert ids == list(range(1, 2501))
+    assert vantage_points[-1] == "vp-2499"
+    assert fetch_columns(db_session, select(BenchmarkRun.id).where(BenchmarkRun.id < 0)) == [[]]
+
+
+def test_snapshot_picks_winners(make_session):
+    db_session = make_session()
+    run = BenchmarkRun()
+    db_session.add(run)
+    db_session.flush()
+
+    outputs = [{"GlueX": "1.5", "Liqdswap": "1.2"}, {"GlueX": None, "Liqdswap": "2.0"}, {}]
+    for index, trade_outputs in enumerate(outputs):
+        trade = TradeResult(run_id=run.id, chain="999", pair=f"T{index}->USDC", amount_usd=100.0)
+        db_session.add(trade)
+        db_session.flush()
+        for provider, output in trade_outputs.items():
+            db_session.add(ProviderResult(
+                trade_id=trade.id, run_id=run.id, provider=provider, output_amount=output,
+                status_code=200 if output else 500,
+            ))
+    db_session.commit()
+
+    snapshot = RunSnapshot.load(db_session, [run.id])
+    outcomes = snapshot.outcomes()
+
+    assert snapshot.trade_count == 3
+    assert [snapshot.providers[code] if code >= 0 else None for code in outcomes["winner"]] == ["GlueX", "Liqdswap", None]
+    assert outcomes["valid"].tolist() == [2, 1, 0]
+    assert round(outcomes["diff"][0], 6) == 0.3
+    assert RunSnapshot.load(db_session, [run.id + 1]).trade_count == 0
+
+
+def test_fetch_columns_async_matches_the_sync_read(make_session):
+    db_session = make_session()
+    run = BenchmarkRun()
+    db_session.add(run)
+    db_session.flush()
+    for index in range(3):
+        trade = TradeResult(run_id=run.id, chain="999", pair=f"T{index}->USDC", amount_usd=100.0)
+        db_session.add(trade)
+        db_session.flush()
+        db_session.add(ProviderResult(trade_id=trade.id, run_id=run.id, provider="GlueX", output_amount="1", status_code=200))
+    db_session.commit()
+
+    query = RunSnapshot.query([run.id], chain="999")
+    async_url = to_async_url(str(db_session.get_bind().url))
+
+    async def read():
+        engine = create_async_engine(async_url, **engine_options(async_url))
+        try:
+            async with AsyncSession(engine) as async_session:
+                return await fetch_columns_async(async_session, query)
+        finally:
+            await engine.dispose()
+
+    columns = asyncio.run(read())
+
+    assert columns == fetch_columns(db_session, query)
+    assert RunSnapshot(columns).trade_count == 3